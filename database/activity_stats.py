@@ -0,0 +1,58 @@
+"""
+Compteurs par activité (table ``activity_stats``) en SQL brut.
+
+Mêmes règles que compute_counters() côté web (web/kanban/counters.py) :
+scellés, traitements / tâches en attente, en attente sur un scellé ni CTA ni
+réparation, présence d'un scellé CTA / réparation. Utilisé par
+migrate_activity_stats.py (remplissage initial) et board_changes.py (écritures
+de l'application de bureau).
+"""
+from sqlalchemy import bindparam, text
+
+PENDING = "COALESCE({t}.done, 0) = 0"
+FREE = "COALESCE(s.cta_validated, 0) = 0 AND COALESCE(s.reparations_validated, 0) = 0"
+
+COUNTER_COLUMNS = (
+    "scelle_count", "pending_traitements", "pending_taches",
+    "free_traitements", "free_taches", "has_cta", "has_reparations",
+)
+
+def _count(table, extra=""):
+    return (
+        f"(SELECT COUNT(*) FROM {table} x JOIN scelles s ON x.scelle_id = s.id "
+        f"WHERE s.activity_id = a.id AND {PENDING.format(t='x')}{extra})"
+    )
+
+def counters_select(where):
+    """SELECT (activity_id, compteurs..., version 1) des activités ``a`` filtrées par ``where``."""
+    return (
+        "SELECT a.id, "
+        "(SELECT COUNT(*) FROM scelles s WHERE s.activity_id = a.id), "
+        f"{_count('traitements')}, {_count('taches')}, "
+        f"{_count('traitements', ' AND ' + FREE)}, {_count('taches', ' AND ' + FREE)}, "
+        "EXISTS(SELECT 1 FROM scelles s WHERE s.activity_id = a.id AND s.cta_validated = 1), "
+        "EXISTS(SELECT 1 FROM scelles s WHERE s.activity_id = a.id AND s.reparations_validated = 1), "
+        "1 "
+        f"FROM activities a WHERE {where}"
+    )
+
+INSERT_COUNTERS = f"INSERT INTO activity_stats (activity_id, {', '.join(COUNTER_COLUMNS)}, version) "
+
+# Recalcule les compteurs et incrémente la version (les cartes mémorisées par le web sont renouvelées)
+REFRESH_COUNTERS = text(
+    INSERT_COUNTERS + counters_select("a.id IN :ids")
+    + " ON CONFLICT (activity_id) DO UPDATE SET "
+    + ", ".join(f"{name} = excluded.{name}" for name in COUNTER_COLUMNS)
+    + ", version = activity_stats.version + 1"
+).bindparams(bindparam("ids", expanding=True))
+
+DELETE_ORPHANS = text(
+    "DELETE FROM activity_stats WHERE activity_id IN :ids AND activity_id NOT IN (SELECT id FROM activities)"
+).bindparams(bindparam("ids", expanding=True))
+
+def refresh_counters(connection, activity_ids):
+    """Recalcule les compteurs des activités ``activity_ids`` sur ``connection`` (activités supprimées : ligne retirée)."""
+    ids = sorted(activity_ids)
+    if ids:
+        connection.execute(REFRESH_COUNTERS, {"ids": ids})
+        connection.execute(DELETE_ORPHANS, {"ids": ids})
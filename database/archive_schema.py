@@ -0,0 +1,116 @@
+"""
+Stockage froid des dossiers archivés : tables ``archived_*`` de même structure
+que les tables actives (activités, compteurs, tags, scellés, traitements,
+tâches).
+
+Archiver un dossier déplace son arbre complet dans ces tables, le restaurer
+le remet dans les tables actives : le tableau, la synthèse et les exports ne
+parcourent plus que le travail en cours. Les identifiants sont conservés
+(les tables actives sont en AUTOINCREMENT, un id n'est jamais réutilisé).
+
+SQL brut uniquement (pas de SQLAlchemy) : utilisé par database/migrate_archive.py,
+le web (kanban/archives.py) et le lanceur de tests Django.
+"""
+
+ARCHIVE_PREFIX = "archived_"
+
+ARCHIVED_COLUMN = "Archivé"
+
+# (table active, colonnes (nom, type), clé primaire, rattachement à l'activité)
+# Ordre parent -> enfant : insertions dans cet ordre, suppressions à l'envers.
+# "{ids}" = sélection des activités, "{scelles}" = table des scellés source.
+# Clé primaire None (tables d'association) : id ajouté côté archive.
+_BY_SCELLE = "scelle_id IN (SELECT id FROM {scelles} WHERE activity_id IN ({ids}))"
+ARCHIVED_TABLES = (
+    ("activities", (("id", "INTEGER"), ("name", "VARCHAR"), ("date", "DATE NOT NULL"),
+                    ("description", "TEXT"), ("column_id", "INTEGER")),
+     "id", "id IN ({ids})"),
+    ("activity_stats", (("activity_id", "INTEGER"), ("scelle_count", "INTEGER"),
+                        ("pending_traitements", "INTEGER"), ("pending_taches", "INTEGER"),
+                        ("free_traitements", "INTEGER"), ("free_taches", "INTEGER"),
+                        ("has_cta", "BOOLEAN"), ("has_reparations", "BOOLEAN"), ("version", "INTEGER")),
+     "activity_id", "activity_id IN ({ids})"),
+    ("activity_tags", (("activity_id", "INTEGER"), ("tag_id", "INTEGER")),
+     None, "activity_id IN ({ids})"),
+    ("scelles", (("id", "INTEGER"), ("name", "VARCHAR"), ("info", "TEXT"), ("activity_id", "INTEGER"),
+                 ("cta_validated", "BOOLEAN"), ("reparations_validated", "BOOLEAN"),
+                 ("reparations_details", "TEXT"), ("important_info", "TEXT")),
+     "id", "activity_id IN ({ids})"),
+    ("scelle_tags", (("scelle_id", "INTEGER"), ("tag_id", "INTEGER")), None, _BY_SCELLE),
+    ("traitements", (("id", "INTEGER"), ("description", "TEXT NOT NULL"), ("done", "BOOLEAN"),
+                     ("done_at", "DATE"), ("scelle_id", "INTEGER")),
+     "id", _BY_SCELLE),
+    ("taches", (("id", "INTEGER"), ("description", "VARCHAR NOT NULL"), ("done", "BOOLEAN"),
+                ("done_at", "DATE"), ("scelle_id", "INTEGER")),
+     "id", _BY_SCELLE),
+)
+
+# Tables actives dont les id doivent rester uniques entre les deux stockages
+AUTOINCREMENT_TABLES = ("activities", "scelles", "traitements", "taches")
+
+# Index des lectures de l'archive (pagination, filtres, détail d'un dossier)
+ARCHIVE_INDEXES = (
+    ("ix_archived_activities_date", "archived_activities", ("date",)),
+    ("ix_archived_activity_tags_activity_id", "archived_activity_tags", ("activity_id",)),
+    ("ix_archived_activity_tags_tag_id", "archived_activity_tags", ("tag_id",)),
+    ("ix_archived_scelles_activity_id", "archived_scelles", ("activity_id",)),
+    ("ix_archived_scelle_tags_scelle_id", "archived_scelle_tags", ("scelle_id",)),
+    ("ix_archived_traitements_scelle_id", "archived_traitements", ("scelle_id",)),
+    ("ix_archived_taches_scelle_id", "archived_taches", ("scelle_id",)),
+)
+
+
+def archived_table(table):
+    return f"{ARCHIVE_PREFIX}{table}"
+
+
+def create_statements():
+    """CREATE TABLE / INDEX IF NOT EXISTS des tables d'archive."""
+    statements = []
+    for table, columns, primary_key, _ in ARCHIVED_TABLES:
+        definitions = [] if primary_key else ["id INTEGER PRIMARY KEY"]
+        definitions += [
+            f"{name} INTEGER PRIMARY KEY" if name == primary_key else f"{name} {type_}"
+            for name, type_ in columns
+        ]
+        statements.append(f"CREATE TABLE IF NOT EXISTS {archived_table(table)} ({', '.join(definitions)})")
+    for name, table, columns in ARCHIVE_INDEXES:
+        statements.append(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    return statements
+
+
+def move_statements(to_archive, selection):
+    """
+    Déplace l'arbre des activités de ``selection`` (SQL renvoyant des id,
+    évalué côté source) vers l'archive ou, si ``to_archive`` est faux, vers
+    les tables actives. Chaque instruction prend les paramètres de ``selection``.
+    """
+    def source(table):
+        return archived_table(table) if not to_archive else table
+
+    def target(table):
+        return archived_table(table) if to_archive else table
+
+    inserts, deletes = [], []
+    for table, columns, _, condition in ARCHIVED_TABLES:
+        names = ", ".join(name for name, _ in columns)
+        where = condition.format(ids=selection, scelles=source("scelles"))
+        inserts.append(f"INSERT INTO {target(table)} ({names}) SELECT {names} FROM {source(table)} WHERE {where}")
+        deletes.append(f"DELETE FROM {source(table)} WHERE {where}")
+    return inserts + deletes[::-1]
+
+
+def archived_column_selection(placeholder="?"):
+    """Sélection des activités actives restées dans la colonne Archivé (paramètre : ARCHIVED_COLUMN)."""
+    return f"SELECT id FROM activities WHERE column_id IN (SELECT id FROM kanban_columns WHERE name = {placeholder})"
+
+
+def create_archive_schema(dbapi_connection):
+    """Crée les tables et index d'archive (idempotent)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in create_statements():
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
@@ -0,0 +1,95 @@
+"""
+Lecture des dossiers archivés (stockage froid, database/archive_schema.py)
+pour l'export PDF.
+
+Les tables ``archived_*`` n'ont pas de modèle SQLAlchemy : leurs lignes sont
+lues en SQL brut, une requête par niveau (activités, scellés, traitements,
+tâches), et rendues sous forme d'objets en lecture seule exposant les mêmes
+attributs que les modèles parcourus par les pages 1 et 4 (``name``, ``date``,
+``column.name``, ``scelles``, ``traitements``, ``taches``...). Le PDF liste
+ainsi les dossiers archivés comme avant leur passage en stockage froid.
+"""
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Boolean, Date, Integer, String, text
+
+from database.archive_schema import archived_table
+from database.loading import query_profile
+from database.models import Activity
+from database.statistics import has_archive_tables
+
+class ArchivedColumn(NamedTuple):
+    name: str
+
+class ArchivedItem(NamedTuple):
+    id: int
+    description: str
+    done: bool
+    done_at: Optional[object]
+
+class ArchivedScelle(NamedTuple):
+    id: int
+    name: str
+    cta_validated: bool
+    reparations_validated: bool
+    traitements: list
+    taches: list
+
+class ArchivedActivity(NamedTuple):
+    id: int
+    name: str
+    date: object
+    column: Optional[ArchivedColumn]
+    scelles: list
+
+def _items(session, table):
+    """Traitements ou tâches archivés, par id de scellé."""
+    rows = session.execute(
+        text(f"SELECT id, description, done, done_at, scelle_id FROM {archived_table(table)} ORDER BY id")
+        .columns(id=Integer, description=String, done=Boolean, done_at=Date, scelle_id=Integer)
+    )
+    by_scelle = {}
+    for id_, description, done, done_at, scelle_id in rows:
+        by_scelle.setdefault(scelle_id, []).append(ArchivedItem(id_, description, bool(done), done_at))
+    return by_scelle
+
+def load_archived_activities(session):
+    """Dossiers archivés avec colonne, scellés, traitements et tâches, triés par (date, id)."""
+    if not has_archive_tables(session):
+        return []
+    traitements = _items(session, "traitements")
+    taches = _items(session, "taches")
+
+    scelles = {}
+    rows = session.execute(
+        text(
+            f"SELECT id, name, cta_validated, reparations_validated, activity_id "
+            f"FROM {archived_table('scelles')} ORDER BY id"
+        ).columns(id=Integer, name=String, cta_validated=Boolean, reparations_validated=Boolean, activity_id=Integer)
+    )
+    for id_, name, cta, reparations, activity_id in rows:
+        scelles.setdefault(activity_id, []).append(ArchivedScelle(
+            id_, name, bool(cta), bool(reparations), traitements.get(id_, []), taches.get(id_, []),
+        ))
+
+    rows = session.execute(
+        text(
+            f"SELECT a.id, a.name, a.date, c.name FROM {archived_table('activities')} a "
+            f"LEFT JOIN kanban_columns c ON c.id = a.column_id ORDER BY a.date, a.id"
+        ).columns(id=Integer, name=String, date=Date, column=String)
+    )
+    return [
+        ArchivedActivity(id_, name, day, ArchivedColumn(column) if column is not None else None, scelles.get(id_, []))
+        for id_, name, day, column in rows
+    ]
+
+def export_activities(session):
+    """
+    Activités des pages 1 et 4 du PDF : actives (profil ``export_full``) et
+    archivées, triées ensemble par (date, id).
+    """
+    active = query_profile(session, "export_full").order_by(Activity.date, Activity.id).all()
+    archived = load_archived_activities(session)
+    if not archived:
+        return active
+    return sorted(active + archived, key=lambda act: (act.date, act.id))
@@ -0,0 +1,137 @@
+"""
+Benchmark du profil SQLite (database/sqlite_profile.py).
+
+Lance des lecteurs et un écrivain concurrents sur une base temporaire, une
+fois avec les réglages par défaut (journal rollback) et une fois avec le
+profil (WAL...), puis affiche lectures/s, écritures/s, latences et erreurs
+"database is locked".
+
+    python -m database.bench_sqlite_profile --readers 4 --seconds 5
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from .sqlite_profile import SQLITE_PRAGMAS, apply_sqlite_profile, read_pragmas
+
+ROWS = 20000
+
+# Requête de lecture proche du tableau : agrégat par colonne sur les activités
+READ_SQL = "SELECT column_id, COUNT(*), MAX(date) FROM activities GROUP BY column_id"
+WRITE_SQL = "UPDATE activities SET name = ?, date = date WHERE id = ?"
+
+
+def create_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE activities (id INTEGER PRIMARY KEY, name TEXT, date TEXT, column_id INTEGER, description TEXT)")
+    conn.executemany(
+        "INSERT INTO activities (id, name, date, column_id, description) VALUES (?, ?, ?, ?, ?)",
+        ((i, f"Activité {i}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", i % 8, "x" * 200) for i in range(1, ROWS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def connect(path, profile, timeout):
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    if profile:
+        apply_sqlite_profile(conn)
+    return conn
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(path, profile, readers, seconds, timeout):
+    stop = threading.Event()
+    results = {"reads": [], "writes": [], "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        conn = connect(path, profile, timeout)
+        latencies = []
+        errors = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute(READ_SQL).fetchall()
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with lock:
+            results["reads"].extend(latencies)
+            results["errors"] += errors
+
+    def writer():
+        conn = connect(path, profile, timeout)
+        latencies = []
+        errors = 0
+        i = 0
+        while not stop.is_set():
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.execute(WRITE_SQL, (f"Activité modifiée {i}", i % ROWS + 1))
+                conn.commit()
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                conn.rollback()
+                errors += 1
+        conn.close()
+        with lock:
+            results["writes"].extend(latencies)
+            results["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "reads_per_s": len(results["reads"]) / seconds,
+        "writes_per_s": len(results["writes"]) / seconds,
+        "read_p95_ms": percentile(results["reads"], 95) * 1000,
+        "write_p50_ms": (statistics.median(results["writes"]) * 1000) if results["writes"] else 0.0,
+        "write_p95_ms": percentile(results["writes"], 95) * 1000,
+        "write_max_ms": max(results["writes"], default=0.0) * 1000,
+        "errors": results["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lecteurs/écrivain SQLite : défaut vs profil WAL.")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="timeout sqlite3 (s) du mode par défaut (5 s comme sqlite3) ; le profil utilise busy_timeout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, profile in (("défaut", False), ("profil", True)):
+            path = os.path.join(tmp, f"bench_{label}.db")
+            create_database(path)
+            if profile:
+                conn = connect(path, True, args.timeout)
+                print("PRAGMA :", read_pragmas(conn, [name for name, _ in SQLITE_PRAGMAS]))
+                conn.close()
+            stats = run(path, profile, args.readers, args.seconds, args.timeout)
+            print(f"{label:7s} " + "  ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in stats.items()
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Écritures de l'application de bureau dans le journal ``board_changes``.
+
+Le web ajoute une ligne au journal à chaque écriture (web/kanban/changes.py)
+et s'en sert pour invalider son cache de fragments (MAX(id), voir
+kanban/board_cache.py) et pour les tableaux ouverts (/api/board/changes).
+Le bureau écrit dans le même fichier SQLite sans passer par Django :
+record_flush(), appelé après chaque flush des sessions de SessionLocal (voir
+db.py), fait la même chose dans la transaction du flush :
+
+- une ligne par dossier touché (activité, scellé, traitement ou tâche
+  ajouté, modifié ou supprimé), après recalcul de ses compteurs
+  ``activity_stats`` et incrément de leur version (cartes mémorisées par le
+  web renouvelées) ;
+- une ligne sans dossier (rechargement complet) si une colonne ou un tag a
+  changé.
+"""
+from datetime import datetime, timezone
+from itertools import chain
+
+from sqlalchemy import bindparam, inspect, insert, text
+
+from database.activity_stats import refresh_counters
+from database.models import Activity, BoardChange, KanbanColumn, Scelle, Tache, Tag, Traitement
+
+# Comme MAX_CHANGES de web/kanban/changes.py : seules les dernières lignes sont gardées
+MAX_CHANGES = 5000
+
+SCELLE_ACTIVITIES = text(
+    "SELECT DISTINCT activity_id FROM scelles WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+PRUNE = text("DELETE FROM board_changes WHERE id <= (SELECT MAX(id) FROM board_changes) - :keep")
+
+def _parent_ids(obj, column, relation):
+    """Valeurs actuelle et précédentes de la clé ``column`` (ou de la relation ``relation``), sans chargement."""
+    state = inspect(obj)
+    ids = {state.dict.get(column)}
+    ids.update(state.attrs[column].history.deleted)
+    ids.update(
+        inspect(parent).dict.get("id")
+        for parent in state.attrs[relation].history.deleted if parent is not None
+    )
+    return ids
+
+def touched(session):
+    """(ids des activités touchées par le flush, changement de structure) ; l'état avant flush est encore lisible."""
+    activity_ids, scelle_ids, structural = set(), set(), False
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Activity):
+            activity_ids.add(inspect(obj).dict.get("id"))
+        elif isinstance(obj, Scelle):
+            activity_ids.update(_parent_ids(obj, "activity_id", "activity"))
+        elif isinstance(obj, (Traitement, Tache)):
+            scelle_ids.update(_parent_ids(obj, "scelle_id", "scelle"))
+        elif isinstance(obj, (KanbanColumn, Tag)):
+            structural = True
+    scelle_ids.discard(None)
+    if scelle_ids:
+        rows = session.connection().execute(SCELLE_ACTIVITIES, {"ids": sorted(scelle_ids)})
+        activity_ids.update(rows.scalars())
+    activity_ids.discard(None)
+    return activity_ids, structural
+
+def record_flush(session):
+    """Compteurs et journal des dossiers touchés par le flush de ``session``."""
+    activity_ids, structural = touched(session)
+    if not activity_ids and not structural:
+        return
+    connection = session.connection()
+    refresh_counters(connection, activity_ids)
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = [{"activity_id": activity_id, "changed_at": now} for activity_id in sorted(activity_ids)]
+    if structural:
+        rows.append({"activity_id": None, "changed_at": now})
+    connection.execute(insert(BoardChange.__table__), rows)
+    connection.execute(PRUNE, {"keep": MAX_CHANGES})
@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from .sqlite_profile import apply_sqlite_profile
+
 # Utilisation de SQLite par défaut
 DATABASE_URL = "sqlite:///organiseur.db"
 
-engine = create_engine(DATABASE_URL, echo=False)
+def make_engine(url=DATABASE_URL):
+    """Moteur SQLAlchemy dont chaque nouvelle connexion reçoit le profil SQLite (WAL, busy_timeout...) partagé avec le web."""
+    engine = create_engine(url, echo=False)
+    event.listen(engine, "connect", lambda dbapi_connection, connection_record: apply_sqlite_profile(dbapi_connection))
+    return engine
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _record_board_changes(session, flush_context):
+    # Le web suit les écritures du bureau par le journal board_changes (board_changes.py)
+    from .board_changes import record_flush
+    record_flush(session)
+
+event.listen(SessionLocal, "after_flush", _record_board_changes)
+
 Base = declarative_base()
 
 def get_db():
@@ -0,0 +1,25 @@
+"""
+Index composites des chemins de filtrage les plus fréquents.
+
+Simple liste (nom, table, colonnes) sans dépendance à SQLAlchemy : elle est
+utilisée par database/models.py (create_all), par database/migrate_indexes.py
+(bases existantes) et par la vérification au démarrage du web (kanban/checks.py).
+"""
+
+HOT_INDEXES = (
+    # Traitements / tâches en attente d'un scellé (compteurs, cartes, colonnes)
+    ("ix_traitements_scelle_id_done", "traitements", ("scelle_id", "done")),
+    ("ix_taches_scelle_id_done", "taches", ("scelle_id", "done")),
+    # Traitements terminés sur une période (export admin, PDF, HTML du jour)
+    ("ix_traitements_done_done_at", "traitements", ("done", "done_at")),
+    # Scellés d'une activité avec leurs validations (routage CTA / Réparations)
+    ("ix_scelles_activity_id_validations", "scelles", ("activity_id", "cta_validated", "reparations_validated")),
+    # Activités d'une colonne triées par date (tableau, archives, synthèse)
+    ("ix_activities_column_id_date", "activities", ("column_id", "date")),
+)
+
+
+def missing_indexes(existing_names):
+    """Retourne les entrées de HOT_INDEXES dont le nom n'est pas dans ``existing_names``."""
+    existing_names = set(existing_names)
+    return [entry for entry in HOT_INDEXES if entry[0] not in existing_names]
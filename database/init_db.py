@@ -1,8 +1,45 @@
+from sqlalchemy import inspect
+
 from .db import engine, Base, SessionLocal
+from .indexes import missing_indexes
 from .models import KanbanColumn
+from .search_schema import SEARCH_TABLE, create_search_schema
+from .archive_schema import archived_table
+
+def ensure_indexes():
+    # create_all() ne crée pas les index sur des tables déjà existantes
+    inspector = inspect(engine)
+    existing = [
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    ]
+    missing = missing_indexes(existing)
+    if missing:
+        from .migrate_indexes import migrate
+        print(f"Index manquants : {', '.join(name for name, _, _ in missing)}")
+        migrate()
+
+def ensure_search_index():
+    # Table FTS5 + triggers, absente de Base.metadata (table virtuelle)
+    if SEARCH_TABLE not in inspect(engine).get_table_names():
+        connection = engine.raw_connection()
+        try:
+            create_search_schema(connection)
+        finally:
+            connection.close()
+
+def ensure_archive_tables():
+    # Stockage froid des dossiers archivés (hors Base.metadata, SQL brut)
+    if archived_table("activities") not in inspect(engine).get_table_names():
+        from .migrate_archive import migrate
+        migrate()
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    ensure_search_index()
+    ensure_archive_tables()
     
     # Initialize default columns if not present
     session = SessionLocal()
@@ -0,0 +1,44 @@
+"""
+Profils de chargement des modèles SQLAlchemy.
+
+Les relations de database/models.py sont en chargement paresseux : parcourir
+``act.scelles``, ``sc.traitements``, ``act.column`` ou ``col.activities``
+déclenche une requête par objet. Chaque profil nomme une requête de départ et
+les options ``selectinload`` / ``joinedload`` qui chargent d'avance tout ce
+que son usage parcourt ; le nombre de requêtes ne dépend alors plus du nombre
+de dossiers.
+
+- ``board`` : colonnes, leurs activités, tags et scellés (tableau) ;
+- ``export_full`` : activités avec colonne, tags, scellés, traitements et
+  tâches (export PDF complet) ;
+- ``daily`` : activités avec scellés, traitements et tâches (résumé du jour).
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from database.models import Activity, KanbanColumn, Scelle
+
+PROFILES = {
+    "board": (KanbanColumn, (
+        selectinload(KanbanColumn.activities).selectinload(Activity.tags),
+        selectinload(KanbanColumn.activities).selectinload(Activity.scelles),
+    )),
+    "export_full": (Activity, (
+        joinedload(Activity.column),
+        selectinload(Activity.tags),
+        selectinload(Activity.scelles).selectinload(Scelle.traitements),
+        selectinload(Activity.scelles).selectinload(Scelle.taches),
+    )),
+    "daily": (Activity, (
+        selectinload(Activity.scelles).selectinload(Scelle.traitements),
+        selectinload(Activity.scelles).selectinload(Scelle.taches),
+    )),
+}
+
+def profile_options(name):
+    """Options de chargement du profil ``name``."""
+    return PROFILES[name][1]
+
+def query_profile(session, name):
+    """Requête sur l'entité du profil ``name`` avec ses options de chargement."""
+    entity, options = PROFILES[name]
+    return session.query(entity).options(*options)
@@ -0,0 +1,23 @@
+from database.activity_stats import INSERT_COUNTERS, counters_select
+from database.db import engine
+from database.models import ActivityStats
+from sqlalchemy import text
+
+def migrate():
+    # Create the table if missing (no-op otherwise)
+    ActivityStats.__table__.create(bind=engine, checkfirst=True)
+    print("activity_stats table ready")
+
+    with engine.begin() as conn:
+        try:
+            # Fill the counters of activities that have no row yet.
+            # Check/repair afterwards with: python web/manage.py rebuild_activity_stats --check
+            result = conn.execute(text(
+                INSERT_COUNTERS + counters_select("a.id NOT IN (SELECT activity_id FROM activity_stats)")
+            ))
+            print(f"Added counters for {result.rowcount} activities")
+        except Exception as e:
+            print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
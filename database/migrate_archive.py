@@ -0,0 +1,66 @@
+from database.db import engine
+from database.models import ActivityStats, Base
+from database.archive_schema import (
+    ARCHIVED_COLUMN, AUTOINCREMENT_TABLES, archived_column_selection, archived_table,
+    create_archive_schema, move_statements,
+)
+from database.search_schema import SEARCH_TABLE, create_search_schema
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+def rebuild_autoincrement(connection, name):
+    # SQLite ne sait pas ajouter AUTOINCREMENT à une table : nouvelle table, copie, renommage.
+    # Les triggers de recherche disparaissent avec l'ancienne table (recréés par migrate()).
+    table = Base.metadata.tables[name]
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        if "AUTOINCREMENT" in cursor.fetchone()[0].upper():
+            return False
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({name})").fetchall()}
+        columns = ", ".join(column.name for column in table.columns if column.name in existing)
+        create = str(CreateTable(table).compile(engine))
+        cursor.execute(create.replace(f"CREATE TABLE {name} (", f"CREATE TABLE {name}_new (", 1))
+        cursor.execute(f"INSERT INTO {name}_new ({columns}) SELECT {columns} FROM {name}")
+        cursor.execute(f"DROP TABLE {name}")
+        cursor.execute(f"ALTER TABLE {name}_new RENAME TO {name}")
+        for index in table.indexes:
+            cursor.execute(str(CreateIndex(index, if_not_exists=True).compile(engine)))
+        return True
+    finally:
+        cursor.close()
+
+def migrate():
+    # Compteurs déplacés avec les dossiers
+    ActivityStats.__table__.create(bind=engine, checkfirst=True)
+
+    connection = engine.raw_connection()
+    try:
+        for name in AUTOINCREMENT_TABLES:
+            if rebuild_autoincrement(connection, name):
+                print(f"{name}: AUTOINCREMENT")
+        create_archive_schema(connection)
+        print(f"{archived_table('activities')} and related tables ready")
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,))
+        has_index = cursor.fetchone() is not None
+        # Triggers des tables reconstruites et des archives (index complet s'il n'existait pas)
+        create_search_schema(connection, rebuild=not has_index)
+
+        # Dossiers déjà archivés : déplacés vers le stockage froid
+        moved = None
+        for statement in move_statements(True, archived_column_selection()):
+            cursor.execute(statement, (ARCHIVED_COLUMN,))
+            if moved is None:
+                moved = cursor.rowcount
+        connection.commit()
+        cursor.close()
+        print(f"Moved {moved} archived activities to cold storage")
+    except Exception as e:
+        connection.rollback()
+        print(f"Migration error: {e}")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    migrate()
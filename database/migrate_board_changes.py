@@ -0,0 +1,13 @@
+from database.db import engine
+from database.models import BoardChange
+
+def migrate():
+    try:
+        # Create the table if missing (no-op otherwise)
+        BoardChange.__table__.create(bind=engine, checkfirst=True)
+        print("board_changes table ready")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
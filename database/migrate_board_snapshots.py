@@ -0,0 +1,13 @@
+from database.db import engine
+from database.models import BoardSnapshot
+
+def migrate():
+    try:
+        # Create the table if missing (no-op otherwise)
+        BoardSnapshot.__table__.create(bind=engine, checkfirst=True)
+        print("board_snapshots table ready")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,18 @@
+from database.db import engine
+from database.indexes import HOT_INDEXES
+from sqlalchemy import text
+
+def migrate():
+    with engine.begin() as conn:
+        for name, table, columns in HOT_INDEXES:
+            # IF NOT EXISTS: can be run again safely
+            try:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+                print(f"Index {name} ready")
+            except Exception as e:
+                print(f"Skipped {name}: {e}")
+        # Refresh the planner statistics for the new indexes
+        conn.execute(text("ANALYZE"))
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,16 @@
+from database.db import engine
+from database.search_schema import create_search_schema
+
+def migrate():
+    # Table FTS5 + triggers (IF NOT EXISTS), puis reconstruction complète de l'index
+    connection = engine.raw_connection()
+    try:
+        create_search_schema(connection)
+        print("search_index ready")
+    except Exception as e:
+        print(f"Migration error: {e}")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Table, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .db import Base
+from .indexes import HOT_INDEXES
 
 # Tables d'association pour les tags
 activity_tags = Table('activity_tags', Base.metadata,
@@ -35,6 +36,8 @@ class Tag(Base):
 
 class Activity(Base):
     __tablename__ = "activities"
+    # Id jamais réutilisé : les dossiers archivés gardent le leur (archive_schema.py)
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     date = Column(Date, nullable=False)
@@ -44,9 +47,11 @@ class Activity(Base):
     column = relationship("KanbanColumn", back_populates="activities")
     scelles = relationship("Scelle", back_populates="activity", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary=activity_tags, backref="activities")
+    stats = relationship("ActivityStats", back_populates="activity", uselist=False, cascade="all, delete-orphan")
 
 class Scelle(Base):
     __tablename__ = "scelles"
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     info = Column(Text, nullable=True) # "Informations"
@@ -66,6 +71,7 @@ class Scelle(Base):
 
 class Traitement(Base):
     __tablename__ = "traitements"
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, index=True)
     description = Column(Text, nullable=False)
     done = Column(Boolean, default=False)
@@ -76,6 +82,7 @@ class Traitement(Base):
 
 class Tache(Base):
     __tablename__ = "taches"
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String, nullable=False)
     done = Column(Boolean, default=False)
@@ -83,3 +90,44 @@ class Tache(Base):
     scelle_id = Column(Integer, ForeignKey("scelles.id"))
 
     scelle = relationship("Scelle", back_populates="taches")
+
+# Compteurs dénormalisés par activité (maintenus par l'interface web)
+class ActivityStats(Base):
+    __tablename__ = "activity_stats"
+    activity_id = Column(Integer, ForeignKey("activities.id"), primary_key=True)
+    scelle_count = Column(Integer, default=0, nullable=False)
+    pending_traitements = Column(Integer, default=0, nullable=False)
+    pending_taches = Column(Integer, default=0, nullable=False)
+    # Pending items on scelles that are neither CTA- nor repair-validated
+    free_traitements = Column(Integer, default=0, nullable=False)
+    free_taches = Column(Integer, default=0, nullable=False)
+    has_cta = Column(Boolean, default=False, nullable=False)
+    has_reparations = Column(Boolean, default=False, nullable=False)
+    version = Column(Integer, default=0, nullable=False)
+
+    activity = relationship("Activity", back_populates="stats")
+
+# Journal des modifications du tableau (interrogé par /api/board/changes)
+class BoardChange(Base):
+    __tablename__ = "board_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id = Column(Integer, primary_key=True)
+    # NULL = changement de structure (colonnes, tags) : rechargement complet
+    activity_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime, nullable=False)
+
+# Photographie quotidienne du tableau (manage.py snapshot_board), lue par la vue Tendances.
+# Une ligne par (jour, mesure, libellé) : mesure = column, status, tag ou done.
+class BoardSnapshot(Base):
+    __tablename__ = "board_snapshots"
+    __table_args__ = (UniqueConstraint("day", "metric", "label", name="uq_board_snapshots_day_metric_label"),)
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    metric = Column(String, nullable=False)
+    label = Column(String, nullable=False)
+    value = Column(Integer, nullable=False, default=0)
+
+# Index composites (voir database/indexes.py) ; bases existantes :
+# python -m database.migrate_indexes
+for _name, _table, _columns in HOT_INDEXES:
+    Index(_name, *(Base.metadata.tables[_table].c[c] for c in _columns))
@@ -0,0 +1,116 @@
+"""
+Index de recherche plein texte (SQLite FTS5) : table ``search_index`` tenue à
+jour par des triggers sur activities, scelles, traitements et taches.
+
+Chaque ligne indexée a un rowid dérivé de la ligne source (id * 4 + type), ce
+qui permet aux triggers de la remplacer ou de la supprimer sans autre table.
+Les triggers fonctionnent aussi pour les écritures de l'application bureau.
+Les tables d'archive (database/archive_schema.py), quand elles existent, sont
+indexées avec le rowid opposé : un dossier archivé reste trouvable et son
+déplacement entre les deux stockages ne crée pas de doublon.
+
+SQL brut uniquement (pas de SQLAlchemy) : utilisé par database/migrate_search.py,
+database/init_db.py et le lanceur de tests Django.
+"""
+
+from .archive_schema import archived_table
+
+SEARCH_TABLE = "search_index"
+
+# Code de type dans le rowid
+KINDS = {"activity": 0, "scelle": 1, "traitement": 2, "tache": 3}
+
+# Colonnes : type et id source non indexés, title et body indexés.
+# remove_diacritics 2 : "reparation" trouve "Réparation".
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "kind UNINDEXED, ref_id UNINDEXED, title, body, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# (table source, type, expression title, expression body) ; "{row}" = new/old
+SOURCES = (
+    ("activities", "activity", "{row}.name", "{row}.description"),
+    ("scelles", "scelle", "{row}.name",
+     "COALESCE({row}.info, '') || char(10) || COALESCE({row}.important_info, '') || char(10) || "
+     "COALESCE({row}.reparations_details, '')"),
+    ("traitements", "traitement", "{row}.description", "NULL"),
+    ("taches", "tache", "{row}.description", "NULL"),
+)
+
+
+def _rowid(kind, row, archived=False):
+    rowid = f"({row}.id * 4 + {KINDS[kind]})"
+    return f"-{rowid}" if archived else rowid
+
+
+def _insert(kind, title, body, row, archived=False):
+    return (
+        f"INSERT INTO {SEARCH_TABLE} (rowid, kind, ref_id, title, body) VALUES "
+        f"({_rowid(kind, row, archived)}, '{kind}', {row}.id, "
+        f"COALESCE({title.format(row=row)}, ''), COALESCE({body.format(row=row)}, ''));"
+    )
+
+
+def _delete(kind, row, archived=False):
+    return f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {_rowid(kind, row, archived)};"
+
+
+def _sources(archived):
+    """(table, type, title, body, archivée) des tables indexées ; archives seulement si ``archived``."""
+    sources = [(table, kind, title, body, False) for table, kind, title, body in SOURCES]
+    if archived:
+        sources += [(archived_table(table), kind, title, body, True) for table, kind, title, body in SOURCES]
+    return sources
+
+
+def trigger_statements(archived=False):
+    """CREATE TRIGGER IF NOT EXISTS des trois événements pour chaque table source."""
+    statements = []
+    for table, kind, title, body, cold in _sources(archived):
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+            f"{_insert(kind, title, body, 'new', cold)} END"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} BEGIN "
+            f"{_delete(kind, 'old', cold)} {_insert(kind, title, body, 'new', cold)} END"
+        )
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+            f"{_delete(kind, 'old', cold)} END"
+        )
+    return statements
+
+
+def rebuild_statements(archived=False):
+    """Vide puis remplit l'index à partir des tables source."""
+    statements = [f"DELETE FROM {SEARCH_TABLE}"]
+    for table, kind, title, body, cold in _sources(archived):
+        statements.append(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, ref_id, title, body) "
+            f"SELECT {_rowid(kind, table, cold)}, '{kind}', {table}.id, "
+            f"COALESCE({title.format(row=table)}, ''), COALESCE({body.format(row=table)}, '') FROM {table}"
+        )
+    statements.append(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return statements
+
+
+def create_search_schema(dbapi_connection, rebuild=True):
+    """Crée la table FTS5 et les triggers (idempotent), puis reconstruit l'index."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (archived_table("activities"),),
+        )
+        archived = cursor.fetchone() is not None
+        cursor.execute(CREATE_TABLE)
+        for statement in trigger_statements(archived):
+            cursor.execute(statement)
+        if rebuild:
+            for statement in rebuild_statements(archived):
+                cursor.execute(statement)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
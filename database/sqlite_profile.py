@@ -0,0 +1,45 @@
+"""
+Profil de connexion SQLite partagé par l'application bureau (database/db.py,
+SQLAlchemy) et l'application web (Django, voir kanban/apps.py).
+
+Les deux ouvrent le même organiseur.db : en WAL les lecteurs ne bloquent plus
+l'écrivain (ni l'inverse), et busy_timeout fait attendre une écriture
+concurrente au lieu d'échouer tout de suite avec "database is locked".
+
+Ce module n'utilise que sqlite3, pour pouvoir être importé des deux côtés.
+"""
+
+# Appliqués dans cet ordre à chaque nouvelle connexion
+SQLITE_PRAGMAS = (
+    # Lecteurs et écrivain concurrents (mode persistant, stocké dans le fichier)
+    ("journal_mode", "WAL"),
+    # En WAL, NORMAL reste sûr (pas de corruption) et évite un fsync par commit
+    ("synchronous", "NORMAL"),
+    # Valeur négative = taille en Kio : ~20 Mo de cache de pages par connexion
+    ("cache_size", -20000),
+    # Lectures via mmap (256 Mo maximum)
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    # Attente maximale (ms) d'un verrou tenu par une autre connexion
+    ("busy_timeout", 5000),
+)
+
+
+def apply_sqlite_profile(dbapi_connection, pragmas=SQLITE_PRAGMAS):
+    """Applique les PRAGMA du profil à une connexion sqlite3 (DB-API)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def read_pragmas(dbapi_connection, names=None):
+    """Retourne les valeurs effectives des PRAGMA (vérification / benchmark)."""
+    names = names or [name for name, _ in SQLITE_PRAGMAS]
+    cursor = dbapi_connection.cursor()
+    try:
+        return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+    finally:
+        cursor.close()
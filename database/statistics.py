@@ -0,0 +1,94 @@
+"""
+Statistiques du tableau pour l'export PDF (page 3), calculées en SQL.
+
+Mêmes chiffres que board_statistics() côté web (web/kanban/statistics.py) :
+activités par colonne et traitements / tâches validés sur le total, en une
+seule requête. Les dossiers archivés et leurs traitements / tâches sont
+comptés depuis le stockage froid, comme avant leur déplacement.
+Le coût ne dépend plus du nombre de dossiers chargés en mémoire. La présence
+des tables d'archives (migrate_archive.py) est vérifiée une fois par moteur.
+"""
+import weakref
+from typing import NamedTuple
+
+from sqlalchemy import Integer, func, inspect, literal, literal_column, select, text
+
+from database.archive_schema import ARCHIVED_COLUMN, archived_table
+from database.models import Activity, KanbanColumn, Tache, Traitement
+
+class BoardStatistics(NamedTuple):
+    columns: list
+    traitements_done: int
+    traitements_total: int
+    taches_done: int
+    taches_total: int
+
+    @property
+    def items_done(self):
+        return self.traitements_done + self.taches_done
+
+    @property
+    def items_total(self):
+        return self.traitements_total + self.taches_total
+
+# Moteur -> table des activités archivées présente
+_archive_tables = weakref.WeakKeyDictionary()
+
+def has_archive_tables(session):
+    engine = session.get_bind().engine
+    if engine not in _archive_tables:
+        _archive_tables[engine] = inspect(engine).has_table(archived_table("activities"))
+    return _archive_tables[engine]
+
+def _count(model, *criteria):
+    # Sous-requête COUNT non corrélée : évaluée une fois par requête
+    return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+def _archived_count(model, done=False):
+    where = " WHERE done = 1" if done else ""
+    return literal_column(f"(SELECT COUNT(*) FROM {archived_table(model.__tablename__)}{where})", Integer)
+
+def _item_counts(model, archives, done=False):
+    """Sous-requêtes COUNT des traitements ou tâches, stockage froid compris si ``archives``."""
+    count = _count(model, model.done == True) if done else _count(model)
+    if archives:
+        count = count + _archived_count(model, done)
+    return count
+
+def item_progress(session, model, archives=False):
+    """(validés, total) des traitements ou des tâches, stockage froid compris si ``archives``."""
+    return session.query(_item_counts(model, archives, done=True), _item_counts(model, archives)).one()
+
+def board_statistics(session):
+    """
+    BoardStatistics du tableau en une requête : le GROUP BY des colonnes porte
+    les totaux des traitements / tâches et des archives en sous-requêtes.
+    """
+    archives = has_archive_tables(session)
+    if archives:
+        archived = text(f"(SELECT COUNT(*) FROM {archived_table('activities')})")
+    else:
+        archived = literal(0)
+    rows = (
+        session.query(
+            KanbanColumn.name,
+            func.count(Activity.id),
+            archived,
+            _item_counts(Traitement, archives, done=True),
+            _item_counts(Traitement, archives),
+            _item_counts(Tache, archives, done=True),
+            _item_counts(Tache, archives),
+        )
+        .outerjoin(Activity, Activity.column_id == KanbanColumn.id)
+        .group_by(KanbanColumn.id)
+        .order_by(KanbanColumn.order_index, KanbanColumn.id)
+        .all()
+    )
+    if not rows:
+        return BoardStatistics([], *item_progress(session, Traitement, archives), *item_progress(session, Tache, archives))
+
+    archived = rows[0][2]
+    return BoardStatistics(
+        [(name, n + archived if name == ARCHIVED_COLUMN else n) for name, n, *_ in rows],
+        *rows[0][3:],
+    )
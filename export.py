@@ -5,105 +5,18 @@ from PySide6.QtGui import QPainter, QPdfWriter, QPageSize, QPageLayout, QFont, Q
 from PySide6.QtCore import QSize, QRect, QPoint, Qt
 from PySide6.QtWidgets import QWidget
 
+from database.archives import export_activities
 from database.db import SessionLocal
-from database.models import Activity, Scelle, Traitement, Tache, KanbanColumn
+from database.loading import query_profile
+from database.statistics import board_statistics
+from database.models import KanbanColumn
+from pdf_table import TableLayout
+# HTML summaries (no Qt), importable from here as before
+from html_report import export_daily_to_html, export_range_to_html  # noqa: F401
 
-def export_daily_to_html(filename):
-    session = SessionLocal()
-    activities = session.query(Activity).all()
-    today = date.today()
-    
-    # Filter for Daily Summary Page logic
-    daily_activities = [a for a in activities if a.date == today]
-    
-    validated_traitements = []
-    validated_taches = []
-    
-    for act in activities:
-        for sc in act.scelles:
-            for tr in sc.traitements:
-                if tr.done and tr.done_at == today:
-                    validated_traitements.append(f"{act.name} - Scellé: {sc.name} - {tr.description}")
-            for tk in sc.taches:
-                if tk.done and tk.done_at == today:
-                    validated_taches.append(f"{act.name} - Scellé: {sc.name} - {tk.description}")
-
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: Arial, sans-serif; color: #333; }}
-            h1 {{ color: #2c3e50; }}
-            h2 {{ color: #34495e; border-bottom: 2px solid #ddd; padding-bottom: 5px; }}
-            .activity {{ margin-bottom: 20px; padding: 10px; background: #f9f9f9; border-left: 4px solid #3498db; }}
-            .act-title {{ font-size: 1.2em; font-weight: bold; }}
-            .scelle {{ margin-left: 20px; margin-top: 5px; }}
-            .status-cta {{ color: green; font-weight: bold; }}
-            .status-rep {{ color: orange; font-weight: bold; }}
-            .pending {{ color: red; font-size: 0.9em; margin-left: 20px; }}
-            .list-item {{ margin: 5px 0; }}
-            .check {{ color: green; margin-right: 5px; }}
-        </style>
-    </head>
-    <body>
-        <h1>Résumé de la Journée ({today})</h1>
-        
-        <h2>Activités du jour</h2>
-    """
-    
-    if not daily_activities:
-        html += "<p><i>Aucune activité datée d'aujourd'hui.</i></p>"
-    else:
-        for act in daily_activities:
-            html += f"<div class='activity'><div class='act-title'>• {act.name}</div>"
-            for s in act.scelles:
-                status = []
-                if s.cta_validated: status.append("<span class='status-cta'>CTA OK</span>")
-                if s.reparations_validated: status.append("<span class='status-rep'>RÉPARATIONS</span>")
-                if not status: status.append("En cours")
-                status_str = " | ".join(status)
-                
-                html += f"<div class='scelle'>- Scellé: {s.name} ({status_str})</div>"
-                
-                pending_t = [t.description for t in s.taches if not t.done]
-                pending_tr = [tr.description for tr in s.traitements if not tr.done]
-                
-                if pending_t:
-                    html += f"<div class='pending'>Tâches restantes: {', '.join(pending_t)}</div>"
-                if pending_tr:
-                    html += f"<div class='pending'>Traitements restants: {', '.join(pending_tr)}</div>"
-            html += "</div>"
-            
-    html += """
-        <h2>Actions validées ce jour</h2>
-    """
-    
-    if not validated_traitements and not validated_taches:
-        html += "<p><i>Aucune action validée ce jour.</i></p>"
-    else:
-        if validated_traitements:
-            html += "<h3>Traitements</h3>"
-            for item in validated_traitements:
-                html += f"<div class='list-item'><span class='check'>✔</span> {item}</div>"
-                
-        if validated_taches:
-            html += "<h3>Tâches</h3>"
-            for item in validated_taches:
-                html += f"<div class='list-item'><span class='check'>✔</span> {item}</div>"
-        
-    html += """
-    </body>
-    </html>
-    """
-    
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(html)
-    
-    session.close()
-    return True
-
-def export_to_pdf(filename, board_widget):
+def export_to_pdf(filename, board_widget=None, start=None, end=None):
+    # Without board_widget (headless, see headless_report.py) page 2 is drawn
+    # from the database; start/end set the period of page 4 (default: today).
     writer = QPdfWriter(filename)
     writer.setPageSize(QPageSize.A4)
     writer.setResolution(300) # 300 DPI
@@ -111,14 +24,20 @@ def export_to_pdf(filename, board_widget):
     painter = QPainter(writer)
     
     session = SessionLocal()
-    activities = session.query(Activity).all()
+    # Columns, tags, scellés, traitements and tâches of every page loaded up front,
+    # archived dossiers (cold storage) included, as page 3 counts them
+    activities = export_activities(session)
     
     # Page 1: Global Summary Table
     draw_page_1(painter, writer, activities)
     
     # Page 2: Visual Snapshot
     writer.newPage()
-    draw_page_2(painter, writer, board_widget)
+    if board_widget is not None:
+        draw_page_2(painter, writer, board_widget)
+    else:
+        columns = query_profile(session, "board").order_by(KanbanColumn.order_index, KanbanColumn.id).all()
+        draw_page_2_from_data(painter, writer, columns)
     
     # Page 3: Charts
     writer.newPage()
@@ -126,7 +45,7 @@ def export_to_pdf(filename, board_widget):
     
     # Page 4: Daily Summary
     writer.newPage()
-    draw_page_4(painter, writer, activities)
+    draw_page_4(painter, writer, activities, start, end)
     
     session.close()
     painter.end()
@@ -142,72 +61,60 @@ def draw_header(painter, width, title):
     painter.drawText(QRect(0, 0, width, 100), Qt.AlignCenter, title)
     painter.restore()
 
+SUMMARY_HEADERS = ["Date", "Nom", "Colonne", "Scellés"]
+SUMMARY_WIDTHS = [300, 800, 400, 800]
+
+def summary_rows(activities):
+    # Built from the export_full row set: no query per row
+    return [
+        (
+            str(act.date),
+            act.name or "",
+            act.column.name if act.column else "N/A",
+            ", ".join(s.name or "" for s in act.scelles),
+        )
+        for act in activities
+    ]
+
 def draw_page_1(painter, writer, activities):
     page_rect = writer.pageLayout().paintRectPixels(writer.resolution())
     width = page_rect.width()
     
     draw_header(painter, width, "Récapitulatif Global")
     
-    # Table settings
-    y = 150
-    row_height = 80
-    col_widths = [300, 800, 400, 800] # Date, Name, Column, Scelles
-    headers = ["Date", "Nom", "Colonne", "Scellés"]
-    
     painter.save()
     font = painter.font()
     font.setPointSize(10)
+    font.setBold(False)
     painter.setFont(font)
-    
-    # Draw Headers
-    x = 50
-    painter.setBrush(QColor("#f2f2f2"))
     painter.setPen(Qt.black)
+    metrics = painter.fontMetrics()
     
-    for i, h in enumerate(headers):
-        rect = QRect(x, y, col_widths[i], row_height)
-        painter.drawRect(rect)
-        painter.drawText(rect, Qt.AlignCenter, h)
-        x += col_widths[i]
-        
-    y += row_height
+    def measure(text, cell_width):
+        return metrics.boundingRect(QRect(0, 0, cell_width, page_rect.height()), Qt.TextWordWrap, text).height()
     
-    # Draw Rows (limit lines to fit page for simplicity, or just truncate)
-    # Ideally should handle pagination for table, but requirement says "Page 1 is table"
-    # We will fill Page 1 and stop if full.
+    # Rows measured up front, then as many pages as needed (header repeated)
+    layout = TableLayout(SUMMARY_WIDTHS)
+    pages = layout.paginate(summary_rows(activities), measure, page_rect.height() - 50, first_top=150, top=50)
     
-    font.setBold(False)
-    painter.setFont(font)
-    
-    for act in activities:
-        if y + row_height > page_rect.height() - 50:
-            break # Stop if page full
-            
-        x = 50
-        
-        # Date
-        painter.drawText(QRect(x + 10, y, col_widths[0] - 20, row_height), Qt.AlignVCenter | Qt.AlignLeft, str(act.date))
-        painter.drawRect(QRect(x, y, col_widths[0], row_height))
-        x += col_widths[0]
-        
-        # Name
-        painter.drawText(QRect(x + 10, y, col_widths[1] - 20, row_height), Qt.AlignVCenter | Qt.AlignLeft, act.name)
-        painter.drawRect(QRect(x, y, col_widths[1], row_height))
-        x += col_widths[1]
+    for number, page in enumerate(pages):
+        if number:
+            writer.newPage()
         
-        # Column
-        col_name = act.column.name if act.column else "N/A"
-        painter.drawText(QRect(x + 10, y, col_widths[2] - 20, row_height), Qt.AlignVCenter | Qt.AlignLeft, col_name)
-        painter.drawRect(QRect(x, y, col_widths[2], row_height))
-        x += col_widths[2]
-        
-        # Scelles
-        scelles_str = ", ".join([s.name for s in act.scelles])
-        # Text ellipsis if too long
-        painter.drawText(QRect(x + 10, y, col_widths[3] - 20, row_height), Qt.AlignVCenter | Qt.AlignLeft, scelles_str)
-        painter.drawRect(QRect(x, y, col_widths[3], row_height))
+        # Headers
+        painter.setBrush(QColor("#f2f2f2"))
+        for (x, y, w, h), title in zip(layout.cell_rects(page.header_y, layout.header_height), SUMMARY_HEADERS):
+            rect = QRect(x, y, w, h)
+            painter.drawRect(rect)
+            painter.drawText(rect, Qt.AlignCenter, title)
+        painter.setBrush(Qt.NoBrush)
         
-        y += row_height
+        # Rows
+        for row in page.rows:
+            for (x, y, w, h), text in zip(layout.cell_rects(row.y, row.height), row.cells):
+                text_rect = QRect(x + layout.padding, y + layout.padding, w - 2 * layout.padding, h - 2 * layout.padding)
+                painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft | Qt.TextWordWrap, text)
+                painter.drawRect(QRect(x, y, w, h))
 
     painter.restore()
 
@@ -242,20 +149,77 @@ def draw_page_2(painter, writer, board_widget):
     y = 150
     painter.drawImage(x, y, scaled_image)
 
+def draw_page_2_from_data(painter, writer, columns):
+    # Same page as draw_page_2, the board being drawn from the columns and
+    # their activities instead of grabbed from the on-screen widget
+    page_rect = writer.pageLayout().paintRectPixels(writer.resolution())
+    width = page_rect.width()
+    height = page_rect.height()
+    
+    draw_header(painter, width, "Vue du Programme")
+    
+    x = 50
+    top = 150
+    bottom = height - 50
+    title_height = 70
+    card_height = 90
+    gap = 10
+    column_width = (width - 100) / len(columns) if columns else width - 100
+    
+    painter.save()
+    font = painter.font()
+    
+    for i, col in enumerate(columns):
+        col_x = int(x + i * column_width)
+        col_w = int(column_width) - gap
+        
+        # Column frame and title
+        painter.setPen(QColor("#999999"))
+        painter.setBrush(QColor("#f2f2f2"))
+        painter.drawRect(QRect(col_x, top, col_w, bottom - top))
+        font.setPointSize(8)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(Qt.black)
+        painter.drawText(QRect(col_x, top, col_w, title_height), Qt.AlignCenter | Qt.TextWordWrap,
+                         f"{col.name} ({len(col.activities)})")
+        
+        # Cards, as many as fit
+        font.setPointSize(6)
+        font.setBold(False)
+        painter.setFont(font)
+        cards = sorted(col.activities, key=lambda a: (a.date, a.id))
+        fitting = int((bottom - top - title_height - card_height) // (card_height + gap))
+        y = top + title_height
+        for act in cards[:fitting]:
+            color = act.tags[0].color if act.tags and act.tags[0].color else "#ffffff"
+            painter.setPen(QColor("#bbbbbb"))
+            painter.setBrush(QColor("#ffffff"))
+            card_rect = QRect(col_x + gap, y, col_w - 2 * gap, card_height)
+            painter.drawRect(card_rect)
+            painter.setBrush(QColor(color))
+            painter.drawRect(QRect(col_x + gap, y, 12, card_height))
+            painter.setPen(Qt.black)
+            painter.drawText(card_rect.adjusted(20, 5, -5, -5), Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                             f"{act.name or ''}\n{act.date} - {len(act.scelles)} scellé(s)")
+            y += card_height + gap
+        if len(cards) > fitting:
+            painter.drawText(QRect(col_x, y, col_w, card_height), Qt.AlignCenter, f"+ {len(cards) - fitting} autre(s)")
+    
+    painter.restore()
+
 def draw_page_3(painter, writer, session):
     page_rect = writer.pageLayout().paintRectPixels(writer.resolution())
     width = page_rect.width()
     
     draw_header(painter, width, "Statistiques")
     
+    # Column counts and completion in a few aggregate queries (database/statistics.py)
+    stats = board_statistics(session)
+    
     # 1. Activities per Column Bar Chart
-    columns = session.query(KanbanColumn).all()
-    col_counts = {}
-    max_count = 0
-    for col in columns:
-        c = len(col.activities)
-        col_counts[col.name] = c
-        if c > max_count: max_count = c
+    columns = stats.columns
+    max_count = max((count for _, count in columns), default=0)
     
     if max_count == 0: max_count = 1
     
@@ -277,8 +241,7 @@ def draw_page_3(painter, writer, session):
     painter.drawLine(x, y + bar_height, x + chart_width, y + bar_height) # X
     painter.drawLine(x, y, x, y + bar_height) # Y
     
-    for i, col in enumerate(columns):
-        count = col_counts[col.name]
+    for i, (name, count) in enumerate(columns):
         h = (count / max_count) * bar_height
         
         bar_rect = QRect(x + (i * bar_width) + 10, y + bar_height - h, bar_width - 20, h)
@@ -287,7 +250,7 @@ def draw_page_3(painter, writer, session):
         painter.drawRect(bar_rect)
         
         # Label
-        painter.drawText(QRect(x + (i * bar_width), y + bar_height + 10, bar_width, 50), Qt.AlignCenter | Qt.TextWordWrap, col.name)
+        painter.drawText(QRect(x + (i * bar_width), y + bar_height + 10, bar_width, 50), Qt.AlignCenter | Qt.TextWordWrap, name)
         # Count
         painter.drawText(QRect(x + (i * bar_width), y + bar_height - h - 30, bar_width, 30), Qt.AlignCenter, str(count))
         
@@ -298,14 +261,8 @@ def draw_page_3(painter, writer, session):
     painter.drawText(50, y, "Progression Globale (Tâches + Traitements)")
     y += 50
     
-    total_taches = session.query(Tache).count()
-    done_taches = session.query(Tache).filter(Tache.done == True).count()
-    
-    total_trait = session.query(Traitement).count()
-    done_trait = session.query(Traitement).filter(Traitement.done == True).count()
-    
-    total_items = total_taches + total_trait
-    total_done = done_taches + done_trait
+    total_items = stats.items_total
+    total_done = stats.items_done
     
     if total_items > 0:
         pct = (total_done / total_items)
@@ -328,14 +285,19 @@ def draw_page_3(painter, writer, session):
         painter.drawText(width/2 + pie_size/2 + 50, y + 50, f"Total: {total_items}")
         painter.drawText(width/2 + pie_size/2 + 50, y + 100, f"Fait: {total_done}")
 
-def draw_page_4(painter, writer, activities):
+def draw_page_4(painter, writer, activities, start=None, end=None):
     page_rect = writer.pageLayout().paintRectPixels(writer.resolution())
     width = page_rect.width()
     
-    today = date.today()
-    draw_header(painter, width, f"Résumé de la Journée ({today})")
+    start = start or date.today()
+    end = end or start
+    single_day = start == end
+    if single_day:
+        draw_header(painter, width, f"Résumé de la Journée ({start})")
+    else:
+        draw_header(painter, width, f"Résumé du {start} au {end}")
     
-    daily_activities = [a for a in activities if a.date == today]
+    daily_activities = [a for a in activities if start <= a.date <= end]
     
     y = 200
     x = 100
@@ -347,7 +309,8 @@ def draw_page_4(painter, writer, activities):
         font.setPointSize(14)
         font.setItalic(True)
         painter.setFont(font)
-        painter.drawText(QRect(x, y, width - 200, 100), Qt.AlignCenter, "Aucune activité datée d'aujourd'hui.")
+        painter.drawText(QRect(x, y, width - 200, 100), Qt.AlignCenter,
+                         "Aucune activité datée d'aujourd'hui." if single_day else "Aucune activité datée sur la période.")
     else:
         for act in daily_activities:
             # Activity container
@@ -404,7 +367,8 @@ def draw_page_4(painter, writer, activities):
     font.setPointSize(14)
     font.setBold(True)
     painter.setFont(font)
-    painter.drawText(QRect(50, y, width, 50), Qt.AlignLeft, "Actions validées ce jour")
+    painter.drawText(QRect(50, y, width, 50), Qt.AlignLeft,
+                     "Actions validées ce jour" if single_day else "Actions validées sur la période")
     y += 60
     
     # Fetch from DB logic or filter from activities (Activities might not have everything loaded if closed session, 
@@ -420,10 +384,10 @@ def draw_page_4(painter, writer, activities):
     for act in activities:
         for sc in act.scelles:
             for tr in sc.traitements:
-                if tr.done and tr.done_at == today:
+                if tr.done and tr.done_at and start <= tr.done_at <= end:
                     validated_traitements.append(f"{act.name} - Scellé: {sc.name} - {tr.description}")
             for tk in sc.taches:
-                if tk.done and tk.done_at == today:
+                if tk.done and tk.done_at and start <= tk.done_at <= end:
                     validated_taches.append(f"{act.name} - Scellé: {sc.name} - {tk.description}")
 
     font.setPointSize(12)
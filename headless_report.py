@@ -0,0 +1,128 @@
+"""
+Headless PDF reports: export.export_to_pdf() without the desktop window.
+
+Qt runs on the "offscreen" platform and page 2 (board view) is drawn from the
+database, so reports can be produced from a scheduled task or a shell:
+
+    python headless_report.py rapport.pdf
+    python headless_report.py --start 2025-01-01 --end 2025-03-31 --period month --workers 3 -o rapports
+
+A batch is split into one report per period (day, week or month), rendered
+in parallel worker processes. Each worker has its own Qt application and its
+own database connection; run it from the application folder (organiseur.db)
+or give the SQLite file with --database.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+PERIODS = ("day", "week", "month")
+
+_app = None
+
+def _ensure_app():
+    # QPdfWriter needs a QGuiApplication (fonts); no display with "offscreen"
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtGui import QGuiApplication
+    _app = QGuiApplication.instance() or QGuiApplication([sys.argv[0]])
+    return _app
+
+def use_database(path):
+    """Point the sessions of this process at the SQLite file ``path`` instead of organiseur.db."""
+    from database.db import SessionLocal, make_engine
+
+    SessionLocal.configure(bind=make_engine(f"sqlite:///{path}"))
+
+def render_report(filename, start=None, end=None, database=None):
+    """Write the four-page report of the period [start, end] (default: today) to ``filename``."""
+    _ensure_app()
+    if database:
+        use_database(database)
+    from export import export_to_pdf
+    export_to_pdf(filename, None, start, end)
+    return filename
+
+def split_periods(start, end, period):
+    """[(start, end), ...] covering start..end, one item per day, ISO week (Monday) or month."""
+    periods = []
+    current = start
+    while current <= end:
+        if period == "day":
+            last = current
+        elif period == "week":
+            last = current + timedelta(days=6 - current.weekday())
+        else:
+            next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+            last = next_month - timedelta(days=1)
+        last = min(last, end)
+        periods.append((current, last))
+        current = last + timedelta(days=1)
+    return periods
+
+def report_filename(output_dir, start, end):
+    name = f"rapport_{start}.pdf" if start == end else f"rapport_{start}_{end}.pdf"
+    return os.path.join(output_dir, name)
+
+def render_batch(periods, output_dir, workers=None, database=None):
+    """
+    Render one report per (start, end) of ``periods`` in ``output_dir`` with
+    ``workers`` processes (default: one per CPU), from the SQLite file
+    ``database`` (default: organiseur.db). Yields (filename, error) as the
+    reports complete, error being None on success.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # "spawn": fresh processes, nothing of Qt or SQLite inherited from this one
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = {
+            pool.submit(render_report, report_filename(output_dir, start, end), start, end, database): (start, end)
+            for start, end in periods
+        }
+        for future in as_completed(futures):
+            start, end = futures[future]
+            filename = report_filename(output_dir, start, end)
+            try:
+                future.result()
+                yield filename, None
+            except Exception as e:
+                yield filename, e
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les rapports PDF sans interface graphique")
+    parser.add_argument("filename", nargs="?", help="Rapport unique (période --start/--end, défaut : aujourd'hui)")
+    parser.add_argument("--start", type=date.fromisoformat, help="Début de la période (AAAA-MM-JJ)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Fin de la période (AAAA-MM-JJ)")
+    parser.add_argument("--period", choices=PERIODS,
+                        help="Un rapport par jour, semaine ou mois de --start à --end, dans --output-dir")
+    parser.add_argument("-o", "--output-dir", default="rapports", help="Dossier des rapports d'un lot")
+    parser.add_argument("--workers", type=int, help="Processus en parallèle (défaut : un par processeur)")
+    parser.add_argument("--database", help="Fichier SQLite (défaut : organiseur.db du dossier courant)")
+    args = parser.parse_args(argv)
+
+    start = args.start or date.today()
+    end = args.end or start
+    if end < start:
+        parser.error("--end est antérieure à --start")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers doit être positif")
+
+    if not args.period:
+        filename = args.filename or report_filename(".", start, end)
+        render_report(filename, start, end, args.database)
+        print(f"✓ {filename}")
+        return 0
+
+    failed = 0
+    for filename, error in render_batch(split_periods(start, end, args.period), args.output_dir, args.workers, args.database):
+        if error is None:
+            print(f"✓ {filename}")
+        else:
+            failed += 1
+            print(f"✗ {filename} : {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+HTML summary of a day or a period (activities dated in it, items validated in
+it), for export.export_daily_to_html / export_range_to_html.
+
+No Qt here, unlike the PDF exporter: the summary can be written (and tested)
+from any session, write_range_html() taking the session and the open file.
+"""
+from datetime import date
+from html import escape
+from itertools import chain
+
+from database.db import SessionLocal
+from database.loading import profile_options
+from database.models import Activity, Scelle, Traitement, Tache
+
+HTML_HEAD = """<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; color: #333; }}
+        h1 {{ color: #2c3e50; }}
+        h2 {{ color: #34495e; border-bottom: 2px solid #ddd; padding-bottom: 5px; }}
+        .activity {{ margin-bottom: 20px; padding: 10px; background: #f9f9f9; border-left: 4px solid #3498db; }}
+        .act-title {{ font-size: 1.2em; font-weight: bold; }}
+        .scelle {{ margin-left: 20px; margin-top: 5px; }}
+        .status-cta {{ color: green; font-weight: bold; }}
+        .status-rep {{ color: orange; font-weight: bold; }}
+        .pending {{ color: red; font-size: 0.9em; margin-left: 20px; }}
+        .list-item {{ margin: 5px 0; }}
+        .check {{ color: green; margin-right: 5px; }}
+    </style>
+</head>
+<body>
+    <h1>{title}</h1>
+"""
+
+HTML_END = """
+</body>
+</html>
+"""
+
+# Validated items are read by batches of this size
+YIELD_PER = 500
+
+def export_daily_to_html(filename, day=None):
+    day = day or date.today()
+    return export_range_to_html(filename, day, day)
+
+def export_range_to_html(filename, start, end):
+    session = SessionLocal()
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            write_range_html(f, session, start, end)
+    finally:
+        session.close()
+    return True
+
+def write_range_html(f, session, start, end):
+    # Only the activities dated in the range (scellés and their items loaded with
+    # one SELECT ... IN per level) and the items validated in the range are read;
+    # the file is written as the rows come instead of being built in memory.
+    single_day = start == end
+    if single_day:
+        title = f"Résumé de la Journée ({start})"
+    else:
+        title = f"Résumé du {start} au {end}"
+    f.write(HTML_HEAD.format(title=escape(title)))
+
+    f.write("\n    <h2>Activités du jour</h2>\n" if single_day else "\n    <h2>Activités de la période</h2>\n")
+    written = 0
+    for act in dated_activities(session, start, end):
+        write_activity(f, act, show_date=not single_day)
+        written += 1
+    if not written:
+        f.write("<p><i>Aucune activité datée d'aujourd'hui.</i></p>" if single_day
+                else "<p><i>Aucune activité datée sur la période.</i></p>")
+
+    f.write("\n    <h2>Actions validées ce jour</h2>\n" if single_day
+            else "\n    <h2>Actions validées sur la période</h2>\n")
+    written = 0
+    for label, model in (("Traitements", Traitement), ("Tâches", Tache)):
+        rows = validated_items(session, model, start, end)
+        first = next(rows, None)
+        if first is None:
+            continue
+        f.write(f"<h3>{label}</h3>\n")
+        for done_at, act_name, scelle_name, description in chain([first], rows):
+            prefix = "" if single_day else f"{done_at} - "
+            f.write(
+                f"<div class='list-item'><span class='check'>✔</span> "
+                f"{escape(f'{prefix}{act_name} - Scellé: {scelle_name} - {description}')}</div>\n"
+            )
+            written += 1
+    if not written:
+        f.write("<p><i>Aucune action validée ce jour.</i></p>" if single_day
+                else "<p><i>Aucune action validée sur la période.</i></p>")
+
+    f.write(HTML_END)
+
+def dated_activities(session, start, end):
+    return (
+        session.query(Activity)
+        .filter(Activity.date.between(start, end))
+        .options(*profile_options("daily"))
+        .order_by(Activity.date, Activity.id)
+        .all()
+    )
+
+def validated_items(session, model, start, end):
+    # (done_at, activity name, scellé name, description) rows, no ORM objects
+    query = (
+        session.query(model.done_at, Activity.name, Scelle.name, model.description)
+        .join(model.scelle)
+        .join(Scelle.activity)
+        .filter(model.done == True, model.done_at.between(start, end))
+        .order_by(model.done_at, model.id)
+        .yield_per(YIELD_PER)
+    )
+    return iter(query)
+
+def write_activity(f, act, show_date=False):
+    title = f"{act.date} - {act.name}" if show_date else act.name
+    f.write(f"<div class='activity'><div class='act-title'>• {escape(str(title))}</div>")
+    for s in act.scelles:
+        status = []
+        if s.cta_validated: status.append("<span class='status-cta'>CTA OK</span>")
+        if s.reparations_validated: status.append("<span class='status-rep'>RÉPARATIONS</span>")
+        if not status: status.append("En cours")
+        status_str = " | ".join(status)
+
+        f.write(f"<div class='scelle'>- Scellé: {escape(str(s.name))} ({status_str})</div>")
+
+        pending_t = [escape(t.description) for t in s.taches if not t.done]
+        pending_tr = [escape(tr.description) for tr in s.traitements if not tr.done]
+
+        if pending_t:
+            f.write(f"<div class='pending'>Tâches restantes: {', '.join(pending_t)}</div>")
+        if pending_tr:
+            f.write(f"<div class='pending'>Traitements restants: {', '.join(pending_tr)}</div>")
+    f.write("</div>\n")
@@ -0,0 +1,70 @@
+"""
+Table layout for the PDF exporter.
+
+Every row is measured first (wrapped text of each cell), then the rows are
+split into as many pages as needed, the header row being repeated at the top
+of each page. No Qt here: the exporter passes a ``measure(text, width)``
+function returning the height of the wrapped text, so a layout can be
+computed (and tested) without a paint device.
+"""
+from typing import NamedTuple
+
+
+class PlacedRow(NamedTuple):
+    y: int
+    height: int
+    cells: tuple
+
+
+class TablePage(NamedTuple):
+    header_y: int
+    rows: list
+
+
+class TableLayout:
+    def __init__(self, widths, header_height=80, min_row_height=80, padding=10, x=50):
+        self.widths = list(widths)
+        self.header_height = header_height
+        self.min_row_height = min_row_height
+        self.padding = padding
+        self.x = x
+
+    def cell_rects(self, y, height):
+        """(x, y, width, height) of each cell of a row drawn at ``y``."""
+        x = self.x
+        rects = []
+        for width in self.widths:
+            rects.append((x, y, width, height))
+            x += width
+        return rects
+
+    def row_height(self, cells, measure, max_height):
+        text_height = max((measure(str(text), width - 2 * self.padding)
+                           for text, width in zip(cells, self.widths)), default=0)
+        # A row taller than a page is clipped to the page
+        return min(max(self.min_row_height, text_height + 2 * self.padding), max_height)
+
+    def paginate(self, rows, measure, page_bottom, first_top, top):
+        """
+        Place ``rows`` (sequences of cell texts) on pages: the first page
+        starts at ``first_top`` (below the title), the next ones at ``top``,
+        and no row goes below ``page_bottom``. Always returns at least one
+        page (header only when there are no rows).
+
+        A row that does not fit below the title of the first page is clipped
+        to it, as row_height() clips a row taller than a page, so that the
+        first page never holds a header alone.
+        """
+        pages = [TablePage(first_top, [])]
+        y = first_top + self.header_height
+        for cells in rows:
+            height = self.row_height(cells, measure, page_bottom - top - self.header_height)
+            if y + height > page_bottom:
+                if not pages[-1].rows and page_bottom - y >= self.min_row_height:
+                    height = page_bottom - y
+                else:
+                    pages.append(TablePage(top, []))
+                    y = top + self.header_height
+            pages[-1].rows.append(PlacedRow(y, height, tuple(cells)))
+            y += height
+        return pages
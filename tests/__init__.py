@@ -0,0 +1,8 @@
+"""
+Tests of the desktop side (database/, export and report modules), without
+Django. From the application folder:
+
+    python -m unittest discover -s tests -t .
+
+The web application has its own tests: ``python web/manage.py test kanban``.
+"""
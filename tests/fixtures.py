@@ -0,0 +1,77 @@
+"""SQLite databases (in memory or in a file) with the schema of database/models.py."""
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from database import models
+from database.archive_schema import ARCHIVED_COLUMN, archived_column_selection, create_archive_schema, move_statements
+
+
+def memory_engine():
+    return file_engine(None)
+
+
+def file_engine(path):
+    """Engine on the SQLite file ``path`` (None: in memory), schema created."""
+    engine = create_engine(f"sqlite:///{path}" if path else "sqlite://")
+    models.Base.metadata.create_all(engine)
+    return engine
+
+
+def seed_activities(engine, activities, day=None):
+    """``activities`` activities over two columns, each with 2 scellés of 2 traitements and 2 tâches."""
+    day = day or date.today()
+    with Session(engine) as session:
+        columns = [models.KanbanColumn(name=name) for name in ("En cours", "Terminé")]
+        tag = models.Tag(name="Urgent", color="#ff0000")
+        for i in range(activities):
+            activity = models.Activity(name=f"Dossier {i}", date=day, column=columns[i % 2], tags=[tag])
+            for j in range(2):
+                activity.scelles.append(models.Scelle(
+                    name=f"S{i}-{j}",
+                    traitements=[models.Traitement(description=f"T{k}") for k in range(2)],
+                    taches=[models.Tache(description=f"K{k}") for k in range(2)],
+                ))
+            session.add(activity)
+        session.commit()
+
+
+def archive_activity(engine, name):
+    """Move the activity ``name`` to the Archivé column, then its tree to cold storage."""
+    with Session(engine) as session:
+        column = session.query(models.KanbanColumn).filter_by(name=ARCHIVED_COLUMN).one_or_none()
+        column = column or models.KanbanColumn(name=ARCHIVED_COLUMN, order_index=9)
+        session.query(models.Activity).filter_by(name=name).one().column = column
+        session.commit()
+    connection = engine.raw_connection()
+    try:
+        create_archive_schema(connection)
+        cursor = connection.cursor()
+        for statement in move_statements(True, archived_column_selection()):
+            cursor.execute(statement, (ARCHIVED_COLUMN,))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class CountQueries:
+    """Context manager collecting the SQL statements run on ``engine``."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from database import models
+from database.archive_schema import ARCHIVED_COLUMN
+from database.archives import export_activities, load_archived_activities
+
+from .fixtures import CountQueries, archive_activity, memory_engine, seed_activities
+
+
+class ExportActivitiesTests(unittest.TestCase):
+    """Pages 1 and 4 of the PDF read the archived dossiers from cold storage."""
+
+    def setUp(self):
+        self.engine = memory_engine()
+        self.addCleanup(self.engine.dispose)
+        seed_activities(self.engine, 4)
+        self.yesterday = date.today() - timedelta(days=1)
+        with Session(self.engine) as session:
+            activity = session.query(models.Activity).filter_by(name="Dossier 1").one()
+            activity.date = self.yesterday
+            activity.scelles[0].traitements[0].done = True
+            activity.scelles[0].traitements[0].done_at = self.yesterday
+            activity.scelles[0].cta_validated = True
+            session.commit()
+
+    def test_without_archive_tables(self):
+        with Session(self.engine) as session:
+            self.assertEqual(load_archived_activities(session), [])
+            self.assertEqual([act.name for act in export_activities(session)],
+                             ["Dossier 1", "Dossier 0", "Dossier 2", "Dossier 3"])
+
+    def test_archived_dossier_keeps_its_tree(self):
+        archive_activity(self.engine, "Dossier 1")
+        with Session(self.engine) as session:
+            self.assertIsNone(session.query(models.Activity).filter_by(name="Dossier 1").one_or_none())
+            (archived,) = load_archived_activities(session)
+
+        self.assertEqual((archived.name, archived.date, archived.column.name), ("Dossier 1", self.yesterday, ARCHIVED_COLUMN))
+        self.assertEqual([scelle.name for scelle in archived.scelles], ["S1-0", "S1-1"])
+        scelle = archived.scelles[0]
+        self.assertEqual((scelle.cta_validated, scelle.reparations_validated), (True, False))
+        self.assertEqual([item.description for item in scelle.taches], ["K0", "K1"])
+        done = [(item.description, item.done_at) for item in scelle.traitements if item.done]
+        self.assertEqual(done, [("T0", self.yesterday)])
+
+    def test_export_activities_merges_both_storages(self):
+        archive_activity(self.engine, "Dossier 1")
+        with CountQueries(self.engine) as queries, Session(self.engine) as session:
+            activities = export_activities(session)
+            names = [act.name for act in activities]
+            scelles = sum(len(act.scelles) for act in activities)
+        # Sorted by (date, id): the archived dossier is the oldest
+        self.assertEqual(names, ["Dossier 1", "Dossier 0", "Dossier 2", "Dossier 3"])
+        self.assertEqual(scelles, 8)
+        # export_full profile (5), archive tables check (1), one query per cold level (4)
+        self.assertEqual(queries.count, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import models
+from database.db import SessionLocal
+
+from .fixtures import CountQueries, memory_engine, seed_activities
+
+
+class DesktopBoardChangesTests(unittest.TestCase):
+    """Writes of the desktop sessions refresh activity_stats and log board_changes, as the web views do."""
+
+    def setUp(self):
+        self.engine = memory_engine()
+        self.addCleanup(self.engine.dispose)
+        seed_activities(self.engine, 3)
+        with Session(self.engine) as session:
+            self.activity_id = session.query(models.Activity.id).filter_by(name="Dossier 1").scalar()
+
+    def session(self):
+        # Same sessionmaker (and after_flush hook) as the desktop app, on the test engine
+        return SessionLocal(bind=self.engine)
+
+    def changes(self):
+        with self.engine.connect() as connection:
+            return connection.execute(text("SELECT activity_id FROM board_changes ORDER BY id")).scalars().all()
+
+    def stats(self):
+        with Session(self.engine) as session:
+            stats = session.get(models.ActivityStats, self.activity_id)
+            return stats and (stats.pending_traitements, stats.has_cta, stats.version)
+
+    def test_seeding_outside_the_desktop_sessions_logs_nothing(self):
+        self.assertEqual(self.changes(), [])
+        self.assertIsNone(self.stats())
+
+    def test_traitement_write_refreshes_counters_and_logs_the_activity(self):
+        with self.session() as session:
+            traitement = session.query(models.Traitement).join(models.Scelle).filter(
+                models.Scelle.activity_id == self.activity_id).first()
+            traitement.done = True
+            session.commit()
+        self.assertEqual(self.changes(), [self.activity_id])
+        self.assertEqual(self.stats(), (3, False, 1))
+
+        with self.session() as session:
+            session.query(models.Scelle).filter_by(activity_id=self.activity_id).first().cta_validated = True
+            session.commit()
+        self.assertEqual(self.changes(), [self.activity_id, self.activity_id])
+        # Version bumped: the card memoized by the web is rendered again
+        self.assertEqual(self.stats(), (3, True, 2))
+
+    def test_moved_scelle_logs_both_activities(self):
+        with self.session() as session:
+            other = session.query(models.Activity).filter_by(name="Dossier 2").one()
+            scelle = session.query(models.Scelle).filter_by(activity_id=self.activity_id).first()
+            scelle.activity = other
+            session.commit()
+            other_id = other.id
+        self.assertEqual(self.changes(), sorted([self.activity_id, other_id]))
+
+    def test_deleted_activity_is_logged_without_counters(self):
+        with self.session() as session:
+            session.delete(session.get(models.Activity, self.activity_id))
+            session.commit()
+        self.assertEqual(self.changes(), [self.activity_id])
+        self.assertIsNone(self.stats())
+
+    def test_column_rename_is_a_structural_change(self):
+        with self.session() as session:
+            session.query(models.KanbanColumn).filter_by(name="Terminé").one().name = "Clos"
+            session.commit()
+        self.assertEqual(self.changes(), [None])
+
+    def test_reads_log_nothing(self):
+        with CountQueries(self.engine) as queries, self.session() as session:
+            session.query(models.Activity).all()
+            session.commit()
+        self.assertEqual(self.changes(), [])
+        self.assertEqual(queries.count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from headless_report import main, report_filename, split_periods
+
+from .fixtures import file_engine, seed_activities
+
+HAS_QT = importlib.util.find_spec("PySide6") is not None
+
+
+class SplitPeriodsTests(unittest.TestCase):
+
+    def test_split_periods(self):
+        start, end = date(2025, 1, 30), date(2025, 3, 4)
+        self.assertEqual(split_periods(start, end, "month"), [
+            (date(2025, 1, 30), date(2025, 1, 31)),
+            (date(2025, 2, 1), date(2025, 2, 28)),
+            (date(2025, 3, 1), date(2025, 3, 4)),
+        ])
+        weeks = split_periods(start, end, "week")
+        self.assertEqual(weeks[0], (date(2025, 1, 30), date(2025, 2, 2)))
+        self.assertTrue(all(first.weekday() == 0 for first, _ in weeks[1:]))
+        self.assertEqual(len(split_periods(start, end, "day")), 34)
+        self.assertEqual(weeks[-1][1], end)
+
+    def test_report_filename(self):
+        self.assertEqual(report_filename("out", date(2025, 1, 2), date(2025, 1, 2)), os.path.join("out", "rapport_2025-01-02.pdf"))
+        self.assertEqual(
+            report_filename("out", date(2025, 1, 1), date(2025, 1, 31)),
+            os.path.join("out", "rapport_2025-01-01_2025-01-31.pdf"),
+        )
+
+
+class CommandLineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="organiseur-reports-")
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.database = os.path.join(self.directory, "organiseur.db")
+        engine = file_engine(self.database)
+        seed_activities(engine, 6, day=date(2025, 1, 1))
+        engine.dispose()
+
+    def assertRejected(self, *argv):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as exit:
+            main(list(argv))
+        self.assertEqual(exit.exception.code, 2)
+
+    def test_invalid_arguments(self):
+        self.assertRejected("--start", "2025-02-01", "--end", "2025-01-01")
+        self.assertRejected("--start", "01/02/2025")
+        self.assertRejected("--period", "year")
+        self.assertRejected("--period", "day", "--workers", "0")
+
+    @unittest.skipUnless(HAS_QT, "PySide6 is not installed")
+    def test_batch_renders_one_pdf_per_period_in_parallel(self):
+        output_dir = os.path.join(self.directory, "rapports")
+        argv = [
+            "--start", "2025-01-01", "--end", "2025-01-02", "--period", "day",
+            "--workers", "2", "-o", output_dir, "--database", self.database,
+        ]
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(argv), 0)
+        expected = [report_filename(output_dir, day, day) for day in (date(2025, 1, 1), date(2025, 1, 2))]
+        self.assertEqual(sorted(os.path.join(output_dir, name) for name in os.listdir(output_dir)), expected)
+        for filename in expected:
+            self.assertIn(f"✓ {filename}", out.getvalue())
+            with open(filename, "rb") as f:
+                self.assertEqual(f.read(5), b"%PDF-")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from database import models
+from html_report import write_range_html
+
+from .fixtures import CountQueries, memory_engine, seed_activities
+
+DAY = date(2024, 3, 12)
+
+
+class HtmlReportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        self.addCleanup(self.engine.dispose)
+        with Session(self.engine) as session:
+            column = models.KanbanColumn(name="En cours")
+            session.add_all([
+                models.Activity(name="Dossier <Dupont>", date=DAY, column=column, scelles=[
+                    models.Scelle(name="PC", cta_validated=True, traitements=[
+                        models.Traitement(description="Extraction", done=True, done_at=DAY),
+                        models.Traitement(description="Analyse & rapport"),
+                    ]),
+                    models.Scelle(name="Téléphone", taches=[models.Tache(description="Appel OPJ")]),
+                ]),
+                models.Activity(name="Dossier de la veille", date=date(2024, 3, 11), column=column, scelles=[
+                    models.Scelle(name="Clé", reparations_validated=True, taches=[
+                        models.Tache(description="Restitution", done=True, done_at=DAY),
+                    ]),
+                ]),
+            ])
+            session.commit()
+
+    def report(self, start, end=None):
+        f = io.StringIO()
+        with Session(self.engine) as session:
+            write_range_html(f, session, start, end or start)
+        return f.getvalue()
+
+    def test_day(self):
+        html = self.report(DAY)
+        self.assertIn("<h1>Résumé de la Journée (2024-03-12)</h1>", html)
+        activities, validated = html.split("<h2>Actions validées ce jour</h2>")
+        # Only the activity dated that day, escaped
+        self.assertIn("• Dossier &lt;Dupont&gt;</div>", activities)
+        self.assertNotIn("Dossier de la veille", activities)
+        self.assertIn("- Scellé: PC (<span class='status-cta'>CTA OK</span>)", activities)
+        self.assertIn("- Scellé: Téléphone (En cours)", activities)
+        self.assertIn("Traitements restants: Analyse &amp; rapport", activities)
+        self.assertIn("Tâches restantes: Appel OPJ", activities)
+        self.assertNotIn("Extraction", activities)
+        # Validated that day, whatever the date of their activity
+        traitements, taches = validated.split("<h3>Tâches</h3>")
+        self.assertIn("<h3>Traitements</h3>", traitements)
+        self.assertIn("Dossier &lt;Dupont&gt; - Scellé: PC - Extraction", traitements)
+        self.assertIn("Dossier de la veille - Scellé: Clé - Restitution", taches)
+
+    def test_period(self):
+        html = self.report(date(2024, 3, 11), DAY)
+        self.assertIn("<h1>Résumé du 2024-03-11 au 2024-03-12</h1>", html)
+        self.assertIn("• 2024-03-11 - Dossier de la veille</div>", html)
+        self.assertIn("<span class='status-rep'>RÉPARATIONS</span>", html)
+        self.assertLess(html.index("Dossier de la veille"), html.index("Dossier &lt;Dupont&gt;"))
+        self.assertIn("2024-03-12 - Dossier de la veille - Scellé: Clé - Restitution", html)
+
+    def test_empty_day(self):
+        html = self.report(date(2024, 1, 1))
+        self.assertIn("Aucune activité datée d'aujourd'hui.", html)
+        self.assertIn("Aucune action validée ce jour.", html)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+    def test_queries_do_not_grow_with_the_data(self):
+        counts = []
+        for activities in (3, 40):
+            engine = memory_engine()
+            seed_activities(engine, activities, day=DAY)
+            with CountQueries(engine) as queries, Session(engine) as session:
+                write_range_html(io.StringIO(), session, DAY, DAY)
+            engine.dispose()
+            counts.append(queries.count)
+        self.assertEqual(counts[0], counts[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from database.loading import query_profile
+
+from .fixtures import CountQueries, memory_engine, seed_activities
+
+
+class LoadingProfileTests(unittest.TestCase):
+    """database/loading.py: a full walk of each profile costs a fixed number of queries."""
+
+    WALKS = {
+        "board": lambda columns: [
+            (tag.name, scelle.name) for column in columns for activity in column.activities
+            for tag in activity.tags for scelle in activity.scelles
+        ],
+        "export_full": lambda activities: [
+            (activity.column.name, [tag.name for tag in activity.tags],
+             [(t.description, k.description) for scelle in activity.scelles
+              for t in scelle.traitements for k in scelle.taches])
+            for activity in activities
+        ],
+        "daily": lambda activities: [
+            (t.done, k.done) for activity in activities for scelle in activity.scelles
+            for t in scelle.traitements for k in scelle.taches
+        ],
+    }
+    EXPECTED_QUERIES = {"board": 4, "export_full": 5, "daily": 4}
+
+    def walk_queries(self, profile, activities):
+        engine = memory_engine()
+        seed_activities(engine, activities)
+        try:
+            with CountQueries(engine) as queries, Session(engine) as session:
+                self.WALKS[profile](query_profile(session, profile).all())
+        finally:
+            engine.dispose()
+        return queries.count
+
+    def test_queries_do_not_grow_with_the_data(self):
+        for profile, expected in self.EXPECTED_QUERIES.items():
+            with self.subTest(profile=profile):
+                self.assertEqual(self.walk_queries(profile, 3), expected)
+                self.assertEqual(self.walk_queries(profile, 40), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
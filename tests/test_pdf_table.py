@@ -0,0 +1,64 @@
+import unittest
+
+from pdf_table import TableLayout
+
+PAGE_BOTTOM = 3400
+FIRST_TOP = 150
+TOP = 50
+
+
+def measure(text, width):
+    # 20 units per character, 40 per wrapped line
+    per_line = max(1, width // 20)
+    return 40 * max(1, -(-len(text) // per_line))
+
+
+class TableLayoutTests(unittest.TestCase):
+    """pdf_table.py: the PDF summary table spans as many pages as needed."""
+
+    def setUp(self):
+        self.layout = TableLayout([300, 800, 400, 800])
+
+    def paginate(self, rows):
+        return self.layout.paginate(rows, measure, PAGE_BOTTOM, first_top=FIRST_TOP, top=TOP)
+
+    def test_every_row_is_placed(self):
+        rows = [(f"2024-01-{i % 28 + 1:02d}", f"Dossier {i}", "En cours", "S" * (i % 90)) for i in range(2000)]
+        pages = self.paginate(rows)
+
+        placed = [row.cells for page in pages for row in page.rows]
+        self.assertEqual(placed, [tuple(cells) for cells in rows])
+        self.assertGreater(len(pages), 1)
+        for number, page in enumerate(pages):
+            self.assertEqual(page.header_y, FIRST_TOP if number == 0 else TOP)
+            self.assertEqual(page.rows[0].y, page.header_y + self.layout.header_height)
+            self.assertLessEqual(page.rows[-1].y + page.rows[-1].height, PAGE_BOTTOM)
+
+    def test_oversized_rows_are_clipped_to_their_page(self):
+        huge = ("", "x" * 100000, "", "")
+        pages = self.paginate([huge, huge])
+        header = self.layout.header_height
+        # The first one on the first page, below the title
+        self.assertEqual([row.height for row in pages[0].rows], [PAGE_BOTTOM - FIRST_TOP - header])
+        self.assertEqual([row.height for row in pages[1].rows], [PAGE_BOTTOM - TOP - header])
+
+    def test_first_row_taller_than_the_first_page_stays_on_it(self):
+        # Fits on a full page, not below the title
+        rows = [("", "x" * 39 * 79, "", ""), ("", "suivant", "", "")]
+        height = self.layout.row_height(rows[0], measure, PAGE_BOTTOM)
+        self.assertGreater(height, PAGE_BOTTOM - FIRST_TOP - self.layout.header_height)
+        self.assertLessEqual(height, PAGE_BOTTOM - TOP - self.layout.header_height)
+
+        pages = self.paginate(rows)
+        self.assertEqual(len(pages[0].rows), 1)
+        self.assertEqual(pages[0].rows[0].y + pages[0].rows[0].height, PAGE_BOTTOM)
+        self.assertEqual(pages[1].rows[0].cells, rows[1])
+
+    def test_no_rows(self):
+        pages = self.paginate([])
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0].rows, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
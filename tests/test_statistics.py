@@ -0,0 +1,52 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from database import models
+from database.archive_schema import ARCHIVED_COLUMN
+from database.statistics import board_statistics
+
+from .fixtures import CountQueries, archive_activity, memory_engine, seed_activities
+
+
+class BoardStatisticsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        self.addCleanup(self.engine.dispose)
+        seed_activities(self.engine, 5)
+
+    def statistics(self):
+        with CountQueries(self.engine) as queries, Session(self.engine) as session:
+            stats = board_statistics(session)
+        return stats, queries.count
+
+    def test_counts(self):
+        stats, _ = self.statistics()
+        self.assertEqual(stats.columns, [("En cours", 3), ("Terminé", 2)])
+        self.assertEqual((stats.traitements_done, stats.traitements_total), (0, 20))
+        self.assertEqual((stats.taches_done, stats.taches_total), (0, 20))
+
+    def test_one_query_once_the_schema_is_known(self):
+        self.statistics()
+        self.assertEqual(self.statistics()[1], 1)
+
+    def test_archived_activities_are_counted_from_cold_storage(self):
+        with Session(self.engine) as session:
+            for name in ("Dossier 0", "Dossier 1"):
+                scelle = session.query(models.Activity).filter_by(name=name).one().scelles[0]
+                scelle.traitements[0].done = True
+                scelle.taches[0].done = True
+            session.commit()
+        archive_activity(self.engine, "Dossier 0")
+
+        stats, _ = self.statistics()
+        self.assertEqual(stats.columns, [("En cours", 2), ("Terminé", 2), (ARCHIVED_COLUMN, 1)])
+        # The items of the archived dossier still count, as before it moved
+        self.assertEqual((stats.traitements_done, stats.traitements_total), (2, 20))
+        self.assertEqual((stats.taches_done, stats.taches_total), (2, 20))
+        self.assertEqual(self.statistics()[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,70 @@
 from django.contrib import admin
 from .models import KanbanColumn, Tag, Activity, Scelle, Traitement, Tache
+from .board_cache import bump_data_version
+from .counters import refresh_activity_counters, touch_all_activities
+from .changes import record_change
+from .suggestions import invalidate_suggestions
+
+
+class InvalidateBoardMixin:
+    # Edits made through the admin must also refresh the counters/card versions,
+    # log a board change and invalidate the cached board fragments
+    def activity_id_of(self, obj):
+        if isinstance(obj, Activity):
+            return obj.pk
+        if isinstance(obj, Scelle):
+            return obj.activity_id
+        if isinstance(obj, (Traitement, Tache)) and obj.scelle_id:
+            return obj.scelle.activity_id
+        return None
+
+    def stored_activity_id(self, obj):
+        """Activity of the row as stored, before the form is saved."""
+        stored = type(obj).objects.filter(pk=obj.pk).first()
+        return self.activity_id_of(stored) if stored is not None else None
+
+    def touch(self, obj, *activity_ids, deleted=False):
+        if isinstance(obj, (KanbanColumn, Tag)):
+            touch_all_activities()
+        elif isinstance(obj, Activity) and deleted:
+            record_change(activity_ids[0])
+        else:
+            for activity_id in dict.fromkeys(activity_ids):
+                if activity_id is not None:
+                    refresh_activity_counters(activity_id)
+        if isinstance(obj, (Activity, Scelle, Traitement, Tache)):
+            invalidate_suggestions()
+        bump_data_version()
+
+    def save_model(self, request, obj, form, change):
+        # Moved to another activity: the previous one loses a child (kept on
+        # the object, the ModelAdmin instance is shared between requests)
+        obj._previous_activity_id = self.stored_activity_id(obj) if change else None
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        obj = form.instance
+        self.touch(obj, self.activity_id_of(obj), getattr(obj, '_previous_activity_id', None))
+
+    def delete_model(self, request, obj):
+        activity_id = self.activity_id_of(obj)
+        super().delete_model(request, obj)
+        self.touch(obj, activity_id, deleted=True)
+
+    def delete_queryset(self, request, queryset):
+        objs = [(obj, self.activity_id_of(obj)) for obj in queryset]
+        super().delete_queryset(request, queryset)
+        for obj, activity_id in objs:
+            self.touch(obj, activity_id, deleted=True)
 
 @admin.register(KanbanColumn)
-class KanbanColumnAdmin(admin.ModelAdmin):
+class KanbanColumnAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     list_display = ('name', 'order_index')
     ordering = ('order_index',)
 
 @admin.register(Tag)
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     list_display = ('name', 'color')
 
 class ScelleInline(admin.TabularInline):
@@ -15,7 +72,7 @@ class ScelleInline(admin.TabularInline):
     extra = 0
 
 @admin.register(Activity)
-class ActivityAdmin(admin.ModelAdmin):
+class ActivityAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     change_list_template = "kanban/admin_change_list.html"
     list_display = ('name', 'date', 'column')
     list_filter = ('column', 'date', 'tags')
@@ -31,18 +88,18 @@ class TacheInline(admin.TabularInline):
     extra = 0
 
 @admin.register(Scelle)
-class ScelleAdmin(admin.ModelAdmin):
+class ScelleAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     list_display = ('name', 'activity', 'cta_validated', 'reparations_validated')
     list_filter = ('cta_validated', 'reparations_validated', 'activity__column')
     search_fields = ('name', 'info')
     inlines = [TraitementInline, TacheInline]
 
 @admin.register(Traitement)
-class TraitementAdmin(admin.ModelAdmin):
+class TraitementAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     list_display = ('description', 'scelle', 'done', 'done_at')
     list_filter = ('done',)
 
 @admin.register(Tache)
-class TacheAdmin(admin.ModelAdmin):
+class TacheAdmin(InvalidateBoardMixin, admin.ModelAdmin):
     list_display = ('description', 'scelle', 'done', 'done_at')
     list_filter = ('done',)
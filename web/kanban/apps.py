@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """Apply the shared SQLite PRAGMAs (settings.SQLITE_PROFILE) to a new connection."""
+    if connection.vendor != 'sqlite':
+        return
+    profile = getattr(settings, 'SQLITE_PROFILE', None)
+    if not profile:
+        return
+    from database.sqlite_profile import apply_sqlite_profile as apply_profile
+    apply_profile(connection.connection, import_string(profile))
 
 
 class KanbanConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kanban'
+
+    def ready(self):
+        from . import checks  # noqa: F401  (registers the index check)
+        connection_created.connect(apply_sqlite_profile, dispatch_uid='kanban_sqlite_profile')
@@ -0,0 +1,170 @@
+"""
+Archived activities: cold storage and keyset pagination.
+
+Archiving a dossier moves its whole tree (activity, counters, tags, scellés,
+traitements, tâches) from the hot tables to the ``archived_*`` tables of
+database/archive_schema.py, and restoring it moves it back, ids unchanged:
+the board, synthèse and export queries only scan active work. Activities put
+in the Archivé column another way (Django admin, desktop app) stay in the hot
+tables until freeze_archived_column() runs; the archive pages list them too.
+
+Pages are ordered by (date, id), most recent first, and a page starts after
+the (date, id) cursor of the previous one instead of an OFFSET: with the
+ix_archived_activities_date index (date, then the rowid) every page is an
+index range scan of PAGE_SIZE + 1 rows, whatever the number of archived
+dossiers.
+
+Filters: tag, date range and text. The text filter goes through the FTS5
+search index (activity name/description and its scellés' text), where the
+archived rows have a negative rowid.
+"""
+from datetime import date
+from typing import NamedTuple
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from database.archive_schema import archived_column_selection, move_statements
+
+from .models import Activity, ArchivedActivity
+from .routing import ARCHIVED_COLUMN
+from .search import SEARCH_TABLE, build_match_query
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Archived activities matching an FTS query, directly or through a scellé
+TEXT_MATCH_SQL = (
+    f"SELECT ref_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = 'activity' AND rowid < 0 "
+    f"UNION SELECT s.activity_id FROM {SEARCH_TABLE} JOIN archived_scelles s ON s.id = {SEARCH_TABLE}.ref_id "
+    f"WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.kind = 'scelle' AND {SEARCH_TABLE}.rowid < 0"
+)
+
+# Same for the hot activities of the Archivé column (positive rowids)
+HOT_TEXT_MATCH_SQL = (
+    f"SELECT ref_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = 'activity' AND rowid > 0 "
+    f"UNION SELECT s.activity_id FROM {SEARCH_TABLE} JOIN scelles s ON s.id = {SEARCH_TABLE}.ref_id "
+    f"WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.kind = 'scelle' AND {SEARCH_TABLE}.rowid > 0"
+)
+
+
+class ArchiveFilters(NamedTuple):
+    tag: int = None
+    date_from: date = None
+    date_to: date = None
+    text: str = ''
+
+    @property
+    def active(self):
+        return any((self.tag, self.date_from, self.date_to, self.text))
+
+    def as_params(self):
+        """Query-string parameters reproducing these filters."""
+        params = {}
+        if self.tag:
+            params['tag'] = self.tag
+        if self.date_from:
+            params['date_from'] = self.date_from.isoformat()
+        if self.date_to:
+            params['date_to'] = self.date_to.isoformat()
+        if self.text:
+            params['q'] = self.text
+        return params
+
+
+class ArchivePage(NamedTuple):
+    activities: list
+    next_cursor: str = None
+
+
+def encode_cursor(activity):
+    return f"{activity.date.isoformat()}_{activity.id}"
+
+
+def decode_cursor(cursor):
+    """Return (date, id) from a cursor; ValueError when malformed."""
+    day, _, activity_id = cursor.partition('_')
+    return date.fromisoformat(day), int(activity_id)
+
+
+def parse_filters(params):
+    """ArchiveFilters from request.GET; ValueError on a malformed value."""
+    tag = params.get('tag') or None
+    date_from = params.get('date_from') or None
+    date_to = params.get('date_to') or None
+    return ArchiveFilters(
+        tag=int(tag) if tag else None,
+        date_from=date.fromisoformat(date_from) if date_from else None,
+        date_to=date.fromisoformat(date_to) if date_to else None,
+        text=(params.get('q') or '').strip(),
+    )
+
+
+def _move(to_archive, selection, params):
+    with connection.cursor() as cursor:
+        statements = move_statements(to_archive, selection)
+        cursor.execute(statements[0], params)
+        moved = cursor.rowcount
+        for statement in statements[1:]:
+            cursor.execute(statement, params)
+    return moved
+
+
+def freeze_activity(activity_id):
+    """Move an activity tree to cold storage. Call inside the write transaction."""
+    return _move(True, '%s', [activity_id]) > 0
+
+
+def thaw_activity(activity_id):
+    """Move an activity tree back to the hot tables; False if it is not archived."""
+    return _move(False, '%s', [activity_id]) > 0
+
+
+def freeze_archived_column():
+    """Move the hot activities still in the Archivé column (e.g. set there by the desktop app)."""
+    return _move(True, archived_column_selection('%s'), [ARCHIVED_COLUMN])
+
+
+def _filtered(queryset, filters, text_match_sql):
+    if filters.tag:
+        queryset = queryset.filter(tags__id=filters.tag)
+    if filters.date_from:
+        queryset = queryset.filter(date__gte=filters.date_from)
+    if filters.date_to:
+        queryset = queryset.filter(date__lte=filters.date_to)
+    if filters.text:
+        match = build_match_query(filters.text)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(id__in=RawSQL(text_match_sql, [match, match]))
+    return queryset.order_by('-date', '-id')
+
+
+def archived_queryset(filters=ArchiveFilters()):
+    """Cold-storage activities matching ``filters``, in keyset order (-date, -id)."""
+    return _filtered(ArchivedActivity.objects.all(), filters, TEXT_MATCH_SQL)
+
+
+def hot_archived_queryset(filters=ArchiveFilters()):
+    """Hot activities of the Archivé column matching ``filters``, in keyset order."""
+    return _filtered(Activity.objects.filter(column__name=ARCHIVED_COLUMN), filters, HOT_TEXT_MATCH_SQL)
+
+
+def archive_page(filters=ArchiveFilters(), cursor=None, page_size=PAGE_SIZE):
+    """Return the ArchivePage starting after ``cursor`` (None: first page)."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    activities = []
+    # Ids are kept when moving to cold storage, so a dossier is in exactly one
+    # of the two: merge the first page_size + 1 rows of each
+    for queryset in (archived_queryset(filters), hot_archived_queryset(filters)):
+        if cursor:
+            after_date, after_id = decode_cursor(cursor)
+            # (date, id) < cursor, written so that date <= ... stays an index range
+            queryset = queryset.filter(date__lte=after_date).exclude(date=after_date, id__gte=after_id)
+        activities += queryset.prefetch_related('tags')[:page_size + 1]
+
+    activities.sort(key=lambda activity: (activity.date, activity.id), reverse=True)
+    if len(activities) > page_size:
+        activities = activities[:page_size]
+        return ArchivePage(activities, encode_cursor(activities[-1]))
+    return ArchivePage(activities)
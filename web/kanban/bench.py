@@ -0,0 +1,282 @@
+"""
+Board benchmark (``manage.py bench_board``).
+
+For every scale, a temporary SQLite database is built with the desktop
+schema (as the test runner does) and filled by synthetic.seed_board() with a
+realistic fan-out (1-5 scellés per activity, 0-4 traitements and tâches per
+scellé) and a fixed seed, so two runs measure the same data. Each target (the
+main views, called through RequestFactory as a superuser, and the desktop
+export functions through SQLAlchemy) is then run:
+
+- once under tracemalloc, for the number of SQL queries and the peak memory,
+- ``repeat`` times, for the p50 / p95 latency.
+
+SQLAlchemy's selectinload reads by batches of 500 ids, so db_export_full
+grows by a few queries per 500 activities.
+
+The board cache and the suggestion indexes are dropped before every call:
+the figures are cold-cache, like the test budgets. The cache is moved to the
+temporary folder for the run (test_runner.relocated_caches), so clearing it
+never touches the cache shared by the web workers and no synthetic card or
+fragment can be served to them. organiseur.db is never opened; results are
+written as JSON so that runs can be compared.
+"""
+import os
+import platform
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from . import views
+from .models import Activity, ArchivedActivity
+from .suggestions import drop_local_indexes
+from .synthetic import seed_board
+from .test_runner import create_kanban_schema, relocated_caches
+
+DEFAULT_SCALES = (100, 1000, 10000)
+DEFAULT_REPEAT = 10
+
+# Per activity / per scellé ranges given to seed_board()
+FANOUT = {'scelles': (1, 5), 'items': (0, 4), 'tags': 12}
+
+# Activities whose detail view is timed (rotated through the repeats)
+DETAIL_SAMPLE = 20
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+@contextmanager
+def temporary_database():
+    """
+    Point the default connection at a new SQLite file holding the kanban
+    schema, and the caches at the same temporary folder.
+    """
+    directory = tempfile.mkdtemp(prefix='organiseur-bench-')
+    path = os.path.join(directory, 'bench.sqlite3')
+    create_kanban_schema(path)
+    previous = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    caches = relocated_caches(os.path.join(directory, 'cache'))
+    caches.enable()
+    try:
+        yield path
+    finally:
+        caches.disable()
+        # Built from the synthetic data
+        drop_local_indexes()
+        connection.close()
+        connection.settings_dict['NAME'] = previous
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class _DjangoQueries:
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connection).__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.context.__exit__(*exc)
+
+    @property
+    def count(self):
+        return len(self.context.captured_queries)
+
+
+class _EngineQueries:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def view_targets(today=None):
+    """``{name: call(iteration)}`` of the timed views, on the current database."""
+    today = today or date.today()
+    factory = RequestFactory()
+    user = User(username='bench', is_staff=True, is_superuser=True)
+    detail_ids = list(Activity.objects.order_by('id').values_list('id', flat=True)[:DETAIL_SAMPLE // 2])
+    detail_ids += list(ArchivedActivity.objects.order_by('id').values_list('id', flat=True)[:DETAIL_SAMPLE // 2])
+    report_range = {'start_date': (today - timedelta(days=30)).isoformat(), 'end_date': today.isoformat()}
+
+    def get(view, path, data=None, **kwargs):
+        def call(iteration):
+            request = factory.get(path, data or {})
+            request.user = user
+            response = view(request, **{key: value(iteration) for key, value in kwargs.items()})
+            if response.status_code >= 400:
+                raise RuntimeError(f'{path}: HTTP {response.status_code}')
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+        return call
+
+    targets = {
+        'board': get(views.board, '/'),
+        'synthese': get(views.synthese, '/synthese/'),
+        'archives': get(views.archives, '/archives/'),
+        'archives_api': get(views.archives_api, '/api/archives/'),
+        'admin_export': get(views.admin_export_report, '/admin-export/', report_range),
+        'export_cards_csv': get(views.export_data, '/api/export/cards.csv', report_range,
+                                dataset=lambda i: 'cards', fmt=lambda i: 'csv'),
+        'suggestions_traitements': get(views.suggestion_traitements, '/api/suggestions/traitements/', {'q': 'an'}),
+        'suggestions_taches': get(views.suggestion_taches, '/api/suggestions/taches/', {'q': 'ra'}),
+        'search': get(views.search, '/api/search/', {'q': 'Affaire'}),
+    }
+    if detail_ids:
+        targets['activity_detail'] = get(
+            views.get_activity_details, '/activity/', activity_id=lambda i: detail_ids[i % len(detail_ids)],
+        )
+    return targets
+
+
+def export_targets(path, directory):
+    """
+    ``{name: call(iteration)}`` of the desktop export functions on the SQLite
+    file ``path``, and the SQLAlchemy engine to count their queries. The HTML
+    summaries (html_report.py) need no Qt; the PDF export is not timed.
+    """
+    from database.db import SessionLocal, make_engine
+    from database.loading import query_profile
+    from database.statistics import board_statistics
+    import html_report
+
+    engine = make_engine(f'sqlite:///{path}')
+    SessionLocal.configure(bind=engine)
+
+    def with_session(function):
+        def call(iteration):
+            session = SessionLocal()
+            try:
+                return function(session)
+            finally:
+                session.close()
+        return call
+
+    def walk_export_full(session):
+        # What the four PDF pages read from the preloaded activities
+        return sum(
+            len(scelle.traitements) + len(scelle.taches)
+            for activity in query_profile(session, 'export_full').all() for scelle in activity.scelles
+        )
+
+    today = date.today()
+    html = os.path.join(directory, 'export.html')
+    targets = {
+        'db_board_statistics': with_session(board_statistics),
+        'db_export_full': with_session(walk_export_full),
+        'export_daily_html': lambda i: html_report.export_daily_to_html(html, today),
+        'export_range_html': lambda i: html_report.export_range_to_html(html, today - timedelta(days=30), today),
+    }
+    return targets, engine
+
+
+def _cold():
+    cache.clear()
+    drop_local_indexes()
+
+
+def measure(call, repeat, queries):
+    """Query count and peak memory of one call, then latencies of ``repeat`` calls."""
+    _cold()
+    tracemalloc.start()
+    try:
+        with queries as counter:
+            call(0)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies = []
+    for iteration in range(repeat):
+        _cold()
+        start = time.perf_counter()
+        call(iteration)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'queries': counter.count,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+        'peak_memory_kib': peak // 1024,
+    }
+
+
+def run_views(repeat, only=None, today=None):
+    """Measure the view targets on the current database: ``{name: measures}``."""
+    return {
+        name: measure(call, repeat, _DjangoQueries())
+        for name, call in view_targets(today).items() if not only or name in only
+    }
+
+
+def run_scale(activities, repeat, seed=0, only=None, log=None):
+    """Seed a temporary database with ``activities`` activities and measure every target."""
+    log = log or (lambda message: None)
+    with temporary_database() as path:
+        start = time.perf_counter()
+        created = seed_board(activities=activities, seed=seed, **FANOUT)
+        seed_seconds = time.perf_counter() - start
+        log(f'{activities} activités : données créées en {seed_seconds:.1f}s {created}')
+
+        results = run_views(repeat, only)
+        directory = os.path.dirname(path)
+        targets, engine = export_targets(path, directory)
+        try:
+            for name, call in targets.items():
+                if not only or name in only:
+                    results[name] = measure(call, repeat, _EngineQueries(engine))
+        finally:
+            from database.db import SessionLocal, engine as default_engine
+            SessionLocal.configure(bind=default_engine)
+            engine.dispose()
+
+    return {'dataset': created, 'seed_seconds': round(seed_seconds, 2), 'targets': results}
+
+
+def run_benchmark(scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, seed=0, only=None, log=None):
+    """Full run: ``{'meta': {...}, 'scales': {activities: run_scale()}}``."""
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+            'fanout': FANOUT,
+        },
+        'scales': {
+            str(activities): run_scale(activities, repeat, seed, only, log)
+            for activities in scales
+        },
+    }
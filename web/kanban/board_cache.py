@@ -0,0 +1,90 @@
+"""
+Cache of the rendered board, synthèse and archives fragments.
+
+Every fragment is stored together with the data version it was built from:
+a token kept in the cache itself and replaced by each mutating view (see
+invalidates_board), and the latest id of the board change log. The desktop
+app writes the same database without going through the views; it logs its
+writes in board_changes too (database/board_changes.py), so they invalidate
+the fragments as well. A fragment is reused until the next write and a warm
+reload costs a get_many() round-trip plus one MAX(id) on the change log.
+
+Only the Django cache API is used. The settings use the file-based backend,
+so that the fragments and the version are shared by every worker process; the
+local-memory backend is per process and only fits a single-process server.
+A bump writes a new random token instead of incr(): the file-based incr() is a
+get then a set, and two concurrent writes could both store the same value.
+"""
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .changes import current_version
+
+VERSION_KEY = 'kanban:data_version'
+FRAGMENT_KEY = 'kanban:fragment:{name}:{variant}'
+
+
+def cache_timeout():
+    return getattr(settings, 'KANBAN_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _fresh_version():
+    # Never equal to a version seen before, even after an eviction or a restart
+    return uuid.uuid4().hex
+
+
+def get_data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    version = _fresh_version()
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def user_variant(request):
+    """Fragments only differ between superusers (edit buttons) and other users."""
+    return 'admin' if request.user.is_superuser else 'viewer'
+
+
+def cached_fragment(name, variant, build):
+    """
+    Return the fragment ``name``/``variant`` for the current data version.
+
+    ``build`` is called (and its result cached) when the stored fragment is
+    missing or was built from an older version. The result must be picklable.
+    """
+    key = FRAGMENT_KEY.format(name=name, variant=variant)
+    found = cache.get_many([VERSION_KEY, key])
+    token = found.get(VERSION_KEY)
+    if token is None:
+        token = get_data_version()
+    # Read before building: a write made meanwhile leaves the entry outdated
+    version = (token, current_version())
+
+    entry = found.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = build()
+    cache.set(key, (version, value), cache_timeout())
+    return value
+
+
+def invalidates_board(view):
+    """Decorator for mutating views: bump the data version after a successful write."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code < 400:
+            bump_data_version()
+        return response
+    return wrapper
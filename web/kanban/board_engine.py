@@ -0,0 +1,123 @@
+"""
+Single-pass board engine.
+
+Every non-archived activity is loaded once (with its column and its
+activity_stats counters) and dispatched to the board columns in Python,
+instead of running one annotated queryset per column. Tags, scelles,
+traitements and tâches are only fetched for the activities that need them
+(missing counters, or a card that has to be rendered).
+"""
+from django.db.models import prefetch_related_objects
+
+from .models import Activity, ActivityStats
+from .routing import ARCHIVED_COLUMN, state_of, target_column_names
+
+CARD_PREFETCH = ('tags', 'scelles__traitements', 'scelles__taches')
+
+
+def card_queryset():
+    """Activities with everything card_snippet.html and the routing rules need."""
+    return Activity.objects.select_related('column', 'stats').prefetch_related(*CARD_PREFETCH)
+
+
+def load_board_activities():
+    """Return every non-archived activity, ordered by date, with its column and counters."""
+    return Activity.objects.select_related('column', 'stats').exclude(column__name=ARCHIVED_COLUMN).order_by('date', 'id')
+
+
+def get_stats(activity):
+    try:
+        return activity.stats
+    except ActivityStats.DoesNotExist:
+        return None
+
+
+def prefetch_children(activities):
+    """Fetch tags/scelles/traitements/tâches for the activities that do not have them yet."""
+    missing = [a for a in activities if 'scelles' not in getattr(a, '_prefetched_objects_cache', {})]
+    if missing:
+        prefetch_related_objects(missing, *CARD_PREFETCH)
+
+
+def annotate_activity(activity):
+    """
+    Set the card counters/flags on an activity.
+
+    Sets the attributes the former Subquery/Exists annotations provided
+    (pending_traitements, pending_taches, has_cta, has_reparations), the
+    scelle count, and the "free" pending counts used for column routing: a
+    pending item only routes the activity to Traitements/Tâches when its
+    scelle is neither CTA- nor repair-validated. They are read from the
+    maintained activity_stats row, or computed from the scelles when the row
+    does not exist yet.
+    """
+    stats = get_stats(activity)
+
+    if stats is not None:
+        activity.scelle_count = stats.scelle_count
+        activity.pending_traitements = stats.pending_traitements
+        activity.pending_taches = stats.pending_taches
+        activity.has_cta = stats.has_cta
+        activity.has_reparations = stats.has_reparations
+        activity.free_traitements = stats.free_traitements
+        activity.free_taches = stats.free_taches
+        return activity
+
+    prefetch_children([activity])
+
+    activity.scelle_count = 0
+    activity.pending_traitements = 0
+    activity.pending_taches = 0
+    activity.has_cta = False
+    activity.has_reparations = False
+    activity.free_traitements = 0
+    activity.free_taches = 0
+
+    for scelle in activity.scelles.all():
+        pending_traitements = sum(1 for t in scelle.traitements.all() if not t.done)
+        pending_taches = sum(1 for t in scelle.taches.all() if not t.done)
+
+        activity.scelle_count += 1
+        activity.pending_traitements += pending_traitements
+        activity.pending_taches += pending_taches
+
+        if scelle.cta_validated:
+            activity.has_cta = True
+        if scelle.reparations_validated:
+            activity.has_reparations = True
+
+        if not scelle.cta_validated and not scelle.reparations_validated:
+            activity.free_traitements += pending_traitements
+            activity.free_taches += pending_taches
+
+    return activity
+
+
+def annotate_activities(activities):
+    """annotate_activity() for a list, fetching the children of rows without counters in one go."""
+    activities = list(activities)
+    prefetch_children([a for a in activities if get_stats(a) is None])
+    for activity in activities:
+        annotate_activity(activity)
+    return activities
+
+
+def build_columns_data(columns):
+    """
+    Build the ``columns_data`` list consumed by board.html.
+
+    ``columns`` is the ordered list of displayed KanbanColumn objects; the
+    activities of each column keep the date ordering of the single query.
+    """
+    columns = list(columns)
+    buckets = {col.name: [] for col in columns}
+
+    for activity in annotate_activities(load_board_activities()):
+        for name in target_column_names(state_of(activity)):
+            if name in buckets:
+                buckets[name].append(activity)
+
+    return [
+        {'column': col, 'activities': buckets[col.name]}
+        for col in columns
+    ]
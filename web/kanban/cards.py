@@ -0,0 +1,105 @@
+"""
+Rendering of card_snippet.html with per-card memoization.
+
+A rendered card is cached under (activity id, activity version), the version
+being bumped by refresh_activity_counters() on every write to the activity.
+The key also carries what the card depends on besides the activity: the
+superuser/viewer variant, the urgency display and today's date (urgency
+colours move with it). Within one CardRenderer, a card shown in several
+virtual columns is rendered only once.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .board_cache import cache_timeout, user_variant
+from .board_engine import annotate_activity, get_stats, prefetch_children
+
+# Columns where cards are shown without their urgency border
+HIDE_URGENCY_COLUMNS = ('En attente', 'Terminé', 'CTA')
+
+CARD_KEY = 'kanban:card:{id}:{version}:{variant}:{hide}:{today}'
+
+
+def _pending_names(activity, relation):
+    names = []
+    for scelle in activity.scelles.all():
+        for item in getattr(scelle, relation).all():
+            if not item.done:
+                names.append(f"{item.description}__SEP__")
+    return ''.join(names)
+
+
+class CardRenderer:
+    """Render board cards for one request, reusing the cached ones."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.variant = user_variant(request) if request is not None else 'viewer'
+        self.today = date.today().isoformat()
+        self._memo = {}
+
+    def _key(self, activity, hide_urgency):
+        stats = get_stats(activity)
+        if stats is None:
+            # No version to key on: memoize for this request only
+            return ('uncached', activity.id, hide_urgency)
+        return CARD_KEY.format(
+            id=activity.id, version=stats.version, variant=self.variant,
+            hide=int(bool(hide_urgency)), today=self.today,
+        )
+
+    def _render(self, activity, hide_urgency):
+        if not hasattr(activity, 'pending_traitements'):
+            annotate_activity(activity)
+        activity.pending_traitement_names = _pending_names(activity, 'traitements')
+        activity.pending_tache_names = _pending_names(activity, 'taches')
+        context = {'activity': activity}
+        if hide_urgency:
+            context['hide_urgency'] = True
+        return render_to_string('kanban/card_snippet.html', context, request=self.request)
+
+    def render_all(self, items):
+        """
+        Render ``(activity, hide_urgency)`` pairs, returning the HTML list in order.
+
+        Cached cards are fetched with a single get_many(); children are then
+        prefetched in one batch for the cards that still need rendering.
+        """
+        items = [(activity, bool(hide_urgency)) for activity, hide_urgency in items]
+        keys = [self._key(activity, hide_urgency) for activity, hide_urgency in items]
+
+        lookup = [key for key in set(keys) if isinstance(key, str) and key not in self._memo]
+        if lookup:
+            self._memo.update(cache.get_many(lookup))
+
+        missing = {}
+        for key, (activity, hide_urgency) in zip(keys, items):
+            if key not in self._memo and key not in missing:
+                missing[key] = (activity, hide_urgency)
+
+        if missing:
+            prefetch_children([activity for activity, _ in missing.values()])
+            rendered = {key: self._render(activity, hide) for key, (activity, hide) in missing.items()}
+            self._memo.update(rendered)
+            cache.set_many({key: html for key, html in rendered.items() if isinstance(key, str)}, cache_timeout())
+
+        return [self._memo[key] for key in keys]
+
+    def render(self, activity, hide_urgency=False):
+        return self.render_all([(activity, hide_urgency)])[0]
+
+
+def render_columns_cards(columns_data, request=None):
+    """Add the rendered ``cards`` of each column to a build_columns_data() result."""
+    renderer = CardRenderer(request)
+    items = [
+        (activity, col_data['column'].name in HIDE_URGENCY_COLUMNS)
+        for col_data in columns_data
+        for activity in col_data['activities']
+    ]
+    cards = iter(renderer.render_all(items))
+    for col_data in columns_data:
+        col_data['cards'] = [next(cards) for _ in col_data['activities']]
+    return columns_data
@@ -0,0 +1,66 @@
+"""
+Board change log (``board_changes`` table) behind /api/board/changes.
+
+Each write that changes a card appends a row with the activity id; the row id
+is the version token handed to the clients. A row without activity id means a
+structural change (column order, tag/column rename) that needs a full reload.
+Only the most recent MAX_CHANGES rows are kept. Once the transaction commits,
+the change is also pushed to the connected event streams (kanban/events.py).
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .events import publish_change
+from .models import BoardChange
+
+MAX_CHANGES = 5000
+PRUNE_EVERY = 100
+
+
+def record_change(activity_id=None):
+    """Append a change; call inside the write transaction."""
+    change = BoardChange.objects.create(activity_id=activity_id, changed_at=timezone.now())
+    if change.id % PRUNE_EVERY == 0:
+        BoardChange.objects.filter(id__lte=change.id - MAX_CHANGES).delete()
+    transaction.on_commit(lambda: publish_change(change.id, activity_id))
+    return change.id
+
+
+def current_version():
+    return BoardChange.objects.aggregate(version=Max('id'))['version'] or 0
+
+
+# Rows after `since` (primary-key range), then the latest id: an idle poll
+# learns whether `since` is still valid from the same statement
+CHANGES_SQL = (
+    f'SELECT 0 AS latest, id, activity_id FROM {BoardChange._meta.db_table} WHERE id > %s '
+    f'UNION ALL SELECT 1, MAX(id), NULL FROM {BoardChange._meta.db_table} '
+    f'ORDER BY latest, id'
+)
+
+
+def changes_since(since):
+    """
+    Return ``(version, reload, activity_ids)`` for the changes after ``since``.
+
+    A single query, a primary-key range plus MAX(id); ``reload`` is True when
+    the client must reload the whole board (structural change, ``since`` older
+    than the pruned log, or ahead of it, e.g. after the database was restored).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(CHANGES_SQL, [since])
+        rows = [(id_, activity_id) for _, id_, activity_id in cursor.fetchall()]
+    latest = rows.pop()[0] or 0
+    if not rows:
+        if since > latest:
+            return latest, True, []
+        return since, False, []
+
+    version = rows[-1][0]
+    # Ids are AUTOINCREMENT: a gap right after `since` means pruned entries
+    if rows[0][0] != since + 1 or any(activity_id is None for _, activity_id in rows):
+        return version, True, []
+
+    activity_ids = list(dict.fromkeys(activity_id for _, activity_id in rows))
+    return version, False, activity_ids
@@ -0,0 +1,79 @@
+"""
+Startup checks: the composite indexes of database/indexes.py, the
+full-text search table of database/search_schema.py and the archive tables
+of database/archive_schema.py must exist.
+
+The tables are not managed by Django (managed = False), so nothing else
+would notice a database created before the indexes were added. Runs with
+every management command that performs system checks (runserver, check...).
+"""
+from django.core.checks import Warning, register
+from django.db import DatabaseError, connection
+
+
+def _sqlite_names(kind):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = %s", [kind])
+        return [row[0] for row in cursor.fetchall()]
+
+
+@register('kanban')
+def check_hot_indexes(app_configs, **kwargs):
+    if connection.vendor != 'sqlite':
+        return []
+    from database.indexes import missing_indexes
+
+    try:
+        existing = _sqlite_names('index')
+    except DatabaseError:
+        # No database yet: nothing to check
+        return []
+
+    return [
+        Warning(
+            f"Index {name} on {table}({', '.join(columns)}) is missing.",
+            hint="Run: python -m database.migrate_indexes (from the repository root).",
+            id='kanban.W001',
+        )
+        for name, table, columns in missing_indexes(existing)
+    ]
+
+
+@register('kanban')
+def check_search_index(app_configs, **kwargs):
+    if connection.vendor != 'sqlite':
+        return []
+    from database.search_schema import SEARCH_TABLE
+
+    try:
+        tables = _sqlite_names('table')
+    except DatabaseError:
+        return []
+
+    if SEARCH_TABLE in tables:
+        return []
+    return [Warning(
+        f"Full-text search table {SEARCH_TABLE} is missing: /api/search/ will fail.",
+        hint="Run: python -m database.migrate_search (from the repository root).",
+        id='kanban.W002',
+    )]
+
+
+@register('kanban')
+def check_archive_tables(app_configs, **kwargs):
+    if connection.vendor != 'sqlite':
+        return []
+    from database.archive_schema import archived_table
+
+    try:
+        tables = _sqlite_names('table')
+    except DatabaseError:
+        return []
+
+    if archived_table('activities') in tables:
+        return []
+    return [Warning(
+        "Archive tables are missing: archiving a dossier will fail.",
+        hint="Run: python -m database.migrate_archive (from the repository root).",
+        id='kanban.W003',
+    )]
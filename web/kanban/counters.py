@@ -0,0 +1,150 @@
+"""
+Denormalized per-activity counters (``activity_stats`` table).
+
+The mutating views call refresh_activity_counters() inside their transaction,
+so the board can read pending counts and CTA/repair flags as flat columns.
+Every refresh also bumps the activity version and logs a board change.
+Counters are always recomputed from the source rows (never incremented), which
+makes a refresh idempotent.
+
+The desktop app writes the same tables through SQLAlchemy; its sessions
+recompute these counters, bump the version and log the change after each
+flush (database/board_changes.py). Writes made outside both applications
+(SQLite shell, scripts on raw connections) still drift until
+``manage.py rebuild_activity_stats`` runs: schedule it (cron or the task
+scheduler) as a safety net. It is one aggregate query when nothing drifted,
+and it rewrites, logs and invalidates only the drifted rows.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Activity, ActivityStats, Scelle
+from .board_cache import bump_data_version
+from .changes import record_change
+
+COUNTER_FIELDS = (
+    'scelle_count',
+    'pending_traitements',
+    'pending_taches',
+    'free_traitements',
+    'free_taches',
+    'has_cta',
+    'has_reparations',
+)
+
+EMPTY_COUNTERS = {
+    'scelle_count': 0,
+    'pending_traitements': 0,
+    'pending_taches': 0,
+    'free_traitements': 0,
+    'free_taches': 0,
+    'has_cta': False,
+    'has_reparations': False,
+}
+
+
+def compute_counters(activity_ids=None):
+    """
+    Compute the counters from the scelles/traitements/tâches tables.
+
+    One aggregate query grouped by activity; returns ``{activity_id: counters}``
+    (activities without scelles are absent, see EMPTY_COUNTERS).
+    """
+    not_cta = Q(cta_validated=False) | Q(cta_validated__isnull=True)
+    not_rep = Q(reparations_validated=False) | Q(reparations_validated__isnull=True)
+    free = not_cta & not_rep
+    pending_traitement = Q(traitements__done=False) | Q(traitements__done__isnull=True)
+    pending_tache = Q(taches__done=False) | Q(taches__done__isnull=True)
+
+    qs = Scelle.objects.filter(activity__isnull=False)
+    if activity_ids is not None:
+        qs = qs.filter(activity_id__in=list(activity_ids))
+
+    rows = qs.values('activity_id').annotate(
+        scelle_count=Count('id', distinct=True),
+        pending_traitements=Count('traitements', filter=pending_traitement, distinct=True),
+        pending_taches=Count('taches', filter=pending_tache, distinct=True),
+        free_traitements=Count('traitements', filter=pending_traitement & free, distinct=True),
+        free_taches=Count('taches', filter=pending_tache & free, distinct=True),
+        cta_count=Count('id', filter=Q(cta_validated=True), distinct=True),
+        rep_count=Count('id', filter=Q(reparations_validated=True), distinct=True),
+    ).order_by()
+
+    counters = {}
+    for row in rows:
+        counters[row['activity_id']] = {
+            'scelle_count': row['scelle_count'],
+            'pending_traitements': row['pending_traitements'],
+            'pending_taches': row['pending_taches'],
+            'free_traitements': row['free_traitements'],
+            'free_taches': row['free_taches'],
+            'has_cta': row['cta_count'] > 0,
+            'has_reparations': row['rep_count'] > 0,
+        }
+    return counters
+
+
+def refresh_activity_counters(activity_id):
+    """Recompute the counters of one activity and bump its version. Call inside the write transaction."""
+    if activity_id is None:
+        return
+    values = compute_counters([activity_id]).get(activity_id, EMPTY_COUNTERS)
+    updated = ActivityStats.objects.filter(activity_id=activity_id).update(version=F('version') + 1, **values)
+    if not updated:
+        ActivityStats.objects.create(activity_id=activity_id, version=1, **values)
+    record_change(activity_id)
+
+
+def touch_activity(activity_id):
+    """Bump the version of an activity whose card changed but whose counters did not (name, column, tags...)."""
+    if activity_id is None:
+        return
+    if ActivityStats.objects.filter(activity_id=activity_id).update(version=F('version') + 1):
+        record_change(activity_id)
+    else:
+        refresh_activity_counters(activity_id)
+
+
+def touch_all_activities():
+    """Bump every version, e.g. after a tag or column rename shown on all cards."""
+    ActivityStats.objects.update(version=F('version') + 1)
+    record_change(None)
+
+
+def rebuild_all_counters(dry_run=False):
+    """
+    Compare the stored counters with the source tables and fix the differences.
+
+    Returns the list of ``(activity_id, stored, expected)`` tuples that were
+    (or, with ``dry_run``, would be) rewritten; ``stored`` is None for a
+    missing row and ``expected`` is None for an orphan row (deleted activity).
+    """
+    computed = compute_counters()
+    stored = {
+        row['activity_id']: {field: row[field] for field in COUNTER_FIELDS}
+        for row in ActivityStats.objects.values('activity_id', *COUNTER_FIELDS)
+    }
+
+    mismatches = []
+    for activity_id in Activity.objects.values_list('id', flat=True):
+        expected = computed.get(activity_id, EMPTY_COUNTERS)
+        current = stored.pop(activity_id, None)
+        if current != expected:
+            mismatches.append((activity_id, current, expected))
+    mismatches.extend((activity_id, current, None) for activity_id, current in stored.items())
+
+    if dry_run:
+        return mismatches
+
+    for activity_id, current, expected in mismatches:
+        if expected is None:
+            ActivityStats.objects.filter(activity_id=activity_id).delete()
+        elif current is None:
+            ActivityStats.objects.create(activity_id=activity_id, version=1, **expected)
+        else:
+            ActivityStats.objects.filter(activity_id=activity_id).update(version=F('version') + 1, **expected)
+    if mismatches:
+        record_change(None)
+        transaction.on_commit(bump_data_version)
+
+    return mismatches
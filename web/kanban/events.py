@@ -0,0 +1,86 @@
+"""
+In-process broadcaster of board change events.
+
+record_change() publishes ``{'version': ..., 'activity': ...}`` once the write
+transaction is committed; every connected /api/board/events/ stream (see
+kanban/sse.py) receives it and the page then fetches the rendered cards from
+/api/board/changes/. No external broker is involved: only the clients of the
+same server process are notified, the others still catch up through the
+change log on their next poll or reconnection.
+
+Each subscriber has a bounded queue. When a slow client lets it fill up, its
+pending events are dropped and replaced by a single catch-up event, so memory
+per client never exceeds QUEUE_SIZE events. Events are only hints: the client
+always asks the change log what happened since its own version, so a dropped
+backlog costs one larger delta, not a lost update.
+"""
+import asyncio
+import threading
+
+QUEUE_SIZE = 100
+
+CATCH_UP_EVENT = {'catch_up': True}
+
+
+class Subscription:
+    """One connected client: a bounded asyncio queue bound to its event loop."""
+
+    def __init__(self, loop, maxsize=QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        """Enqueue an event; must run in the subscription's loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: forget its backlog, it will catch up from the change log
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CATCH_UP_EVENT)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """Fan out events to subscriptions living in any event loop, from any thread."""
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Register a subscription for the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, event):
+        """Send an event to every subscription; callable from sync views (worker threads)."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Loop closed without unsubscribing (server shutdown)
+                self.unsubscribe(subscription)
+
+
+broadcaster = Broadcaster()
+
+
+def publish_change(version, activity_id=None):
+    """Publish a board change; ``activity_id`` None is a structural change."""
+    broadcaster.publish({'version': version, 'activity': activity_id})
@@ -0,0 +1,101 @@
+"""
+Data export API: the rows of the admin report as CSV, JSON Lines or XLSX.
+
+Two datasets, built on the report sections (report.report_sections()) so the
+date range and the CTA / repair / urgent / overdue classification are exactly
+those of admin_export_report:
+
+- ``validations``: traitements and tâches validated in the range,
+- ``cards``: finished cards of the range and classified active cards.
+
+Rows are read with .iterator() by chunks (report.section_chunks()) and each
+format writes them as they come, so the export is streamed whatever its size.
+"""
+import csv
+import json
+from datetime import date
+
+from .report import report_sections, section_chunks
+from .xlsx import CONTENT_TYPE as XLSX_CONTENT_TYPE, xlsx_stream
+
+VALIDATION_SECTIONS = {'traitements': 'traitement', 'taches': 'tache'}
+CARD_SECTIONS = ('finished', 'cta', 'reparations', 'urgent', 'overdue')
+
+DATASETS = {
+    'validations': ('type', 'done_at', 'activity_id', 'activity', 'scelle', 'description'),
+    'cards': ('section', 'id', 'name', 'date', 'days_remaining', 'tags'),
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'xlsx': XLSX_CONTENT_TYPE,
+}
+
+
+def _validation_rows(sections, today):
+    for section in sections:
+        if section.key not in VALIDATION_SECTIONS:
+            continue
+        for chunk in section_chunks(section, today):
+            for item in chunk:
+                scelle = item.scelle
+                activity = scelle.activity if scelle else None
+                yield (
+                    VALIDATION_SECTIONS[section.key], item.done_at,
+                    activity.id if activity else None, activity.name if activity else None,
+                    scelle.name if scelle else None, item.description,
+                )
+
+
+def _card_rows(sections, today):
+    for section in sections:
+        if section.key not in CARD_SECTIONS:
+            continue
+        # Tags of every card section, prefetched per chunk
+        for chunk in section_chunks(section._replace(prefetch=('tags',)), today):
+            for card in chunk:
+                yield (
+                    section.key, card.id, card.name, card.date, (card.date - today).days,
+                    ', '.join(tag.name for tag in card.tags.all()),
+                )
+
+
+def dataset_rows(dataset, start, end, today=None):
+    """Lazy iterable of the value tuples of ``dataset`` (columns: DATASETS[dataset])."""
+    today = today or date.today()
+    sections = report_sections(start, end, today)
+    if dataset == 'validations':
+        return _validation_rows(sections, today)
+    return _card_rows(sections, today)
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM: Excel then reads the file as UTF-8 (accents)
+    yield '\ufeff' + writer.writerow(headers)
+    for values in rows:
+        yield writer.writerow(['' if value is None else value for value in values])
+
+
+def _jsonl_stream(headers, rows):
+    for values in rows:
+        yield json.dumps(dict(zip(headers, values)), ensure_ascii=False, default=str) + '\n'
+
+
+def export_stream(dataset, fmt, start, end, today=None):
+    """Chunks (str or bytes) of ``dataset`` between start and end in format ``fmt``."""
+    headers = DATASETS[dataset]
+    rows = dataset_rows(dataset, start, end, today)
+    if fmt == 'csv':
+        return _csv_stream(headers, rows)
+    if fmt == 'jsonl':
+        return _jsonl_stream(headers, rows)
+    return xlsx_stream([(dataset, headers, rows)])
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from kanban.bench import DEFAULT_REPEAT, DEFAULT_SCALES, run_benchmark
+
+
+class Command(BaseCommand):
+    # The checks would open organiseur.db, which the benchmark never uses
+    requires_system_checks = []
+    help = 'Mesure les vues et les exports sur des jeux de données synthétiques (base temporaire) et enregistre les résultats en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default=','.join(str(scale) for scale in DEFAULT_SCALES),
+            help='Nombres d\'activités des jeux de données, séparés par des virgules (défaut : %(default)s)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=DEFAULT_REPEAT,
+            help='Appels chronométrés par mesure (défaut : %(default)s)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Graine des données synthétiques (défaut : 0)')
+        parser.add_argument('--only', help='Mesures à lancer, séparées par des virgules (défaut : toutes)')
+        parser.add_argument(
+            '--output',
+            default='bench_board.json',
+            help='Fichier JSON des résultats (défaut : %(default)s)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        except ValueError:
+            raise CommandError(f"Échelles invalides : {options['scales']}")
+        if not scales or min(scales) < 1 or options['repeat'] < 1:
+            raise CommandError('Les échelles et --repeat doivent être positifs')
+        only = {name.strip() for name in options['only'].split(',')} if options['only'] else None
+
+        results = run_benchmark(scales, options['repeat'], options['seed'], only, log=self.stdout.write)
+
+        for scale, run in results['scales'].items():
+            self.stdout.write(f'\n{scale} activités')
+            for name, measures in run['targets'].items():
+                self.stdout.write(
+                    f"  {name:<26} {measures['queries']:>4} requêtes  p50 {measures['p50_ms']:>8.1f} ms"
+                    f"  p95 {measures['p95_ms']:>8.1f} ms  pic {measures['peak_memory_kib']:>7} Kio"
+                )
+
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"✓ Résultats enregistrés dans {options['output']}"))
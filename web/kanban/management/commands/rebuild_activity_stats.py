@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from kanban.counters import rebuild_all_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruit (ou vérifie avec --check) les compteurs dénormalisés de la table activity_stats ; '
+        'à planifier pour rattraper les écritures faites hors des deux applications'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Vérifie les compteurs sans les modifier (code de sortie non nul en cas d\'écart)',
+        )
+    
+    def handle(self, *args, **options):
+        check = options['check']
+        
+        with transaction.atomic():
+            mismatches = rebuild_all_counters(dry_run=check)
+        
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Tous les compteurs sont à jour.'))
+            return
+        
+        for activity_id, current, expected in mismatches[:10]:  # Afficher max 10 exemples
+            if current is None:
+                self.stdout.write(f'  - Activité #{activity_id}: compteurs manquants')
+            elif expected is None:
+                self.stdout.write(f'  - Activité #{activity_id}: compteurs orphelins (activité supprimée)')
+            else:
+                diff = ', '.join(f'{k}={current[k]}→{v}' for k, v in expected.items() if current[k] != v)
+                self.stdout.write(f'  - Activité #{activity_id}: {diff}')
+        if len(mismatches) > 10:
+            self.stdout.write(f'  ... et {len(mismatches) - 10} autre(s)')
+        
+        if check:
+            raise CommandError(f'{len(mismatches)} activité(s) avec des compteurs incorrects.')
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(mismatches)} activité(s) corrigée(s)'))
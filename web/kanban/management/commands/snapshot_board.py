@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from kanban.snapshots import backfill_done, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Enregistre la photographie quotidienne du tableau (colonnes, statuts, tags, traitements/tâches validés) pour la vue Tendances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Jour enregistré (AAAA-MM-JJ, défaut : aujourd\'hui) ; l\'état enregistré est toujours l\'état actuel',
+        )
+        parser.add_argument(
+            '--backfill-done',
+            type=int,
+            metavar='JOURS',
+            help='Reconstruit aussi les traitements/tâches validés des JOURS jours précédents (d\'après done_at)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError(f"Date invalide : {options['date']}")
+
+        written = take_snapshot(day)
+        self.stdout.write(self.style.SUCCESS(f'✓ Photographie du {day} : {written} ligne(s)'))
+
+        if options['backfill_done']:
+            start = day - timedelta(days=options['backfill_done'])
+            written = backfill_done(start, day - timedelta(days=1))
+            self.stdout.write(self.style.SUCCESS(f'✓ Validations du {start} au {day - timedelta(days=1)} : {written} ligne(s)'))
@@ -116,3 +116,142 @@ class Tache(models.Model):
 
     def __str__(self):
         return self.description[:50]
+
+
+class ActivityStats(models.Model):
+    # Denormalized counters, kept up to date by the mutating views (see counters.py)
+    activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    scelle_count = models.IntegerField(default=0)
+    pending_traitements = models.IntegerField(default=0)
+    pending_taches = models.IntegerField(default=0)
+    free_traitements = models.IntegerField(default=0)
+    free_taches = models.IntegerField(default=0)
+    has_cta = models.BooleanField(default=False)
+    has_reparations = models.BooleanField(default=False)
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'activity_stats'
+        verbose_name = "Compteurs d'activité"
+        verbose_name_plural = "Compteurs d'activités"
+
+    def __str__(self):
+        return f"Stats {self.activity_id}"
+
+
+class BoardChange(models.Model):
+    # Change log polled by /api/board/changes; the id is the version token
+    activity_id = models.IntegerField(blank=True, null=True)
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'board_changes'
+        verbose_name = "Modification du tableau"
+        verbose_name_plural = "Modifications du tableau"
+
+    def __str__(self):
+        return f"Change {self.id} (activity {self.activity_id})"
+
+
+
+class BoardSnapshot(models.Model):
+    # One row per (day, metric, label), written by manage.py snapshot_board
+    day = models.DateField()
+    metric = models.CharField(max_length=20)
+    label = models.CharField(max_length=255)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'board_snapshots'
+        verbose_name = "Photographie du tableau"
+        verbose_name_plural = "Photographies du tableau"
+
+    def __str__(self):
+        return f"{self.day} {self.metric}/{self.label} = {self.value}"
+
+# Cold storage of the archived dossiers (database/archive_schema.py): same
+# columns as the hot tables, filled and emptied by archive/unarchive_activity.
+
+class ArchivedActivity(models.Model):
+    name = models.CharField(max_length=255, blank=True, null=True)
+    date = models.DateField()
+    description = models.TextField(blank=True, null=True)
+    column = models.ForeignKey(KanbanColumn, on_delete=models.DO_NOTHING, blank=True, null=True, related_name='+')
+    tags = models.ManyToManyField(Tag, through='ArchivedActivityTag', blank=True, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'archived_activities'
+        verbose_name = "Activité archivée"
+        verbose_name_plural = "Activités archivées"
+        ordering = ['date']
+
+    def __str__(self):
+        return self.name or f"Activity {self.id}"
+
+
+class ArchivedActivityTag(models.Model):
+    activity = models.ForeignKey(ArchivedActivity, on_delete=models.DO_NOTHING)
+    tag = models.ForeignKey(Tag, on_delete=models.DO_NOTHING, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'archived_activity_tags'
+
+
+class ArchivedScelle(models.Model):
+    name = models.CharField(max_length=255, blank=True, null=True)
+    info = models.TextField(blank=True, null=True)
+    activity = models.ForeignKey(ArchivedActivity, on_delete=models.DO_NOTHING, blank=True, null=True, related_name='scelles')
+    cta_validated = models.BooleanField(default=False)
+    reparations_validated = models.BooleanField(default=False)
+    reparations_details = models.TextField(blank=True, null=True)
+    important_info = models.TextField(blank=True, null=True)
+    tags = models.ManyToManyField(Tag, through='ArchivedScelleTag', blank=True, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'archived_scelles'
+
+    def __str__(self):
+        return self.name or f"Scelle {self.id}"
+
+
+class ArchivedScelleTag(models.Model):
+    scelle = models.ForeignKey(ArchivedScelle, on_delete=models.DO_NOTHING)
+    tag = models.ForeignKey(Tag, on_delete=models.DO_NOTHING, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'archived_scelle_tags'
+
+
+class ArchivedTraitement(models.Model):
+    description = models.TextField()
+    scelle = models.ForeignKey(ArchivedScelle, on_delete=models.DO_NOTHING, blank=True, null=True, related_name='traitements')
+    done = models.BooleanField(default=False)
+    done_at = models.DateField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'archived_traitements'
+
+    def __str__(self):
+        return self.description[:50]
+
+
+class ArchivedTache(models.Model):
+    description = models.CharField(max_length=255)
+    done = models.BooleanField(default=False)
+    scelle = models.ForeignKey(ArchivedScelle, on_delete=models.DO_NOTHING, blank=True, null=True, related_name='taches')
+    done_at = models.DateField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'archived_taches'
+
+    def __str__(self):
+        return self.description[:50]
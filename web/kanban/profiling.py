@@ -0,0 +1,142 @@
+"""
+Per-request SQL profiling (SQLProfilingMiddleware).
+
+A database execute wrapper counts the queries of each request, their total
+time and how many times each statement ran: the SQL text carries %s
+placeholders, not the parameter values, so the same statement repeated for
+every row of a list (an N+1) shows up as one entry with a high count.
+
+Requests that are slow, run too many queries or repeat one statement too
+often are written as one JSON object per line to the ``kanban.slow_requests``
+logger (slow_requests.log, next to user_actions.log). With
+KANBAN_SERVER_TIMING the figures are also sent in a ``Server-Timing`` header,
+shown by the browser developer tools.
+
+The cost per query is two perf_counter() calls and a dict update, and
+nothing is written for a normal request, so the middleware stays on in
+production. Settings (all optional):
+
+- KANBAN_PROFILING: False disables the middleware,
+- KANBAN_SLOW_REQUEST_MS (500), KANBAN_SLOW_REQUEST_QUERIES (50),
+  KANBAN_DUPLICATE_QUERIES (10): logging thresholds,
+- KANBAN_SERVER_TIMING (False).
+"""
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('kanban.slow_requests')
+
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_QUERIES = 50
+DUPLICATE_QUERIES = 10
+
+# Repeated statements listed in a log entry, and their length
+TOP_DUPLICATES = 5
+SQL_PREVIEW = 300
+
+
+class QueryProfile:
+    """Execute wrapper collecting the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.sql_seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, limit=TOP_DUPLICATES):
+        """``[(sql, executions)]`` of the statements run more than once, most repeated first."""
+        return [(sql, n) for sql, n in self.statements.most_common(limit) if n > 1]
+
+    @property
+    def max_repeats(self):
+        return max(self.statements.values(), default=0)
+
+
+class SQLProfilingMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'KANBAN_PROFILING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'KANBAN_SLOW_REQUEST_MS', SLOW_REQUEST_MS)
+        self.slow_queries = getattr(settings, 'KANBAN_SLOW_REQUEST_QUERIES', SLOW_REQUEST_QUERIES)
+        self.duplicate_queries = getattr(settings, 'KANBAN_DUPLICATE_QUERIES', DUPLICATE_QUERIES)
+        self.server_timing = getattr(settings, 'KANBAN_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # The queries of a streamed response run while it is sent: report at the end
+            response.streaming_content = self._profile_stream(response.streaming_content, request, response, profile, start)
+            return response
+
+        elapsed = time.perf_counter() - start
+        if self.server_timing:
+            response['Server-Timing'] = self.timing_header(profile, elapsed)
+        self.report(request, response, profile, elapsed)
+        return response
+
+    def _profile_stream(self, content, request, response, profile, start):
+        with connection.execute_wrapper(profile):
+            yield from content
+        self.report(request, response, profile, time.perf_counter() - start)
+
+    @staticmethod
+    def timing_header(profile, elapsed):
+        sql_ms = profile.sql_seconds * 1000
+        return (
+            f'db;dur={sql_ms:.1f};desc="{profile.count} queries", '
+            f'app;dur={elapsed * 1000 - sql_ms:.1f}, '
+            f'total;dur={elapsed * 1000:.1f}'
+        )
+
+    def reasons(self, profile, elapsed):
+        reasons = []
+        if elapsed * 1000 >= self.slow_ms:
+            reasons.append('slow')
+        if profile.count >= self.slow_queries:
+            reasons.append('queries')
+        if profile.max_repeats >= self.duplicate_queries:
+            reasons.append('duplicates')
+        return reasons
+
+    def report(self, request, response, profile, elapsed):
+        reasons = self.reasons(profile, elapsed)
+        if not reasons:
+            return
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        logger.warning(json.dumps({
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'reasons': reasons,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'user': user.get_username() if user is not None and user.is_authenticated else None,
+            'duration_ms': round(elapsed * 1000, 1),
+            'sql_ms': round(profile.sql_seconds * 1000, 1),
+            'view_ms': round((elapsed - profile.sql_seconds) * 1000, 1),
+            'queries': profile.count,
+            'duplicates': [{'sql': sql[:SQL_PREVIEW], 'count': n} for sql, n in profile.duplicates()],
+        }, ensure_ascii=False))
@@ -0,0 +1,123 @@
+"""
+Admin export report (admin_export_report), streamed section by section.
+
+Every section is one SQL query. The CTA / repair / urgent / overdue
+classification of the active cards is a condition over the flags of
+statistics.with_flags(), and the finished cards are limited to the requested
+range. Rows are read with .iterator() and rendered by chunks of CHUNK_SIZE,
+so the first sections reach the browser at once and memory stays flat
+whatever the range.
+"""
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import NamedTuple
+
+from django.db.models import Exists, OuterRef, Q, QuerySet, prefetch_related_objects
+
+from .models import Activity, Tache, Traitement
+from .routing import DONE_COLUMN
+from .statistics import with_flags
+
+CHUNK_SIZE = 500
+
+# Active cards due within URGENT_DAYS are listed as "Délai Court"
+URGENT_DAYS = 30
+
+
+class ReportSection(NamedTuple):
+    key: str
+    title: str
+    headers: tuple
+    empty: str
+    queryset: QuerySet
+    prefetch: tuple = ()
+
+
+def report_range(params, today=None):
+    """(start, end) from ``start_date`` / ``end_date`` (YYYY-MM-DD); today when missing or invalid."""
+    today = today or date.today()
+    start_date_str = params.get('start_date')
+    end_date_str = params.get('end_date')
+    if start_date_str and end_date_str:
+        try:
+            return (
+                datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+                datetime.strptime(end_date_str, '%Y-%m-%d').date(),
+            )
+        except ValueError:
+            pass
+    return today, today
+
+
+def validated(model, start, end):
+    """Traitements or tâches validated between start and end, with their scellé and activity."""
+    return (
+        model.objects.filter(done=True, done_at__range=(start, end))
+        .select_related('scelle', 'scelle__activity').order_by('done_at', 'id')
+    )
+
+
+def finished_cards(start, end):
+    """Terminé cards due in the range or with a traitement/tâche validated in the range."""
+    def validated_in_range(model):
+        return Exists(model.objects.filter(
+            scelle__activity=OuterRef('pk'), done=True, done_at__range=(start, end),
+        ))
+
+    return Activity.objects.filter(column__name=DONE_COLUMN).filter(
+        Q(date__range=(start, end)) | validated_in_range(Traitement) | validated_in_range(Tache)
+    ).order_by('-date', '-id')
+
+
+def classified_cards(today=None):
+    """
+    ``{section key: queryset}`` of the active (non-Terminé) cards: CTA first,
+    then repairs, then, for the other cards, overdue and due within URGENT_DAYS.
+    """
+    today = today or date.today()
+    active = with_flags(Activity.objects.exclude(column__name=DONE_COLUMN)).order_by('date', 'id')
+    plain = Q(is_cta=False, is_reparation=False)
+    return {
+        'cta': active.filter(is_cta=True),
+        'reparations': active.filter(is_cta=False, is_reparation=True),
+        'urgent': active.filter(plain, date__gte=today, date__lte=today + timedelta(days=URGENT_DAYS)),
+        'overdue': active.filter(plain, date__lt=today),
+    }
+
+
+def report_sections(start, end, today=None):
+    """The ReportSection list of the report, in display order."""
+    cards = classified_cards(today)
+    card_headers = ('Date Limite', 'Nom', 'Description', 'Tags')
+    return [
+        ReportSection('traitements', 'Traitements Validés', ('Scellé / Activité', 'Description', 'Heure (si dispo)'),
+                      'Aucun traitement validé ce jour.', validated(Traitement, start, end)),
+        ReportSection('taches', 'Tâches Validées', ('Scellé / Activité', 'Description'),
+                      'Aucune tâche validée ce jour.', validated(Tache, start, end)),
+        ReportSection('finished', 'Cartes Terminées (période)', ('Nom', 'Date Limite'),
+                      'Aucune carte terminée sur la période.', finished_cards(start, end)),
+        ReportSection('cta', 'Au CTA', card_headers, 'Aucune carte en CTA.', cards['cta'], ('tags',)),
+        ReportSection('reparations', 'En Réparations', card_headers, 'Aucune carte en réparation.',
+                      cards['reparations'], ('tags',)),
+        ReportSection('urgent', f'Délai Court (< {URGENT_DAYS} jours)', ('Nom', 'Date Limite', 'Jours Restants'),
+                      'Aucune carte en urgence immédiate.', cards['urgent']),
+        ReportSection('overdue', 'En Retard', ('Nom', 'Date Limite', 'Retard'),
+                      'Aucune carte en retard.', cards['overdue']),
+    ]
+
+
+def section_chunks(section, today=None):
+    """Yield the rows of ``section`` by lists of at most CHUNK_SIZE, prefetching per chunk."""
+    today = today or date.today()
+    rows = section.queryset.iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        if section.prefetch:
+            prefetch_related_objects(chunk, *section.prefetch)
+        if section.key in ('urgent', 'overdue'):
+            for card in chunk:
+                card.days_remaining = (card.date - today).days
+                card.days_overdue = -card.days_remaining
+        yield chunk
@@ -0,0 +1,89 @@
+"""
+Column-routing rules shared by the board, get_activity_columns and synthese.
+
+The rules only look at an ``ActivityState`` (physical column plus a few
+precomputed flags), so deciding where a card goes costs O(1) per activity and
+no query once the state is loaded.
+"""
+from typing import NamedTuple, Optional
+
+ARCHIVED_COLUMN = 'Archivé'
+DONE_COLUMN = 'Terminé'
+WAITING_COLUMN = 'En attente'
+IN_PROGRESS_COLUMN = 'En cours'
+
+
+class ActivityState(NamedTuple):
+    column_name: Optional[str]
+    has_cta: bool
+    has_reparations: bool
+    # Pending traitements/tâches on a scelle that is neither CTA- nor repair-validated
+    free_traitements: bool
+    free_taches: bool
+
+
+def state_of(activity):
+    """Build the routing state of an activity annotated by board_engine.annotate_activity()."""
+    return ActivityState(
+        column_name=activity.column.name if activity.column else None,
+        has_cta=bool(activity.has_cta),
+        has_reparations=bool(activity.has_reparations),
+        free_traitements=bool(activity.free_traitements),
+        free_taches=bool(activity.free_taches),
+    )
+
+
+def target_column_names(state):
+    """Names of the board columns an activity shows up in."""
+    physical = state.column_name
+    names = set()
+
+    if physical:
+        names.add(physical)
+
+    if physical == IN_PROGRESS_COLUMN:
+        # En cours cards with a validated CTA/Rep move to En attente (and CTA/Réparations)
+        if state.has_cta or state.has_reparations:
+            names.discard(IN_PROGRESS_COLUMN)
+            names.add(WAITING_COLUMN)
+        if state.has_cta:
+            names.add('CTA')
+        if state.has_reparations:
+            names.add('Réparations')
+        if state.free_traitements:
+            names.add('Traitements')
+        if state.free_taches:
+            names.add('Tâches')
+
+    # En cours also aggregates every active card with pending work
+    if (state.free_traitements or state.free_taches) and physical not in (DONE_COLUMN, ARCHIVED_COLUMN, WAITING_COLUMN):
+        names.add(IN_PROGRESS_COLUMN)
+
+    return names
+
+
+def target_column_ids(state, column_ids):
+    """Same as target_column_names() but resolved through a ``{name: id}`` mapping."""
+    return {column_ids[name] for name in target_column_names(state) if name in column_ids}
+
+
+def synthese_buckets(state):
+    """
+    Synthèse buckets of a non-archived activity.
+
+    Returns {'termine'} for finished cards; otherwise the subset of
+    {'cta', 'reparation', 'attente'} that applies, or {'remaining'} when the
+    card is in none of them ("En cours réel").
+    """
+    if state.column_name == DONE_COLUMN:
+        return {'termine'}
+
+    buckets = set()
+    if state.has_cta:
+        buckets.add('cta')
+    if state.has_reparations:
+        buckets.add('reparation')
+    if state.column_name == WAITING_COLUMN:
+        buckets.add('attente')
+
+    return buckets or {'remaining'}
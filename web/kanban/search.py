@@ -0,0 +1,157 @@
+"""
+Full-text search over activities, scellés, traitements and tâches.
+
+Reads the FTS5 table ``search_index`` (database/search_schema.py), kept up to
+date by SQLite triggers, so every write (web or desktop) is searchable at
+once. Archived dossiers are indexed from the cold storage tables with a
+negative rowid. One MATCH query returns a ranked page (bm25, titles weighted
+above bodies) with highlighted title and snippet; the owning activities are
+then resolved in a few small queries, in the hot or in the archive tables.
+"""
+import re
+from typing import NamedTuple
+
+from django.db import connection
+from django.utils.html import escape
+
+from .models import (
+    Activity, ArchivedActivity, ArchivedScelle, ArchivedTache, ArchivedTraitement, Scelle, Tache, Traitement,
+)
+from .routing import ARCHIVED_COLUMN
+
+SEARCH_TABLE = 'search_index'
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# bm25 weights of the indexed columns (title, body)
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+# Highlight markers, replaced by <mark> once the text is escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+KIND_LABELS = {
+    'activity': 'Activité',
+    'scelle': 'Scellé',
+    'traitement': 'Traitement',
+    'tache': 'Tâche',
+}
+
+# Child models of each storage (hot: False, archived: True)
+CHILD_MODELS = {
+    False: (('scelle', Scelle), ('traitement', Traitement), ('tache', Tache)),
+    True: (('scelle', ArchivedScelle), ('traitement', ArchivedTraitement), ('tache', ArchivedTache)),
+}
+
+
+class SearchPage(NamedTuple):
+    results: list
+    total: int
+    page: int
+    page_size: int
+
+
+def build_match_query(text):
+    """
+    Turn user input into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so FTS5 operators typed by the user are plain text.
+    Returns '' when the input has no word.
+    """
+    tokens = _TOKEN.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _marked(text):
+    return escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def _owners(hits):
+    """Map (archived, kind, ref_id) to the id of the owning activity, one query per child kind found."""
+    ids = {(archived, kind): set() for archived in CHILD_MODELS for kind in KIND_LABELS}
+    for hit in hits:
+        ids[(hit['archived'], hit['kind'])].add(hit['ref_id'])
+
+    owners = {}
+    for archived, children in CHILD_MODELS.items():
+        owners.update({(archived, 'activity', ref_id): ref_id for ref_id in ids[(archived, 'activity')]})
+        for kind, model in children:
+            if not ids[(archived, kind)]:
+                continue
+            field = 'activity_id' if kind == 'scelle' else 'scelle__activity_id'
+            for ref_id, activity_id in model.objects.filter(id__in=ids[(archived, kind)]).values_list('id', field):
+                owners[(archived, kind, ref_id)] = activity_id
+    return owners
+
+
+def _activities(owners):
+    """(archived, id) -> activity, for the owners found (at most one query per storage)."""
+    activities = {}
+    for archived, queryset in ((False, Activity.objects.select_related('column')), (True, ArchivedActivity.objects)):
+        ids = {activity_id for (cold, _, _), activity_id in owners.items() if cold == archived and activity_id is not None}
+        if ids:
+            activities.update({(archived, pk): activity for pk, activity in queryset.in_bulk(ids).items()})
+    return activities
+
+
+def search(text, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Return a SearchPage of ranked hits for ``text`` (1-based ``page``)."""
+    page = max(1, page)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    match = build_match_query(text)
+    if not match:
+        return SearchPage([], 0, page, page_size)
+
+    offset = (page - 1) * page_size
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid < 0, kind, ref_id, "
+            f"highlight({SEARCH_TABLE}, 2, %s, %s), "
+            f"snippet({SEARCH_TABLE}, 3, %s, %s, '…', 16), "
+            f"bm25({SEARCH_TABLE}, 0, 0, %s, %s) AS score "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY score LIMIT %s OFFSET %s",
+            [_OPEN, _CLOSE, _OPEN, _CLOSE, TITLE_WEIGHT, BODY_WEIGHT, match, page_size, offset],
+        )
+        rows = cursor.fetchall()
+        if rows and len(rows) < page_size:
+            # Last page: the total follows without counting
+            total = offset + len(rows)
+        else:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match])
+            total = cursor.fetchone()[0]
+
+    if not rows:
+        return SearchPage([], total, page, page_size)
+
+    hits = [
+        {'archived': bool(archived), 'kind': kind, 'ref_id': ref_id, 'title': title, 'snippet': snippet, 'score': score}
+        for archived, kind, ref_id, title, snippet, score in rows
+    ]
+    owners = _owners(hits)
+    activities = _activities(owners)
+
+    results = []
+    for hit in hits:
+        key = (hit['archived'], hit['kind'], hit['ref_id'])
+        activity = activities.get((hit['archived'], owners.get(key)))
+        if hit['archived']:
+            column = ARCHIVED_COLUMN
+        else:
+            column = activity.column.name if activity and activity.column else None
+        results.append({
+            'kind': hit['kind'],
+            'kind_label': KIND_LABELS[hit['kind']],
+            'id': hit['ref_id'],
+            'title': _marked(hit['title']),
+            'snippet': _marked(hit['snippet']),
+            'score': round(-hit['score'], 4),
+            'activity_id': activity.id if activity else None,
+            'activity_name': activity.name if activity else None,
+            'column': column if activity else None,
+            'archived': bool(activity and column == ARCHIVED_COLUMN),
+        })
+    return SearchPage(results, total, page, page_size)
@@ -0,0 +1,144 @@
+"""
+Daily snapshots of the board (``board_snapshots`` table) for the trend view.
+
+take_snapshot() stores a handful of aggregate rows for one day:
+
+- ``column``: activities per physical column (Archivé read from cold storage),
+- ``status``: the synthèse buckets of statistics.synthese_statistics(),
+- ``tag``: non-archived activities per tag,
+- ``done``: traitements / tâches validated that day (done_at), archives included.
+
+Every metric is a single GROUP BY or COUNT query and taking a day again
+replaces its rows. The trend view reads a year of history from these small
+rows instead of rescanning the live tables. ``manage.py snapshot_board``
+runs it (once a day, from cron or the task scheduler).
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import (
+    Activity, ArchivedActivity, ArchivedTache, ArchivedTraitement, BoardSnapshot, Tache, Traitement,
+)
+from .routing import ARCHIVED_COLUMN
+from .statistics import synthese_statistics
+
+METRICS = ('column', 'status', 'tag', 'done')
+
+# Order of the status series, as on the synthèse page
+STATUS_LABELS = ('total', 'termine', 'cta', 'reparation', 'attente', 'remaining')
+
+DONE_MODELS = {
+    'traitements': (Traitement, ArchivedTraitement),
+    'taches': (Tache, ArchivedTache),
+}
+
+NO_COLUMN = 'Sans colonne'
+
+DEFAULT_TREND_DAYS = 365
+
+
+def column_counts():
+    rows = Activity.objects.values('column__name').annotate(n=Count('id')).values_list('column__name', 'n').order_by()
+    counts = {name or NO_COLUMN: n for name, n in rows}
+    archived = ArchivedActivity.objects.count()
+    if archived:
+        counts[ARCHIVED_COLUMN] = counts.get(ARCHIVED_COLUMN, 0) + archived
+    return counts
+
+
+def status_counts():
+    stats = synthese_statistics(with_remaining=False)
+    return {label: getattr(stats, label) for label in STATUS_LABELS}
+
+
+def tag_counts():
+    rows = (
+        Activity.tags.through.objects.exclude(activity__column__name=ARCHIVED_COLUMN)
+        .values('tag__name').annotate(n=Count('activity_id')).values_list('tag__name', 'n').order_by()
+    )
+    return {name: n for name, n in rows if name}
+
+
+def done_counts(start, end):
+    """``{day: {'traitements': n, 'taches': n}}`` of the items validated between start and end (inclusive)."""
+    counts = {}
+    for label, models in DONE_MODELS.items():
+        for model in models:
+            rows = (
+                model.objects.filter(done=True, done_at__range=(start, end))
+                .values('done_at').annotate(n=Count('id')).values_list('done_at', 'n').order_by()
+            )
+            for day, n in rows:
+                day_counts = counts.setdefault(day, dict.fromkeys(DONE_MODELS, 0))
+                day_counts[label] += n
+    return counts
+
+
+def _rows(day, metric, counts):
+    return [BoardSnapshot(day=day, metric=metric, label=label, value=value) for label, value in counts.items()]
+
+
+@transaction.atomic
+def take_snapshot(day=None):
+    """
+    Store the current board state under ``day`` (default: today) and the
+    items validated that day. Returns the number of rows written.
+    """
+    day = day or date.today()
+    rows = (
+        _rows(day, 'column', column_counts())
+        + _rows(day, 'status', status_counts())
+        + _rows(day, 'tag', tag_counts())
+        + _rows(day, 'done', done_counts(day, day).get(day, dict.fromkeys(DONE_MODELS, 0)))
+    )
+    BoardSnapshot.objects.filter(day=day).delete()
+    BoardSnapshot.objects.bulk_create(rows)
+    return len(rows)
+
+
+@transaction.atomic
+def backfill_done(start, end):
+    """
+    Rebuild the ``done`` rows between start and end from the done_at dates
+    (the other metrics describe a past state and cannot be rebuilt).
+    """
+    counts = done_counts(start, end)
+    rows = []
+    day = start
+    while day <= end:
+        rows += _rows(day, 'done', counts.get(day, dict.fromkeys(DONE_MODELS, 0)))
+        day += timedelta(days=1)
+    BoardSnapshot.objects.filter(metric='done', day__range=(start, end)).delete()
+    BoardSnapshot.objects.bulk_create(rows)
+    return len(rows)
+
+
+def trend(days=DEFAULT_TREND_DAYS, today=None):
+    """
+    Series of the last ``days`` days, read in one query.
+
+    Returns ``{'days': [...], 'series': {metric: {label: [value per day]}}}``;
+    a label absent from a snapshot day counts 0 for that day.
+    """
+    today = today or date.today()
+    rows = (
+        BoardSnapshot.objects.filter(day__gt=today - timedelta(days=days), day__lte=today)
+        .order_by('day').values_list('day', 'metric', 'label', 'value')
+    )
+    day_index = {}
+    values = {}
+    for day, metric, label, value in rows:
+        position = day_index.setdefault(day, len(day_index))
+        values.setdefault(metric, {}).setdefault(label, {})[position] = value
+
+    series = {}
+    for metric in METRICS:
+        labels = values.get(metric, {})
+        order = [label for label in STATUS_LABELS if label in labels] if metric == 'status' else sorted(labels)
+        series[metric] = {
+            label: [labels[label].get(position, 0) for position in range(len(day_index))]
+            for label in order
+        }
+    return {'days': [day.isoformat() for day in day_index], 'series': series}
@@ -0,0 +1,86 @@
+"""
+Server-sent events stream of board changes (/api/board/events/).
+
+A plain ASGI application mounted in organiseur_web/asgi.py in front of
+Django: Django 3.2 cannot stream from an async view, and a long-lived
+connection must not hold one of the sync worker threads. It only relays
+the events of kanban.events.broadcaster, without touching the database.
+
+Served by an ASGI server (uvicorn, daphne...). Under runserver (WSGI) the
+route does not exist and the board keeps polling /api/board/changes/.
+"""
+import asyncio
+import json
+
+from .events import broadcaster
+
+EVENTS_PATH = '/api/board/events/'
+
+# Comment line sent when idle, keeps proxies from closing the connection
+HEARTBEAT_SECONDS = 15
+
+RETRY_MS = 5000
+
+
+def format_event(event):
+    return f"event: change\ndata: {json.dumps(event)}\n\n".encode()
+
+
+async def board_events(scope, receive, send):
+    """ASGI app streaming ``change`` events until the client disconnects."""
+    if scope['method'] != 'GET':
+        await send({'type': 'http.response.start', 'status': 405, 'headers': [(b'allow', b'GET')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    subscription = broadcaster.subscribe()
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': f"retry: {RETRY_MS}\n\n".encode(), 'more_body': True})
+
+        disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+        next_event = asyncio.ensure_future(subscription.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {next_event, disconnect}, timeout=HEARTBEAT_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    break
+                if next_event in done:
+                    body = format_event(next_event.result())
+                    next_event = asyncio.ensure_future(subscription.get())
+                else:
+                    body = b": ping\n\n"
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            next_event.cancel()
+            disconnect.cancel()
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+def with_board_events(django_app):
+    """Wrap the Django ASGI application, routing EVENTS_PATH to board_events()."""
+    async def application(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+            await board_events(scope, receive, send)
+        else:
+            await django_app(scope, receive, send)
+    return application
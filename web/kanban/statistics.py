@@ -0,0 +1,162 @@
+"""
+Board statistics computed in SQL.
+
+synthese_statistics() returns the synthèse buckets of the non-archived
+activities with one conditional-aggregation query: the CTA/repair flags come
+from the maintained activity_stats row (an EXISTS over the scellés is only
+evaluated for activities without counters), and the buckets follow the same
+rules as routing.synthese_buckets(). The "En cours réel" activities are then
+loaded by a second query, so the cost no longer grows with the number of
+finished or waiting dossiers held in memory.
+
+board_statistics() is the small fixed set of counts shared by the synthèse
+and the admin report: activities per column (one GROUP BY) and done/total
+traitements and tâches, all in one query. Archived dossiers count in both,
+read from the cold-storage tables. The desktop PDF exporter reads the
+same figures through database/statistics.py.
+"""
+from typing import NamedTuple
+
+from django.db.models import BooleanField, Count, Exists, F, Func, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Activity, ArchivedActivity, ArchivedTache, ArchivedTraitement, KanbanColumn, Scelle, Tache, Traitement,
+)
+from .routing import ARCHIVED_COLUMN, DONE_COLUMN, WAITING_COLUMN
+
+
+class SyntheseStatistics(NamedTuple):
+    total: int
+    termine: int
+    cta: int
+    reparation: int
+    attente: int
+    remaining: int
+    remaining_activities: list
+
+
+def _flag(field, scelle_field):
+    fallback = Exists(Scelle.objects.filter(activity=OuterRef('pk'), **{scelle_field: True}))
+    return Coalesce(f'stats__{field}', fallback, output_field=BooleanField())
+
+
+def with_flags(queryset):
+    """Annotate activities with the ``is_cta`` and ``is_reparation`` flags."""
+    return queryset.annotate(
+        is_cta=_flag('has_cta', 'cta_validated'),
+        is_reparation=_flag('has_reparations', 'reparations_validated'),
+    )
+
+
+def flagged_activities():
+    """Non-archived activities annotated by with_flags()."""
+    return with_flags(Activity.objects.exclude(column__name=ARCHIVED_COLUMN))
+
+
+# Bucket conditions over flagged_activities(), see routing.synthese_buckets()
+DONE = Q(column__name=DONE_COLUMN)
+BUCKETS = {
+    'termine': DONE,
+    'cta': ~DONE & Q(is_cta=True),
+    'reparation': ~DONE & Q(is_reparation=True),
+    'attente': ~DONE & Q(column__name=WAITING_COLUMN),
+    'remaining': ~DONE & Q(is_cta=False, is_reparation=False) & ~Q(column__name=WAITING_COLUMN),
+}
+
+
+def synthese_statistics(with_remaining=True):
+    """
+    Return the SyntheseStatistics of the board.
+
+    ``remaining_activities`` (ordered by date, with column and scellés) is
+    empty unless ``with_remaining``.
+    """
+    activities = flagged_activities()
+    counts = activities.aggregate(
+        total=Count('id'),
+        **{name: Count('id', filter=condition) for name, condition in BUCKETS.items()}
+    )
+
+    remaining = []
+    if with_remaining and counts['remaining']:
+        remaining = list(
+            activities.filter(BUCKETS['remaining'])
+            .select_related('column').prefetch_related('scelles').order_by('date', 'id')
+        )
+    return SyntheseStatistics(remaining_activities=remaining, **counts)
+
+
+class BoardStatistics(NamedTuple):
+    columns: list
+    traitements_done: int
+    traitements_total: int
+    taches_done: int
+    taches_total: int
+
+    @property
+    def items_done(self):
+        return self.traitements_done + self.taches_done
+
+    @property
+    def items_total(self):
+        return self.traitements_total + self.taches_total
+
+    @property
+    def progress(self):
+        """Done traitements + tâches, in percent (0 when there are none)."""
+        return int(100 * self.items_done / self.items_total) if self.items_total else 0
+
+
+def _count(queryset):
+    # Uncorrelated COUNT(*) subquery: SQLite evaluates it once per statement
+    return Subquery(
+        queryset.order_by().values(n=Func(F('id'), function='COUNT')).values('n'),
+        output_field=IntegerField(),
+    )
+
+
+# Live and cold-storage model of the traitements / tâches
+ITEM_MODELS = {'traitements': (Traitement, ArchivedTraitement), 'taches': (Tache, ArchivedTache)}
+
+
+def _item_counts(models, done=False):
+    """Sum of the COUNT subqueries of ``models`` (only the done rows if ``done``)."""
+    counts = [_count(model.objects.filter(done=True) if done else model.objects.all()) for model in models]
+    return sum(counts[1:], counts[0])
+
+
+def item_progress(models):
+    """``(done, total)`` of the traitements or tâches, live and archived."""
+    done = total = 0
+    for model in models:
+        counts = model.objects.aggregate(done=Count('id', filter=Q(done=True)), total=Count('id'))
+        done, total = done + counts['done'], total + counts['total']
+    return done, total
+
+
+def board_statistics():
+    """
+    Return the BoardStatistics of the board in one query: the GROUP BY of the
+    columns carries the cold-storage and traitement/tâche counts as scalar
+    subqueries. Archivé counts the cold-storage dossiers, and the traitements
+    and tâches of the archived dossiers are counted with the live ones.
+    """
+    totals = {'archived': _count(ArchivedActivity.objects.all())}
+    for name, models in ITEM_MODELS.items():
+        totals[f'{name}_done'] = _item_counts(models, done=True)
+        totals[f'{name}_total'] = _item_counts(models)
+    rows = list(
+        KanbanColumn.objects.annotate(n=Count('activities'), **totals)
+        .order_by('order_index', 'id').values_list('name', 'n', *totals)
+    )
+    if not rows:
+        traitements_done, traitements_total = item_progress(ITEM_MODELS['traitements'])
+        taches_done, taches_total = item_progress(ITEM_MODELS['taches'])
+        return BoardStatistics([], traitements_done, traitements_total, taches_done, taches_total)
+
+    archived = rows[0][2]
+    return BoardStatistics(
+        [(name, n + archived if name == ARCHIVED_COLUMN else n) for name, n, *_ in rows],
+        *rows[0][3:],
+    )
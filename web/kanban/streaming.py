@@ -0,0 +1,66 @@
+"""
+Streamed responses whose generator reads the database.
+
+Under WSGI (runserver, wsgi.py) a StreamingHttpResponse sends each chunk as
+soon as it is produced, so a long report starts reaching the browser at once
+and is never held in memory.
+
+Django 3.2's ASGI handler iterates a streaming response inside the event
+loop, where ORM calls are refused. StreamingASGIHandler (used by
+organiseur_web/asgi.py) pulls each chunk with sync_to_async instead, in the
+thread that ran the view, and sends it before asking for the next one: under
+ASGI too, only one batch of rows is in memory at a time.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.http import StreamingHttpResponse
+
+_END = object()
+
+
+def stream_response(request, chunks, content_type, filename=None):
+    """Response sending ``chunks`` (str or bytes) as they are produced; ``filename`` makes it a download."""
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def response_headers(response):
+    """ASGI headers of ``response``, cookies included (as ASGIHandler.send_response builds them)."""
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        if isinstance(value, str):
+            value = value.encode('latin1')
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+    return headers
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler producing the chunks of streaming responses outside the event loop."""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        # Same thread as the view, so the generator keeps its database connection
+        next_part = sync_to_async(next, thread_sensitive=True)
+        parts = iter(response)
+        while True:
+            part = await next_part(parts, _END)
+            if part is _END:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,186 @@
+"""
+Autocomplete of traitement / tâche descriptions.
+
+Each kind has an in-memory index over its distinct descriptions, ranked by
+usage (number of rows using the description, archived dossiers included). It
+is built with one GROUP BY query per storage and answers ``q`` from a trie whose nodes keep their top
+MAX_LIMIT entries, so a lookup only walks len(q) nodes whatever the size of
+the history. Matching is case- and accent-insensitive ("reparation" finds
+"Réparation") and works on the start of any word of the description.
+
+The index is rebuilt lazily: invalidate_suggestions() bumps a generation
+counter kept in the Django cache (shared between worker processes) when a
+traitement/tâche is added or deleted, and the index is also rebuilt after
+MAX_AGE seconds for the rows written by the desktop application.
+"""
+import heapq
+import re
+from collections import Counter
+import threading
+from bisect import bisect_left
+import time
+import unicodedata
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ArchivedTache, ArchivedTraitement, Tache, Traitement
+
+# Hot and cold storage models of each kind
+SUGGESTION_MODELS = {
+    'traitements': (Traitement, ArchivedTraitement),
+    'taches': (Tache, ArchivedTache),
+}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Trie depth; longer queries bisect the sorted tails kept by the deepest nodes
+MAX_DEPTH = 12
+
+MAX_AGE = 5 * 60
+
+GENERATION_KEY = 'kanban:suggestions:{kind}'
+
+_WORD_START = re.compile(r'(?:^|(?<=[\s\'’\-/(,.;:]))\S')
+
+
+def normalize(text):
+    """Lower-case, accent-free, single-spaced form used for matching."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+def word_suffixes(key):
+    """Suffixes of a normalized description starting at each word."""
+    return [key[match.start():] for match in _WORD_START.finditer(key)]
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'tails')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+        # Deepest level only: sorted (rest of the suffix, position) pairs
+        self.tails = None
+
+
+class SuggestionIndex:
+    """Trie over ranked descriptions; ``entries`` is a list of (description, count)."""
+
+    def __init__(self, entries):
+        # Rank once: most used first, then alphabetical (accent-insensitive)
+        self.entries = sorted(entries, key=lambda e: (-e[1], normalize(e[0]), e[0]))
+        self.keys = [normalize(description) for description, _ in self.entries]
+        self.root = _Node()
+        deep_nodes = []
+        for position, key in enumerate(self.keys):
+            for suffix in word_suffixes(key):
+                node = self._insert(suffix, position)
+                if node is not None:
+                    deep_nodes.append(node)
+        for node in deep_nodes:
+            if node.tails and not isinstance(node.tails, tuple):
+                node.tails = tuple(sorted(node.tails))
+
+    def _insert(self, suffix, position):
+        node = self.root
+        self._add(node, position)
+        for char in suffix[:MAX_DEPTH]:
+            node = node.children.setdefault(char, _Node())
+            self._add(node, position)
+        if len(suffix) < MAX_DEPTH:
+            return None
+        if node.tails is None:
+            node.tails = []
+        node.tails.append((suffix[MAX_DEPTH:], position))
+        return node
+
+    @staticmethod
+    def _add(node, position):
+        # Positions arrive in rank order: the first MAX_LIMIT are the top
+        if len(node.top) < MAX_LIMIT and (not node.top or node.top[-1] != position):
+            node.top.append(position)
+
+    def search(self, q='', limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` (description, count) matching ``q``, most used first."""
+        limit = max(1, min(limit, MAX_LIMIT))
+        query = normalize(q)
+        node = self.root
+        for char in query[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if len(query) <= MAX_DEPTH:
+            positions = node.top[:limit]
+        else:
+            tails, rest = node.tails or (), query[MAX_DEPTH:]
+            matches = set()
+            for i in range(bisect_left(tails, (rest,)), len(tails)):
+                if not tails[i][0].startswith(rest):
+                    break
+                matches.add(tails[i][1])
+            positions = heapq.nsmallest(limit, matches)
+        return [self.entries[p] for p in positions]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _generation(kind):
+    key = GENERATION_KEY.format(kind=kind)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 0, None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+def invalidate_suggestions(*kinds):
+    """Mark the indexes of ``kinds`` (default: all) as stale; call after an add/delete."""
+    for kind in kinds or SUGGESTION_MODELS:
+        try:
+            cache.incr(GENERATION_KEY.format(kind=kind))
+        except ValueError:
+            cache.set(GENERATION_KEY.format(kind=kind), 1, None)
+
+
+def drop_local_indexes():
+    """Forget the indexes built by this process (e.g. after switching databases, see bench.py)."""
+    with _lock:
+        _indexes.clear()
+
+
+def build_index(kind):
+    uses = Counter()
+    for model in SUGGESTION_MODELS[kind]:
+        rows = (
+            model.objects.filter(description__isnull=False).exclude(description__exact='')
+            .values('description').annotate(uses=Count('id')).values_list('description', 'uses')
+        )
+        for description, count in rows:
+            uses[description] += count
+    return SuggestionIndex(list(uses.items()))
+
+
+def get_index(kind):
+    """Return the up-to-date index of ``kind`` ('traitements' or 'taches')."""
+    generation = _generation(kind)
+    current = _indexes.get(kind)
+    if current and current[0] == generation and time.monotonic() - current[1] < MAX_AGE:
+        return current[2]
+    with _lock:
+        current = _indexes.get(kind)
+        if current and current[0] == generation and time.monotonic() - current[1] < MAX_AGE:
+            return current[2]
+        index = build_index(kind)
+        _indexes[kind] = (generation, time.monotonic(), index)
+        return index
+
+
+def suggest(kind, q='', limit=DEFAULT_LIMIT):
+    return get_index(kind).search(q, limit)
@@ -0,0 +1,123 @@
+"""
+Synthetic board data for the tests and benchmarks.
+
+seed_board() fills an (empty) database with N activities × M scellés × K
+traitements and K tâches per scellé, spread over the board columns, with a
+fixed random seed so that two runs produce the same data. Rows are inserted
+with bulk_create and explicit ids (SQLite does not return the ids of a bulk
+insert with Django 3.2), then the activity_stats counters are rebuilt and the
+activities of the Archivé column are moved to cold storage, as archiving does.
+"""
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from .archives import freeze_archived_column
+from .counters import rebuild_all_counters
+from .models import (
+    Activity, ArchivedActivity, ArchivedScelle, ArchivedTache, ArchivedTraitement,
+    KanbanColumn, Scelle, Tache, Tag, Traitement,
+)
+
+COLUMN_NAMES = [
+    "À faire", "En attente", "En cours", "Traitements", "Tâches",
+    "CTA", "Réparations", "Terminé", "Important", "Archivé",
+]
+
+# Physical columns of the seeded activities: mostly "En cours", as in real use
+COLUMN_WEIGHTS = {
+    "À faire": 2, "En attente": 1, "En cours": 5, "Terminé": 2, "Important": 1, "Archivé": 1,
+}
+
+TRAITEMENT_NAMES = ["Extraction", "Analyse", "Réparation", "Copie", "Expertise"]
+TACHE_NAMES = ["Rapport", "Photos", "Scellé retour", "Appel OPJ", "Inventaire"]
+
+
+def _next_id(*models):
+    # Ids are shared by the hot and the cold storage tables
+    return max((model.objects.order_by('-id').values_list('id', flat=True).first() or 0) for model in models) + 1
+
+
+@transaction.atomic
+def seed_board(activities=50, scelles=3, items=3, seed=0, today=None, tags=6):
+    """
+    Insert ``activities`` activities with ``scelles`` scellés each, and
+    ``items`` traitements plus ``items`` tâches per scellé. ``scelles`` and
+    ``items`` may also be a (min, max) range, drawn per activity / scellé
+    (realistic fan-out for the benchmarks).
+
+    About a third of the scellés are CTA- or repair-validated, half of the
+    traitements/tâches are done (with a done_at date in the last 30 days)
+    and activity dates range from 60 days ago to 60 days ahead. Returns a
+    dict with the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    columns = {}
+    for index, name in enumerate(COLUMN_NAMES):
+        columns[name], _ = KanbanColumn.objects.get_or_create(name=name, defaults={'order_index': index})
+
+    tag_id = _next_id(Tag)
+    new_tags = [Tag(id=tag_id + i, name=f"Tag {tag_id + i}", color="#%06X" % rng.randrange(0x1000000)) for i in range(tags)]
+    Tag.objects.bulk_create(new_tags)
+
+    weighted_columns = [columns[name] for name, weight in COLUMN_WEIGHTS.items() for _ in range(weight)]
+    activity_id = _next_id(Activity, ArchivedActivity)
+    scelle_id = _next_id(Scelle, ArchivedScelle)
+    traitement_id = _next_id(Traitement, ArchivedTraitement)
+    tache_id = _next_id(Tache, ArchivedTache)
+
+    def amount(count):
+        return rng.randint(*count) if isinstance(count, tuple) else count
+
+    def done_fields():
+        done = rng.random() < 0.5
+        return {'done': done, 'done_at': today - timedelta(days=rng.randrange(30)) if done else None}
+
+    new_activities, new_scelles, new_traitements, new_taches, activity_tags = [], [], [], [], []
+    for _ in range(activities):
+        activity = Activity(
+            id=activity_id,
+            name=f"Affaire {activity_id}",
+            date=today + timedelta(days=rng.randint(-60, 60)),
+            description=f"Activité synthétique {activity_id}",
+            column=rng.choice(weighted_columns),
+        )
+        new_activities.append(activity)
+        for tag in rng.sample(new_tags, min(len(new_tags), rng.randint(0, 2))):
+            activity_tags.append(Activity.tags.through(activity_id=activity_id, tag_id=tag.id))
+
+        for _ in range(amount(scelles)):
+            validation = rng.random()
+            new_scelles.append(Scelle(
+                id=scelle_id,
+                name=f"S{scelle_id}",
+                info="Scellé synthétique",
+                activity_id=activity_id,
+                cta_validated=validation < 0.15,
+                reparations_validated=0.15 <= validation < 0.3,
+            ))
+            for _ in range(amount(items)):
+                new_traitements.append(Traitement(id=traitement_id, scelle_id=scelle_id, description=rng.choice(TRAITEMENT_NAMES), **done_fields()))
+                new_taches.append(Tache(id=tache_id, scelle_id=scelle_id, description=rng.choice(TACHE_NAMES), **done_fields()))
+                traitement_id += 1
+                tache_id += 1
+            scelle_id += 1
+        activity_id += 1
+
+    Activity.objects.bulk_create(new_activities)
+    Activity.tags.through.objects.bulk_create(activity_tags)
+    Scelle.objects.bulk_create(new_scelles)
+    Traitement.objects.bulk_create(new_traitements)
+    Tache.objects.bulk_create(new_taches)
+    rebuild_all_counters()
+    freeze_archived_column()
+
+    return {
+        'activities': len(new_activities),
+        'scelles': len(new_scelles),
+        'traitements': len(new_traitements),
+        'taches': len(new_taches),
+    }
@@ -0,0 +1,95 @@
+"""
+Test runner for the unmanaged kanban tables.
+
+The kanban models are ``managed = False``: the schema belongs to the desktop
+app (database/models.py, SQLAlchemy) and Django's test database would not
+contain the tables. This runner puts the test database in a temporary SQLite
+file and, once Django has created it (auth, sessions...), builds the kanban
+schema in it with ``Base.metadata.create_all()``. The caches are moved away
+from the shared one as well (relocated_caches).
+
+Enabled by TEST_RUNNER in settings; needs SQLAlchemy, like the desktop app.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def create_kanban_schema(path):
+    """Create the tables of database/models.py (archive tables and search index included) in the SQLite file ``path``."""
+    from sqlalchemy import create_engine
+
+    from database.archive_schema import create_archive_schema
+    from database.models import Base
+    from database.search_schema import create_search_schema
+
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        connection = engine.raw_connection()
+        try:
+            create_archive_schema(connection)
+            create_search_schema(connection)
+        finally:
+            connection.close()
+    finally:
+        engine.dispose()
+
+
+def relocated_caches(directory):
+    """
+    override_settings(CACHES=...) moving every cache out of the shared one.
+
+    File-based caches get a folder under ``directory``, the other backends a
+    private local-memory cache: nothing is read from or written to the cache
+    of the running web workers.
+    """
+    caches = {
+        alias: {**config, 'LOCATION': os.path.join(directory, alias)}
+        if config['BACKEND'].endswith('FileBasedCache')
+        else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'{directory}:{alias}'}
+        for alias, config in settings.CACHES.items()
+    }
+    return override_settings(CACHES=caches)
+
+
+class UnmanagedSchemaRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp(prefix='organiseur-cache-')
+        self._cache_settings = relocated_caches(self._cache_dir)
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        try:
+            self._cache_settings.disable()
+            shutil.rmtree(self._cache_dir, ignore_errors=True)
+        finally:
+            super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        self._schema_dir = tempfile.mkdtemp(prefix='organiseur-tests-')
+        paths = []
+        for alias in connections:
+            settings_dict = connections[alias].settings_dict
+            if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+                path = os.path.join(self._schema_dir, f'{alias}.sqlite3')
+                settings_dict.setdefault('TEST', {})['NAME'] = path
+                paths.append(path)
+
+        old_config = super().setup_databases(**kwargs)
+        for path in paths:
+            create_kanban_schema(path)
+        return old_config
+
+    def teardown_databases(self, old_config, **kwargs):
+        try:
+            super().teardown_databases(old_config, **kwargs)
+        finally:
+            shutil.rmtree(self._schema_dir, ignore_errors=True)
@@ -6,8 +6,11 @@ app_name = 'kanban'
 urlpatterns = [
     path('', views.board, name='board'),
     path('synthese/', views.synthese, name='synthese'),
+    path('synthese/tendances/', views.trends, name='trends'),
+    path('api/trends/', views.trends_api, name='trends_api'),
     path('admin-export-form/', views.admin_export_form_view, name='admin_export_form'),
     path('admin-export/', views.admin_export_report, name='admin_export'),
+    path('api/export/<str:dataset>.<str:fmt>', views.export_data, name='export_data'),
     path('reorder-columns/', views.update_column_order, name='update_column_order'),
     path('move-activity/', views.move_activity, name='move_activity'),
     path('activity/<int:activity_id>/', views.get_activity_details, name='activity_detail'),
@@ -26,9 +29,12 @@ urlpatterns = [
     path('api/tache/<int:tache_id>/toggle/', views.toggle_tache, name='toggle_tache'),
     path('api/tache/<int:tache_id>/delete/', views.delete_tache, name='delete_tache'),
     path('api/activity/<int:activity_id>/columns/', views.get_activity_columns, name='get_activity_columns'),
+    path('api/board/changes/', views.board_changes, name='board_changes'),
     path('api/suggestions/traitements/', views.suggestion_traitements, name='suggestion_traitements'),
     path('api/suggestions/taches/', views.suggestion_taches, name='suggestion_taches'),
+    path('api/search/', views.search, name='search'),
     path('archives/', views.archives, name='archives'),
+    path('api/archives/', views.archives_api, name='archives_api'),
     path('api/activity/<int:activity_id>/archive/', views.archive_activity, name='archive_activity'),
     path('api/activity/<int:activity_id>/unarchive/', views.unarchive_activity, name='unarchive_activity'),
 ]
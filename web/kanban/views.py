@@ -1,11 +1,25 @@
 from django.shortcuts import render, get_object_or_404
 import logging
-from .models import KanbanColumn, Activity, Tag, Traitement, Tache, Scelle
-from django.db.models import Q, F, Count, Exists, OuterRef, Subquery, Value, IntegerField
-from django.db.models.functions import Coalesce
+from .models import KanbanColumn, Activity, ArchivedActivity, Tag, Traitement, Tache, Scelle
+from .board_engine import build_columns_data, card_queryset, load_board_activities, annotate_activity, annotate_activities
+from .cards import CardRenderer, render_columns_cards
+from .routing import state_of, target_column_ids
+from .counters import refresh_activity_counters, touch_activity
+from .changes import changes_since, current_version, record_change
+from .board_cache import cached_fragment, invalidates_board, user_variant
+from .suggestions import DEFAULT_LIMIT as DEFAULT_SUGGESTIONS, invalidate_suggestions, suggest
+from .statistics import board_statistics, synthese_statistics
+from .snapshots import DEFAULT_TREND_DAYS, trend
+from .report import report_range, report_sections, section_chunks
+from .streaming import stream_response
+from .exports import DATASETS as EXPORT_DATASETS, FORMATS as EXPORT_FORMATS, export_stream
+from .search import DEFAULT_PAGE_SIZE as DEFAULT_SEARCH_PAGE_SIZE, search as search_index
+from .archives import PAGE_SIZE as ARCHIVES_PAGE_SIZE, archive_page, decode_cursor, freeze_activity, parse_filters, thaw_activity
+from django.db.models import Q, F, Count
 import json
 from datetime import date, timedelta
 import json
+from urllib.parse import urlencode
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.db import transaction
@@ -15,263 +29,86 @@ from django.contrib.auth.decorators import user_passes_test
 
 logger = logging.getLogger('user_actions')
 
-def board(request):
+def _board_fragment(request):
+    # Read before the data so that a concurrent write is re-sent to the pollers
+    version = current_version()
     columns = KanbanColumn.objects.exclude(name='Archivé').order_by('order_index')
     
-    # Create reusable subqueries for accurate pending counts
-    pending_traitements_subquery = Traitement.objects.filter(
-        scelle__activity=OuterRef('pk'),
-        done=False
-    ).values('scelle__activity').annotate(
-        total=Count('id')
-    ).values('total')
-    
-    pending_taches_subquery = Tache.objects.filter(
-        scelle__activity=OuterRef('pk'),
-        done=False
-    ).values('scelle__activity').annotate(
-        total=Count('id')
-    ).values('total')
+    # Organize activities by column (single pass over all non-archived activities)
+    columns_data = render_columns_cards(build_columns_data(columns), request)
     
-    # Organize activities by column
-    columns_data = []
-    
-    for col in columns:
-        if col.name == "Traitements":
-            activities = Activity.objects.filter(
-                Q(column=col) | 
-                (
-                    Q(column__name="En cours") & 
-                    Q(scelles__traitements__done=False) & 
-                    Q(scelles__cta_validated=False) & 
-                    Q(scelles__reparations_validated=False)
-                )
-
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-            
-        elif col.name == "Tâches":
-            activities = Activity.objects.filter(
-                Q(column=col) | 
-                (
-                    Q(column__name="En cours") & 
-                    Q(scelles__taches__done=False) & 
-                    Q(scelles__cta_validated=False) & 
-                    Q(scelles__reparations_validated=False)
-                )
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-            
-        elif col.name == "CTA":
-            activities = Activity.objects.filter(
-                Q(column=col) | 
-                (Q(column__name="En cours") & Q(scelles__cta_validated=True))
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-            
-        elif col.name == "Réparations":
-            activities = Activity.objects.filter(
-                Q(column=col) | 
-                (Q(column__name="En cours") & Q(scelles__reparations_validated=True))
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-
-        elif col.name == "En attente":
-            activities = Activity.objects.filter(
-                Q(column=col) | 
-                (
-                    Q(column__name="En cours") & 
-                    (Q(scelles__cta_validated=True) | Q(scelles__reparations_validated=True))
-                )
-
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-            
-        elif col.name == "En cours":
-            # En cours behaves as an aggregator:
-            # 1. Activities physically in "En cours" (BUT exclude those with CTA/Rep validated, as they move to En Attente/CTA)
-            # 2. Activities with pending treatments or tasks (regardless of column, unless Terminé/Archivé)
-            activities = Activity.objects.filter(
-                (
-                    Q(column=col) & 
-                    ~Q(scelles__cta_validated=True) & 
-                    ~Q(scelles__reparations_validated=True)
-                ) |
-                (
-                    (Q(scelles__traitements__done=False) | Q(scelles__taches__done=False)) &
-                    Q(scelles__cta_validated=False) &
-                    Q(scelles__reparations_validated=False) &
-                    ~Q(column__name__in=['Terminé', 'Archivé', 'En attente'])
-                )
-            ).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).distinct().annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-        
-        else:
-            activities = Activity.objects.filter(column=col).prefetch_related(
-                'tags', 
-                'scelles__traitements', 
-                'scelles__taches'
-            ).annotate(
-                pending_traitements=Coalesce(
-                    Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                pending_taches=Coalesce(
-                    Subquery(pending_taches_subquery, output_field=IntegerField()),
-                    Value(0)
-                ),
-                has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-                has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-            ).order_by('date')
-            
-        columns_data.append({
-            'column': col,
-            'activities': activities
-        })
+    return {
+        'version': version,
+        'columns': [
+            render_to_string('kanban/board_column.html', {'col_data': col_data}, request=request)
+            for col_data in columns_data
+        ],
+        'filter_traitements': list(Traitement.objects.filter(done=False).exclude(description="").values_list('description', flat=True).distinct().order_by('description')),
+        'filter_taches': list(Tache.objects.filter(done=False).exclude(description="").values_list('description', flat=True).distinct().order_by('description')),
+    }
+
+def board(request):
+    # Rendered columns are reused until the next write (see board_cache)
+    fragment = cached_fragment('board', user_variant(request), lambda: _board_fragment(request))
         
     context = {
-        'columns_data': columns_data,
+        'board_columns': fragment['columns'],
+        'board_version': fragment['version'],
         'page_title': "Tableau de Bord",
-        'filter_traitements': Traitement.objects.filter(done=False).exclude(description="").values_list('description', flat=True).distinct().order_by('description'),
-        'filter_taches': Tache.objects.filter(done=False).exclude(description="").values_list('description', flat=True).distinct().order_by('description'),
+        'filter_traitements': fragment['filter_traitements'],
+        'filter_taches': fragment['filter_taches'],
     }
     return render(request, 'kanban/board.html', context)
 
+def _synthese_data():
+    # One aggregate pass over the non-archived activities (see statistics.py)
+    stats = synthese_statistics()
+    return {
+        'total_count': stats.total,
+        'termine_count': stats.termine,
+        'cta_count': stats.cta,
+        'reparation_count': stats.reparation,
+        'attente_count': stats.attente,
+        'remaining_count': stats.remaining,
+        'remaining_activities': stats.remaining_activities,
+        'board_stats': board_statistics(),
+    }
+
 def synthese(request):
-    # Base: Exclude Archived
-    base_qs = Activity.objects.exclude(column__name='Archivé')
-    
-    total_count = base_qs.count()
-    
-    # 1. Terminé (Column 'Terminé')
-    termine_qs = base_qs.filter(column__name='Terminé')
-    termine_count = termine_qs.count()
-    
-    # Working set (Non-Terminé) for further subtractions
-    non_termine_qs = base_qs.exclude(column__name='Terminé')
-    
-    # 2. CTA Validated (Active)
-    cta_qs = non_termine_qs.filter(scelles__cta_validated=True).distinct()
-    cta_count = cta_qs.count()
-    
-    # 3. Réparations Validated (Active)
-    rep_qs = non_termine_qs.filter(scelles__reparations_validated=True).distinct()
-    reparation_count = rep_qs.count()
-    
-    # 4. En Attente (Physical Column) (Active)
-    attente_qs = non_termine_qs.filter(column__name='En attente')
-    attente_count = attente_qs.count()
-    
-    # 5. Remaining / "En cours réel"
-    # Calculation: Total Active - (CTA U Rep U EnAttente)
-    remaining_qs = non_termine_qs.exclude(
-        Q(scelles__cta_validated=True) |
-        Q(scelles__reparations_validated=True) |
-        Q(column__name='En attente')
-    ).distinct()
-    
-    remaining_count = remaining_qs.count()
-    
+    context = {'page_title': "Synthèse des Activités"}
+    context.update(cached_fragment('synthese', 'all', _synthese_data))
+    return render(request, 'kanban/synthese.html', context)
+
+def _trend_days(request):
+    days = int(request.GET.get('days', DEFAULT_TREND_DAYS))
+    if days < 1:
+        raise ValueError('days must be positive')
+    return days
+
+def trends(request):
+    try:
+        days = _trend_days(request)
+    except ValueError:
+        days = DEFAULT_TREND_DAYS
     context = {
-        'page_title': "Synthèse des Activités",
-        'total_count': total_count,
-        'termine_count': termine_count,
-        'cta_count': cta_count,
-        'reparation_count': reparation_count,
-        'attente_count': attente_count,
-        'remaining_count': remaining_count,
-        'remaining_activities': remaining_qs.prefetch_related('tags', 'scelles').order_by('date')
+        'page_title': "Tendances",
+        'days': days,
+        'trend': trend(days),
     }
-    return render(request, 'kanban/synthese.html', context)
+    return render(request, 'kanban/trends.html', context)
+
+def trends_api(request):
+    try:
+        days = _trend_days(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', **trend(days)})
 
 # ... (API endpoints remain unchanged until get_activity_columns) ...
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def update_column_order(request):
     try:
         data = json.loads(request.body)
@@ -280,6 +117,7 @@ def update_column_order(request):
         with transaction.atomic():
             for index, col_id in enumerate(order):
                 KanbanColumn.objects.filter(id=col_id).update(order_index=index)
+            record_change(None)
         
         logger.info(f"User {request.user.username} updated column order.")
         return JsonResponse({'status': 'success'})
@@ -288,6 +126,7 @@ def update_column_order(request):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def move_activity(request):
     try:
         data = json.loads(request.body)
@@ -301,7 +140,9 @@ def move_activity(request):
         column = KanbanColumn.objects.get(id=column_id)
         
         activity.column = column
-        activity.save()
+        with transaction.atomic():
+            activity.save()
+            touch_activity(activity.id)
         
         logger.info(f"User {request.user.username} moved activity {activity_id} ('{activity.name}') to column {column.name}.")
         return JsonResponse({'status': 'success'})
@@ -313,25 +154,30 @@ def move_activity(request):
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 def get_activity_details(request, activity_id):
+    related = ('tags', 'scelles', 'scelles__traitements', 'scelles__taches', 'scelles__tags')
+    archived = False
     try:
-        activity = Activity.objects.prefetch_related(
-            'tags',
-            'scelles',
-            'scelles__traitements',
-            'scelles__taches',
-            'scelles__tags'
-        ).get(id=activity_id)
-        
-        context = {
-            'activity': activity,
-            'all_tags': Tag.objects.all()
-        }
-        return render(request, 'kanban/activity_detail.html', context)
+        activity = Activity.objects.prefetch_related(*related).get(id=activity_id)
     except Activity.DoesNotExist:
-        return JsonResponse({'error': 'Activity not found'}, status=404)
+        # Archived dossier: read-only view of the cold storage copy
+        try:
+            activity = ArchivedActivity.objects.prefetch_related(*related).get(id=activity_id)
+            archived = True
+        except ArchivedActivity.DoesNotExist:
+            return JsonResponse({'error': 'Activity not found'}, status=404)
+
+    context = {
+        'activity': activity,
+        'archived': archived,
+        # The write endpoints only reach the hot tables
+        'editable': request.user.is_superuser and not archived,
+        'all_tags': Tag.objects.all()
+    }
+    return render(request, 'kanban/activity_detail.html', context)
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def create_tag(request):
     try:
         data = json.loads(request.body)
@@ -349,6 +195,7 @@ def create_tag(request):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def update_activity(request, activity_id):
     try:
         activity = Activity.objects.get(id=activity_id)
@@ -368,7 +215,9 @@ def update_activity(request, activity_id):
         if 'description' in data:
             activity.description = data['description']
             
-        activity.save()
+        with transaction.atomic():
+            activity.save()
+            touch_activity(activity.id)
         logger.info(f"User {request.user.username} updated activity {activity_id} ('{activity.name}').")
         return JsonResponse({'status': 'success'})
     except Activity.DoesNotExist:
@@ -378,6 +227,7 @@ def update_activity(request, activity_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def toggle_activity_tag(request, activity_id):
     try:
         activity = Activity.objects.get(id=activity_id)
@@ -389,12 +239,14 @@ def toggle_activity_tag(request, activity_id):
             
         tag = Tag.objects.get(id=tag_id)
         
-        if tag in activity.tags.all():
-            activity.tags.remove(tag)
-            action = 'removed'
-        else:
-            activity.tags.add(tag)
-            action = 'added'
+        with transaction.atomic():
+            if tag in activity.tags.all():
+                activity.tags.remove(tag)
+                action = 'removed'
+            else:
+                activity.tags.add(tag)
+                action = 'added'
+            touch_activity(activity.id)
             
         logger.info(f"User {request.user.username} {action} tag {tag.name} from activity {activity_id} ('{activity.name}').")
         return JsonResponse({'status': 'success', 'action': action})
@@ -403,21 +255,25 @@ def toggle_activity_tag(request, activity_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def delete_activity(request, activity_id):
     try:
         activity = Activity.objects.get(id=activity_id)
         
-        # Manual Cascade
-        # 1. Scelles (and their children Traitements/Taches via their own models)
-        # We loop to ensure Django signals/cascades on Scelle children run if needed
-        for scelle in activity.scelles.all():
-            scelle.delete()
+        with transaction.atomic():
+            # Manual Cascade
+            # 1. Scelles (and their children Traitements/Taches via their own models)
+            # We loop to ensure Django signals/cascades on Scelle children run if needed
+            for scelle in activity.scelles.all():
+                scelle.delete()
+                
+            # 2. Tags (M2M) - clear association
+            activity.tags.clear()
             
-        # 2. Tags (M2M) - clear association
-        activity.tags.clear()
-        
-        # 3. Delete Activity
-        activity.delete()
+            # 3. Delete Activity
+            activity.delete()
+            record_change(activity_id)
+        invalidate_suggestions()
         
         logger.info(f"User {request.user.username} deleted activity {activity_id} ('{activity.name}').")
         return JsonResponse({'status': 'success'})
@@ -427,6 +283,7 @@ def delete_activity(request, activity_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def create_activity(request):
     try:
         data = json.loads(request.body)
@@ -436,21 +293,17 @@ def create_activity(request):
             
         column = KanbanColumn.objects.get(id=column_id)
         
-        activity = Activity.objects.create(
-            name="Nouvelle Activité",
-            date=timezone.now().date(),
-            description="",
-            column=column
-        )
-        
-        # Manually set counts/flags for template rendering
-        activity.pending_traitements = 0
-        activity.pending_taches = 0
-        activity.has_cta = False
-        activity.has_reparations = False
+        with transaction.atomic():
+            activity = Activity.objects.create(
+                name="Nouvelle Activité",
+                date=timezone.now().date(),
+                description="",
+                column=column
+            )
+            refresh_activity_counters(activity.id)
         
         # Render the card HTML
-        card_html = render_to_string('kanban/card_snippet.html', {'activity': activity})
+        card_html = CardRenderer(request).render(card_queryset().get(id=activity.id))
         
         logger.info(f"User {request.user.username} created activity {activity.id} ('{activity.name}') in column {column.name}.")
         return JsonResponse({
@@ -463,16 +316,19 @@ def create_activity(request):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def add_scelle(request, activity_id):
     try:
         activity = Activity.objects.get(id=activity_id)
         # Using default values for new scelle
         from .models import Scelle
-        scelle = Scelle.objects.create(
-            activity=activity,
-            name="Nouveau Scellé",
-            info=""
-        )
+        with transaction.atomic():
+            scelle = Scelle.objects.create(
+                activity=activity,
+                name="Nouveau Scellé",
+                info=""
+            )
+            refresh_activity_counters(activity.id)
         return JsonResponse({'status': 'success', 'scelle_id': scelle.id})
         logger.info(f"User {request.user.username} added scelle {scelle.id} ('{scelle.name}') to activity {activity_id} ('{activity.name}').")
     except Exception as e:
@@ -480,6 +336,7 @@ def add_scelle(request, activity_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def update_scelle(request, scelle_id):
     try:
         from .models import Scelle
@@ -495,7 +352,9 @@ def update_scelle(request, scelle_id):
         if 'reparations_validated' in data:
             scelle.reparations_validated = data['reparations_validated']
             
-        scelle.save()
+        with transaction.atomic():
+            scelle.save()
+            refresh_activity_counters(scelle.activity_id)
         logger.info(f"User {request.user.username} updated scelle {scelle_id} ('{scelle.name}') in activity '{scelle.activity.name if scelle.activity else '?'}' .")
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -503,13 +362,17 @@ def update_scelle(request, scelle_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def delete_scelle(request, scelle_id):
     try:
         from .models import Scelle
         scelle = Scelle.objects.get(id=scelle_id)
         scelle_name = scelle.name
         activity_name = scelle.activity.name if scelle.activity else "?"
-        scelle.delete()
+        with transaction.atomic():
+            scelle.delete()
+            refresh_activity_counters(scelle.activity_id)
+        invalidate_suggestions()
         
         logger.info(f"User {request.user.username} deleted scelle {scelle_id} ('{scelle_name}') from activity '{activity_name}'.")
         return JsonResponse({'status': 'success'})
@@ -520,6 +383,7 @@ def delete_scelle(request, scelle_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def add_traitement(request, scelle_id):
     try:
         from .models import Scelle, Traitement
@@ -529,7 +393,10 @@ def add_traitement(request, scelle_id):
         if not description:
             return JsonResponse({'status': 'error', 'message': 'Missing description'}, status=400)
             
-        t = Traitement.objects.create(scelle=scelle, description=description, done=False)
+        with transaction.atomic():
+            t = Traitement.objects.create(scelle=scelle, description=description, done=False)
+            refresh_activity_counters(scelle.activity_id)
+        invalidate_suggestions('traitements')
         logger.info(f"User {request.user.username} added traitement {t.id} ('{description}') to scelle {scelle_id} ('{scelle.name}').")
         return JsonResponse({'status': 'success', 'traitement_id': t.id})
     except Exception as e:
@@ -537,6 +404,7 @@ def add_traitement(request, scelle_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def toggle_traitement(request, traitement_id):
     try:
         from .models import Traitement
@@ -547,7 +415,9 @@ def toggle_traitement(request, traitement_id):
             t.done_at = timezone.now().date()
         else:
             t.done_at = None
-        t.save()
+        with transaction.atomic():
+            t.save()
+            refresh_activity_counters(t.scelle.activity_id if t.scelle else None)
         logger.info(f"User {request.user.username} toggled traitement {traitement_id} ('{t.description}') on scelle '{t.scelle.name if t.scelle else '?'}' (done={t.done}).")
         return JsonResponse({'status': 'success', 'done': t.done})
     except Exception as e:
@@ -555,13 +425,18 @@ def toggle_traitement(request, traitement_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def delete_traitement(request, traitement_id):
     try:
         from .models import Traitement
         t = Traitement.objects.get(id=traitement_id)
         desc = t.description
         scelle_name = t.scelle.name if t.scelle else "?"
-        t.delete()
+        activity_id = t.scelle.activity_id if t.scelle else None
+        with transaction.atomic():
+            t.delete()
+            refresh_activity_counters(activity_id)
+        invalidate_suggestions('traitements')
         
         logger.info(f"User {request.user.username} deleted traitement {traitement_id} ('{desc}') from scelle '{scelle_name}'.")
         return JsonResponse({'status': 'success'})
@@ -570,6 +445,7 @@ def delete_traitement(request, traitement_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def add_tache(request, scelle_id):
     try:
         from .models import Scelle, Tache
@@ -579,7 +455,10 @@ def add_tache(request, scelle_id):
         if not description:
             return JsonResponse({'status': 'error', 'message': 'Missing description'}, status=400)
             
-        t = Tache.objects.create(scelle=scelle, description=description, done=False)
+        with transaction.atomic():
+            t = Tache.objects.create(scelle=scelle, description=description, done=False)
+            refresh_activity_counters(scelle.activity_id)
+        invalidate_suggestions('taches')
         logger.info(f"User {request.user.username} added tache {t.id} ('{description}') to scelle {scelle_id} ('{scelle.name}').")
         return JsonResponse({'status': 'success', 'tache_id': t.id})
     except Exception as e:
@@ -587,6 +466,7 @@ def add_tache(request, scelle_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def toggle_tache(request, tache_id):
     try:
         from .models import Tache
@@ -597,7 +477,9 @@ def toggle_tache(request, tache_id):
             t.done_at = timezone.now().date()
         else:
             t.done_at = None
-        t.save()
+        with transaction.atomic():
+            t.save()
+            refresh_activity_counters(t.scelle.activity_id if t.scelle else None)
         logger.info(f"User {request.user.username} toggled tache {tache_id} ('{t.description[:50]}') on scelle '{t.scelle.name if t.scelle else '?'}' (done={t.done}).")
         return JsonResponse({'status': 'success', 'done': t.done})
     except Exception as e:
@@ -605,13 +487,18 @@ def toggle_tache(request, tache_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def delete_tache(request, tache_id):
     try:
         from .models import Tache
         t = Tache.objects.get(id=tache_id)
         desc = t.description
         scelle_name = t.scelle.name if t.scelle else "?"
-        t.delete()
+        activity_id = t.scelle.activity_id if t.scelle else None
+        with transaction.atomic():
+            t.delete()
+            refresh_activity_counters(activity_id)
+        invalidate_suggestions('taches')
         
         logger.info(f"User {request.user.username} deleted tache {tache_id} ('{desc}') from scelle '{scelle_name}'.")
         return JsonResponse({'status': 'success'})
@@ -622,105 +509,17 @@ def delete_tache(request, tache_id):
 @require_POST
 def get_activity_columns(request, activity_id):
     try:
-        # Create subqueries for accurate counts
-        pending_traitements_subquery = Traitement.objects.filter(
-            scelle__activity=OuterRef('pk'),
-            done=False
-        ).values('scelle__activity').annotate(
-            total=Count('id')
-        ).values('total')
-        
-        pending_taches_subquery = Tache.objects.filter(
-            scelle__activity=OuterRef('pk'),
-            done=False
-        ).values('scelle__activity').annotate(
-            total=Count('id')
-        ).values('total')
+        activity = annotate_activity(card_queryset().get(id=activity_id))
         
-        activity = Activity.objects.prefetch_related('tags', 'scelles').annotate(
-            pending_traitements=Coalesce(
-                Subquery(pending_traitements_subquery, output_field=IntegerField()),
-                Value(0)
-            ),
-            pending_taches=Coalesce(
-                Subquery(pending_taches_subquery, output_field=IntegerField()),
-                Value(0)
-            ),
-            has_cta=Exists(Scelle.objects.filter(activity=OuterRef('pk'), cta_validated=True)),
-            has_reparations=Exists(Scelle.objects.filter(activity=OuterRef('pk'), reparations_validated=True))
-        ).get(id=activity_id)
-        
-        # Calculate in which columns this activity should appear
-        target_columns = []
-        
-        # 1. Physical column
-        if activity.column:
-            # Special case for "En cours": filtering out if CTA/Rep validated
-            if activity.column.name == "En cours":
-                has_cta = activity.scelles.filter(cta_validated=True).exists()
-                has_rep = activity.scelles.filter(reparations_validated=True).exists()
-                
-                if not has_cta and not has_rep:
-                    target_columns.append(activity.column.id)
-            else:
-                target_columns.append(activity.column.id)
-            
-            # 2. Virtual Columns (only if physical is "En cours")
-            if activity.column.name == "En cours":
-                has_cta = activity.scelles.filter(cta_validated=True).exists()
-                has_rep = activity.scelles.filter(reparations_validated=True).exists()
-                
-                # En attente logic (Aggregation)
-                if has_cta or has_rep:
-                    try:
-                        attente_col = KanbanColumn.objects.get(name="En attente")
-                        target_columns.append(attente_col.id)
-                    except KanbanColumn.DoesNotExist:
-                        pass
-                
-                if has_cta:
-                    try:
-                        cta_col = KanbanColumn.objects.get(name="CTA")
-                        target_columns.append(cta_col.id)
-                    except KanbanColumn.DoesNotExist:
-                        pass
-                        
-                if has_rep:
-                    try:
-                        rep_col = KanbanColumn.objects.get(name="Réparations")
-                        target_columns.append(rep_col.id)
-                    except KanbanColumn.DoesNotExist:
-                        pass
-                
-                # Check for Traitements (additive but EXCLUSIVE of CTA/Rep on same scelle)
-                if activity.scelles.filter(
-                    traitements__done=False,
-                    cta_validated=False,
-                    reparations_validated=False
-                ).exists():
-                    try:
-                        traitement_col = KanbanColumn.objects.get(name="Traitements")
-                        target_columns.append(traitement_col.id)
-                    except KanbanColumn.DoesNotExist:
-                        pass
-                        
-                # Check for Tâches (additive but EXCLUSIVE of CTA/Rep on same scelle)
-                if activity.scelles.filter(
-                    taches__done=False,
-                    cta_validated=False,
-                    reparations_validated=False
-                ).exists():
-                    try:
-                        tache_col = KanbanColumn.objects.get(name="Tâches")
-                        target_columns.append(tache_col.id)
-                    except KanbanColumn.DoesNotExist:
-                        pass
-
-        card_html = render_to_string('kanban/card_snippet.html', {'activity': activity})
+        # Calculate in which columns this activity should appear (same rules as the board)
+        column_ids = dict(KanbanColumn.objects.values_list('name', 'id'))
+        target_columns = target_column_ids(state_of(activity), column_ids)
+
+        card_html = CardRenderer(request).render(activity)
         
         return JsonResponse({
             'status': 'success', 
-            'columns': list(set(target_columns)), # Unique
+            'columns': list(target_columns),
             'card_html': card_html
         })
     except Exception as e:
@@ -728,44 +527,153 @@ def get_activity_columns(request, activity_id):
         print(traceback.format_exc())
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
-def suggestion_traitements(request):
+def board_changes(request):
     try:
-        from .models import Traitement
-        descriptions = Traitement.objects.filter(description__isnull=False).exclude(description__exact='').values_list('description', flat=True).distinct().order_by('description')
-        return JsonResponse({'status': 'success', 'suggestions': list(descriptions)})
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid since'}, status=400)
+    
+    version, reload, activity_ids = changes_since(since)
+    changes = []
+    
+    if activity_ids:
+        activities = {a.id: a for a in annotate_activities(card_queryset().filter(id__in=activity_ids))}
+        column_ids = dict(KanbanColumn.objects.exclude(name='Archivé').values_list('name', 'id'))
+        present = [activities[i] for i in activity_ids if i in activities]
+        cards = dict(zip([a.id for a in present], CardRenderer(request).render_all((a, False) for a in present)))
+        
+        for activity_id in activity_ids:
+            activity = activities.get(activity_id)
+            if activity is None:
+                # Deleted: remove it from every column
+                changes.append({'id': activity_id, 'columns': [], 'card_html': None})
+            else:
+                changes.append({
+                    'id': activity_id,
+                    'columns': list(target_column_ids(state_of(activity), column_ids)),
+                    'card_html': cards[activity_id]
+                })
+    
+    return JsonResponse({
+        'status': 'success',
+        'version': version,
+        'reload': reload,
+        'changes': changes
+    })
+
+def _suggestion_response(request, kind):
+    try:
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_SUGGESTIONS))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid limit'}, status=400)
+        matches = suggest(kind, request.GET.get('q', ''), limit)
+        return JsonResponse({
+            'status': 'success',
+            'suggestions': [description for description, _ in matches],
+            'counts': [uses for _, uses in matches],
+        })
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
+def suggestion_traitements(request):
+    return _suggestion_response(request, 'traitements')
+
 def suggestion_taches(request):
+    return _suggestion_response(request, 'taches')
+
+def search(request):
     try:
-        from .models import Tache
-        descriptions = Tache.objects.filter(description__isnull=False).exclude(description__exact='').values_list('description', flat=True).distinct().order_by('description')
-        return JsonResponse({'status': 'success', 'suggestions': list(descriptions)})
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', DEFAULT_SEARCH_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid page'}, status=400)
+    query = request.GET.get('q', '')
+    try:
+        result = search_index(query, page, page_size)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'page': result.page,
+        'page_size': result.page_size,
+        'total': result.total,
+        'has_next': result.page * result.page_size < result.total,
+        'results': result.results,
+    })
+
+def _archives_request(request):
+    """(filters, cursor, page_size) from the query string; ValueError if malformed."""
+    filters = parse_filters(request.GET)
+    cursor = request.GET.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+    page_size = int(request.GET.get('page_size', ARCHIVES_PAGE_SIZE))
+    return filters, cursor, page_size
 
 def archives(request):
     try:
-        archived_col = KanbanColumn.objects.get(name='Archivé')
-        activities = Activity.objects.filter(column=archived_col).order_by('-date')
-    except KanbanColumn.DoesNotExist:
-        activities = []
-    
+        filters, cursor, page_size = _archives_request(request)
+    except ValueError:
+        filters, cursor, page_size = parse_filters({}), None, ARCHIVES_PAGE_SIZE
+
+    if filters.active or cursor or page_size != ARCHIVES_PAGE_SIZE:
+        page = archive_page(filters, cursor, page_size)
+    else:
+        # Default first page, shared by every visitor
+        page = cached_fragment('archives', 'all', archive_page)
+
+    next_url = None
+    if page.next_cursor:
+        next_url = '?' + urlencode({**filters.as_params(), 'cursor': page.next_cursor})
+
     context = {
-        'activities': activities,
+        'activities': page.activities,
+        'filters': filters,
+        'all_tags': Tag.objects.order_by('name'),
+        'next_url': next_url,
+        'is_first_page': not cursor,
+        'first_url': '?' + urlencode(filters.as_params()),
         'page_title': "Archives"
     }
     return render(request, 'kanban/archives.html', context)
 
+def archives_api(request):
+    try:
+        filters, cursor, page_size = _archives_request(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    page = archive_page(filters, cursor, page_size)
+    return JsonResponse({
+        'status': 'success',
+        'results': [
+            {
+                'id': activity.id,
+                'name': activity.name,
+                'date': activity.date.isoformat(),
+                'description': activity.description,
+                'tags': [{'id': tag.id, 'name': tag.name, 'color': tag.color} for tag in activity.tags.all()],
+            }
+            for activity in page.activities
+        ],
+        'next_cursor': page.next_cursor,
+    })
+
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def archive_activity(request, activity_id):
     try:
         activity = Activity.objects.get(id=activity_id)
         archived_col, _ = KanbanColumn.objects.get_or_create(name='Archivé')
         activity.column = archived_col
-        activity.save()
-        activity.save()
+        with transaction.atomic():
+            activity.save()
+            touch_activity(activity.id)
+            # The whole tree leaves the hot tables (see archives.py)
+            freeze_activity(activity.id)
         logger.info(f"User {request.user.username} archived activity {activity_id} ('{activity.name}').")
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -773,14 +681,18 @@ def archive_activity(request, activity_id):
 
 @require_POST
 @user_passes_test(lambda u: u.is_superuser)
+@invalidates_board
 def unarchive_activity(request, activity_id):
     try:
-        activity = Activity.objects.get(id=activity_id)
         # Move back to "En attente" by default
         target_col = KanbanColumn.objects.get(name='En attente')
-        activity.column = target_col
-        activity.save()
-        activity.save()
+        with transaction.atomic():
+            # Back from cold storage first (no-op for a dossier still in the hot tables)
+            thaw_activity(activity_id)
+            activity = Activity.objects.get(id=activity_id)
+            activity.column = target_col
+            activity.save()
+            touch_activity(activity.id)
         logger.info(f"User {request.user.username} unarchived activity {activity_id} ('{activity.name}').")
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -798,92 +710,50 @@ def admin_export_form_view(request):
     }
     return render(request, 'kanban/admin_export_form.html', context)
 
+SECTION_END = '        </tbody>\n    </table>\n'
+PAGE_END = '\n</body>\n\n</html>\n'
+
 @user_passes_test(lambda u: u.is_superuser)
 def admin_export_report(request):
     today = date.today()
-    
-    # Get dates from request, default to today if not provided
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
-    
-    if start_date_str and end_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            start_date = today
-            end_date = today
-    else:
-        start_date = today
-        end_date = today
-    
-    # 1. Traitements Validated in Range
-    traitements = Traitement.objects.filter(done=True, done_at__range=(start_date, end_date)).select_related('scelle', 'scelle__activity')
-    
-    # 2. Tasks Validated in Range
-    taches = Tache.objects.filter(done=True, done_at__range=(start_date, end_date)).select_related('scelle', 'scelle__activity')
-    
-    # 3. Finished Cards (Currently in 'Terminé')
-    finished_cards = Activity.objects.filter(column__name='Terminé').order_by('-date')
-    
-    # 4. Active Cards Processing
-    active_cards = Activity.objects.exclude(column__name='Terminé').prefetch_related('scelles')
-    
-    cta_cards = []
-    reparations_cards = []
-    urgent_cards = []
-    overdue_cards = []
-    
-    limit_date = today + timedelta(days=30)
-    
-    for card in active_cards:
-        # Check specific states first
-        is_cta = False
-        is_reparations = False
-        
-        # Check seals for CTA/Reparations status
-        for scelle in card.scelles.all():
-            if scelle.cta_validated:
-                is_cta = True
-            if scelle.reparations_validated:
-                is_reparations = True
-        
-        if is_cta:
-            cta_cards.append(card)
-            # If it's in CTA, we don't list it in Urgent/Overdue (per request)
-            continue
-            
-        if is_reparations:
-            reparations_cards.append(card)
-            # If it's in Reparations, we don't list it in Urgent/Overdue (per request)
-            continue
-            
-        # If not in special state, check urgency
-        if card.date:
-            if card.date < today:
-                card.days_overdue = (today - card.date).days
-                overdue_cards.append(card)
-            elif card.date <= limit_date:
-                card.days_remaining = (card.date - today).days
-                urgent_cards.append(card)
-    
-    # Sort lists
-    cta_cards.sort(key=lambda x: x.date if x.date else date.max)
-    reparations_cards.sort(key=lambda x: x.date if x.date else date.max)
-    overdue_cards.sort(key=lambda x: x.date) 
-    urgent_cards.sort(key=lambda x: x.date) 
-    
-    context = {
-        'today': today,
-        'start_date': start_date,
-        'end_date': end_date,
-        'traitements': traitements,
-        'taches': taches,
-        'finished_cards': finished_cards,
-        'cta_cards': cta_cards,
-        'reparations_cards': reparations_cards,
-        'urgent_cards': urgent_cards,
-        'overdue_cards': overdue_cards,
-    }
-    
-    return render(request, 'kanban/admin_export.html', context)
+    # Dates from the request, today if missing or invalid
+    start_date, end_date = report_range(request.GET, today)
+
+    def stream():
+        yield render_to_string('kanban/admin_export.html', {
+            'today': today,
+            'start_date': start_date,
+            'end_date': end_date,
+            'board_stats': board_statistics(),
+        }, request)
+        # One query per section, rows rendered by chunks (see report.py)
+        for section in report_sections(start_date, end_date, today):
+            chunks = section_chunks(section, today)
+            first = next(chunks, None)
+            yield render_to_string('kanban/admin_export_section.html', {'section': section, 'empty': first is None})
+            if first is None:
+                continue
+            yield render_to_string('kanban/admin_export_rows.html', {'section': section, 'rows': first})
+            for chunk in chunks:
+                yield render_to_string('kanban/admin_export_rows.html', {'section': section, 'rows': chunk})
+            yield SECTION_END
+        yield PAGE_END
+
+    return stream_response(request, stream(), 'text/html; charset=utf-8')
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def export_data(request, dataset, fmt):
+    """Report data as CSV, JSON Lines or XLSX, same range parameters as admin_export_report."""
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"Export inconnu : {dataset}.{fmt}",
+            'datasets': list(EXPORT_DATASETS),
+            'formats': list(EXPORT_FORMATS),
+        }, status=404)
+    today = date.today()
+    start_date, end_date = report_range(request.GET, today)
+    chunks = export_stream(dataset, fmt, start_date, end_date, today)
+    filename = f'{dataset}_{start_date}_{end_date}.{fmt}'
+    return stream_response(request, chunks, EXPORT_FORMATS[fmt], filename)
@@ -0,0 +1,134 @@
+"""
+Minimal streaming XLSX writer (no third-party dependency).
+
+An .xlsx file is a ZIP of a few XML parts. The worksheet parts are written
+row by row into a zipfile opened on a write-only sink, and the compressed
+bytes are handed out as soon as zipfile produces them: a workbook of any
+size is built with flat memory and starts downloading at once. Strings are
+stored inline (no shared-string table to keep in memory), numbers as
+numbers, dates as ISO text.
+"""
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+# Rows written between two flushes of the compressed output
+FLUSH_ROWS = 500
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{index}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+WORKBOOK_SHEET = '<sheet name="{name}" sheetId="{index}" r:id="rId{index}"/>'
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}</Relationships>'
+)
+WORKBOOK_REL = (
+    '<Relationship Id="rId{index}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{index}.xml"/>'
+)
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Sink:
+    """Write-only file object collecting what zipfile writes (not seekable: zipfile streams)."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, date):
+        value = value.isoformat()
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def row_xml(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+def sheet_name(name):
+    # Excel: 31 characters at most, none of []:*?/\
+    for char in '[]:*?/\\':
+        name = name.replace(char, ' ')
+    return escape(name[:31], {'"': '&quot;'})
+
+
+def xlsx_stream(sheets):
+    """
+    Yield the bytes of a workbook made of ``sheets``, a list of
+    ``(name, headers, rows)`` where rows is any iterable of value tuples
+    (consumed lazily, one sheet after the other).
+    """
+    sink = _Sink()
+    indexes = range(1, len(sheets) + 1)
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES.format(
+            sheets=''.join(SHEET_CONTENT_TYPE.format(index=index) for index in indexes)))
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr('xl/workbook.xml', WORKBOOK.format(sheets=''.join(
+            WORKBOOK_SHEET.format(name=sheet_name(name), index=index)
+            for index, (name, _, _) in zip(indexes, sheets))))
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS.format(
+            sheets=''.join(WORKBOOK_REL.format(index=index) for index in indexes)))
+        yield sink.drain()
+
+        for index, (name, headers, rows) in zip(indexes, sheets):
+            with archive.open(f'xl/worksheets/sheet{index}.xml', 'w', force_zip64=True) as part:
+                part.write((SHEET_START + row_xml(headers)).encode())
+                for count, values in enumerate(rows, 1):
+                    part.write(row_xml(values).encode())
+                    if count % FLUSH_ROWS == 0:
+                        yield sink.drain()
+                part.write(SHEET_END.encode())
+            yield sink.drain()
+    yield sink.drain()
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'organiseur_web.settings')
 
-application = get_asgi_application()
+# What get_asgi_application() does, with a handler that produces the chunks
+# of the streamed reports and exports off the event loop (kanban/streaming.py)
+django.setup(set_prefix=False)
+
+# Imported after Django setup: the /api/board/events/ stream is served
+# next to Django, see kanban/sse.py
+from kanban.sse import with_board_events  # noqa: E402
+from kanban.streaming import StreamingASGIHandler  # noqa: E402
+
+django_application = StreamingASGIHandler()
+
+application = with_board_events(django_application)
@@ -10,11 +10,17 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The repository root holds the `database` package of the desktop app, whose
+# SQLite connection profile (database/sqlite_profile.py) is shared with Django.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
@@ -42,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'kanban.profiling.SQLProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +88,40 @@ DATABASES = {
     }
 }
 
+# PRAGMAs applied to every new SQLite connection (WAL, busy_timeout...), see
+# kanban/apps.py. Shared with the desktop app, which opens the same file.
+SQLITE_PROFILE = 'database.sqlite_profile.SQLITE_PRAGMAS'
+
+# The kanban tables are unmanaged: the test runner builds them from
+# database/models.py in a temporary SQLite file.
+TEST_RUNNER = 'kanban.test_runner.UnmanagedSchemaRunner'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Rendered board/synthèse/archives fragments (kanban/board_cache.py). The
+# file-based backend is shared by every worker process, so a write made
+# through one worker invalidates the fragments of all the others (LocMemCache
+# is per process). The test runner moves LOCATION to a temporary folder.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR.parent / 'cache',
+    }
+}
+
+KANBAN_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Per-request SQL profiling (kanban/profiling.py): requests slower than
+# KANBAN_SLOW_REQUEST_MS, with more than KANBAN_SLOW_REQUEST_QUERIES queries
+# or one statement repeated KANBAN_DUPLICATE_QUERIES times (N+1) are logged
+# to slow_requests.log. KANBAN_SERVER_TIMING adds a Server-Timing header.
+KANBAN_SLOW_REQUEST_MS = 500
+KANBAN_SLOW_REQUEST_QUERIES = 50
+KANBAN_DUPLICATE_QUERIES = 10
+KANBAN_SERVER_TIMING = DEBUG
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -134,6 +175,10 @@ LOGGING = {
             'style': '{',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
+        'json_line': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -142,6 +187,13 @@ LOGGING = {
             'filename': BASE_DIR.parent / 'user_actions.log',
             'formatter': 'verbose',
         },
+        'slow_requests': {
+            'level': 'WARNING',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR.parent / 'slow_requests.log',
+            'formatter': 'json_line',
+            'delay': True,
+        },
     },
     'loggers': {
         'user_actions': {
@@ -149,5 +201,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'kanban.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }